@@ -0,0 +1,336 @@
+# =========================================================
+# [분석 캐시] 저장 스냅샷 전체를 컬럼형으로 펼친 캐시 + 집계 (streamlit 비의존)
+# =========================================================
+# - 저장소(quote_store)의 스냅샷을 견적 / 재료비 행 / 가공비 행 3개 표로 펼쳐
+#   재료비 / 총가공비까지 계산해 둔다 (견적 1건씩 JSON 을 다시 읽고 계산하지 않음).
+# - 캐시는 ANALYTICS_DIR 안의 세그먼트 파일(seg_v<형식>_<첫 seq>_<끝 seq>.npz, 컬럼별 NumPy 배열)들.
+#   저장소는 추가만 되므로 마지막 seq 이후 스냅샷만 읽어 새 세그먼트로 덧붙인다 (refresh).
+#   세그먼트가 MAX_SEGMENTS 개를 넘으면 뒤쪽 작은 세그먼트들을 하나로 합친다.
+# - 가공비는 저장 시 합계와 같게 적용임율 / 임율표(저장일 기준)로 계산한다.
+# - 집계 함수(cost_trend / top_parts / rate_distribution)는 펼친 표에 groupby 한 번씩.
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cost_engine import calc_material, calc_process, money_add, money_bincount, money_mode, stack_snapshots
+from rate_table import get_rate_table
+
+ANALYTICS_DIR = "analytics_cache"
+REFRESH_BATCH = 5000
+MAX_SEGMENTS = 16
+
+KEY = "seq"
+QUOTE_TEXT = ["id", "saved_at", "p_no", "p_name", "car", "company"]
+MATERIAL_TEXT = ["부품키", "부품코드", "부품명", "재질/규격"]
+# 재료비 / 가공비 공식 입력은 모두 보관 (시나리오 재계산용, scenario.py)
+MATERIAL_VALUES = ["U/S", "단가", "NET(g,mm)", "자재LOSS율(%)", "산업폐기물처리비용", "다이캐스팅LOSS인정", "재료비"]
+PROCESS_TEXT = ["부품명", "공정명", "사용기계"]
+# 기본임율: 산출근거 직접 입력 전 임율 (임율표 또는 적용임율), 임율표: 기본임율이 임율표 값이면 1
+PROCESS_VALUES = ["U/S", "인", "공수(SEC)", "준비시간(분)", "산출근거(원/HR)", "여유율(%)", "기본임율", "임율표", "사용임율", "총가공비"]
+TABLES = {
+    "quotes": QUOTE_TEXT + ["labor_rate", "재료비", "가공비", "합계"],
+    "material": MATERIAL_TEXT + MATERIAL_VALUES,
+    "process": PROCESS_TEXT + PROCESS_VALUES,
+}
+# 차종 / 업체 / 부품코드 등 반복 값이 많은 컬럼은 category 로 올려 groupby 를 빠르게
+CATEGORY_COLS = {"quotes": ["p_no", "car", "company"], "material": ["부품키", "부품코드", "재질/규격"], "process": ["공정명", "사용기계"]}
+# 세그먼트 형식이 바뀌면 올린다 (다른 형식의 세그먼트는 refresh 때 지우고 다시 만듦)
+CACHE_VERSION = 2
+_SEGMENT_RE = re.compile(r"^seg_(?:v(\d+)_)?(\d+)_(\d+)\.npz$")
+
+
+def _text(values) -> np.ndarray:
+    series = pd.Series(values, dtype=object)
+    return series.where(series.notna(), "").astype(str).str.strip().to_numpy(dtype=str)
+
+
+def _empty_tables() -> dict:
+    return {name: pd.DataFrame({KEY: np.zeros(0, dtype=np.int64), **{col: [] for col in cols}})
+            for name, cols in TABLES.items()}
+
+
+def flatten_snapshots(pairs, rate_table=None) -> dict:
+    """[(seq, 스냅샷)] → {"quotes", "material", "process": DataFrame} (계산 컬럼 포함, 빈 행 제외)"""
+    snapshots = [{**snapshot, "id": seq, "_id": snapshot.get("id")} for seq, snapshot in pairs]
+    seqs = np.array([s["id"] for s in snapshots], dtype=np.int64)
+
+    material = stack_snapshots(snapshots, "material", key=KEY)
+    mat_calc = calc_material(material, with_inputs=True)
+    mat = pd.DataFrame({KEY: material[KEY].to_numpy(dtype=np.int64)})
+    for col in MATERIAL_TEXT[1:]:
+        mat[col] = _text(material[col])
+    # 부품 집계 키: 부품코드, 코드가 없으면 "품명:부품명"
+    mat.insert(1, "부품키", np.where(mat["부품코드"] != "", mat["부품코드"], "품명:" + mat["부품명"]))
+    for col in MATERIAL_VALUES:
+        mat[col] = mat_calc[col].to_numpy(dtype=float)
+    mat = mat[(mat["부품명"] != "") | (mat["부품코드"] != "") | (mat["재료비"] != 0)]
+
+    process = stack_snapshots(snapshots, "process", key=KEY)
+    # 기본임율 = 임율표(저장일 기준) > 적용임율 - cost_engine.snapshot_labor_rates 와 같은 순서
+    quote_rates = process[KEY].map({s["id"]: s.get("labor_rate", 0) for s in snapshots}).astype(float).fillna(0).to_numpy()
+    table_rates = np.full(len(process), np.nan)
+    if rate_table is not None and len(rate_table) and len(process):
+        saved = {s["id"]: str(s.get("saved_at") or "")[:10] or None for s in snapshots}
+        table_rates = rate_table.lookup(process["사용기계"], process["공정명"], process[KEY].map(saved).to_numpy())
+    rates = np.where(np.isnan(table_rates), quote_rates, table_rates)
+    pro_calc = calc_process(process, rates, with_inputs=True)
+    pro_calc["기본임율"] = rates
+    pro_calc["임율표"] = (~np.isnan(table_rates)).astype(float)
+    pro = pd.DataFrame({KEY: process[KEY].to_numpy(dtype=np.int64)})
+    for col in PROCESS_TEXT:
+        pro[col] = _text(process[col])
+    for col in PROCESS_VALUES:
+        pro[col] = pro_calc[col].to_numpy(dtype=float)
+    pro = pro[pro["공정명"] != ""]
+
+    quotes = pd.DataFrame({KEY: seqs})
+    for col in QUOTE_TEXT:
+        quotes[col] = _text([s.get("_id" if col == "id" else col, "") for s in snapshots])
+    quotes["labor_rate"] = pd.to_numeric(pd.Series([s.get("labor_rate") for s in snapshots], dtype=object),
+                                         errors="coerce").to_numpy(dtype=float)
+    # 견적별 합계 (seq 가 오름차순이므로 searchsorted 로 위치 → bincount)
+    quotes["재료비"] = money_bincount(np.searchsorted(seqs, mat[KEY].to_numpy()), mat["재료비"].to_numpy(), len(seqs))
+    quotes["가공비"] = money_bincount(np.searchsorted(seqs, pro[KEY].to_numpy()), pro["총가공비"].to_numpy(), len(seqs))
+    quotes["합계"] = money_add(quotes["재료비"], quotes["가공비"])
+    return {"quotes": quotes, "material": mat.reset_index(drop=True), "process": pro.reset_index(drop=True)}
+
+
+def _append_rows(frame: pd.DataFrame, new: pd.DataFrame, categories: list) -> pd.DataFrame:
+    """메모리 표에 새 행 덧붙이기 (category 컬럼은 범주만 합쳐서 전체를 다시 변환하지 않음)"""
+    if not len(new):
+        return frame
+    result = pd.concat([frame.drop(columns=categories), new.drop(columns=categories)], ignore_index=True)
+    for col in categories:
+        result[col] = union_categoricals([frame[col].array, pd.Categorical(new[col])])
+    return result[frame.columns]
+
+
+class AnalyticsCache:
+    """분석용 컬럼형 캐시 (폴더 1개). 한 프로세스 안에서는 같은 객체를 공유해서 쓴다."""
+
+    def __init__(self, folder: str = None):
+        # 금액 계산 방식(cost_engine.MONEY_MODE)마다 계산된 금액이 다르므로 폴더를 나눈다
+        self.folder = folder or (ANALYTICS_DIR if money_mode() == "float" else os.path.join(ANALYTICS_DIR, money_mode()))
+        self.tables = _empty_tables()
+        self.last_seq = 0
+        self._loaded = None  # 메모리에 올린 세그먼트 파일 이름 목록
+        self._lock = threading.RLock()
+
+    # -------------------------------------------------
+    # 세그먼트 파일
+    # -------------------------------------------------
+    def _segments(self) -> list[tuple[int, int, str]]:
+        """(첫 seq, 끝 seq, 파일명) - 첫 seq 순"""
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return []
+        found = [(int(m.group(2)), int(m.group(3)), name) for name in names
+                 if (m := _SEGMENT_RE.match(name)) and int(m.group(1) or 1) == CACHE_VERSION]
+        return sorted(found)
+
+    def _stale(self) -> list[str]:
+        """다른 형식(CACHE_VERSION)의 세그먼트 파일"""
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return []
+        return [name for name in names if (m := _SEGMENT_RE.match(name)) and int(m.group(1) or 1) != CACHE_VERSION]
+
+    def _read_segment(self, name: str) -> dict:
+        with np.load(os.path.join(self.folder, name), allow_pickle=False) as data:
+            return {table: pd.DataFrame({col: data[f"{table}.{col}"] for col in [KEY] + cols})
+                    for table, cols in TABLES.items()}
+
+    def _write_segment(self, tables: dict, first: int, last: int) -> str:
+        os.makedirs(self.folder, exist_ok=True)
+        name = f"seg_v{CACHE_VERSION}_{first:010d}_{last:010d}.npz"
+        arrays = {}
+        for table, cols in TABLES.items():
+            frame = tables[table]
+            arrays[f"{table}.{KEY}"] = frame[KEY].to_numpy(dtype=np.int64)
+            for col in cols:
+                values = frame[col]
+                arrays[f"{table}.{col}"] = (values.to_numpy(dtype=float) if pd.api.types.is_numeric_dtype(values)
+                                            else _text(values))
+        # 임시 파일에 쓴 뒤 교체 - 읽는 쪽이 쓰다 만 파일을 보지 않게
+        fd, tmp = tempfile.mkstemp(prefix=".seg_", suffix=".npz", dir=self.folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, os.path.join(self.folder, name))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return name
+
+    def _merge(self, segments, last: int = 0) -> tuple[dict, int]:
+        """세그먼트들을 읽어 표별로 이어 붙이기 → (표, 끝 seq)
+
+        합치기 전 / 후 세그먼트가 잠깐 같이 있거나 두 프로세스가 같은 구간을 덧붙인 경우
+        이미 읽은 seq(last) 이후의 행만 쓴다.
+        """
+        parts = {table: [] for table in TABLES}
+        for first, end, name in segments:
+            if end <= last:
+                continue
+            data = self._read_segment(name)
+            for table in TABLES:
+                frame = data[table]
+                parts[table].append(frame[frame[KEY] > last] if first <= last else frame)
+            last = end
+        tables = {table: pd.concat(frames, ignore_index=True) if frames else _empty_tables()[table]
+                  for table, frames in parts.items()}
+        return tables, last
+
+    def _load(self):
+        """세그먼트 목록이 바뀌었으면 다시 읽기 (다른 프로세스가 덧붙인 세그먼트 포함)"""
+        for _ in range(3):
+            segments = self._segments()
+            names = [name for _, _, name in segments]
+            if names == self._loaded:
+                return
+            # 세그먼트가 뒤에 덧붙기만 했으면 새 세그먼트만 읽어 이어 붙인다
+            appended = bool(self._loaded) and names[:len(self._loaded)] == self._loaded
+            try:
+                if appended:
+                    new, last = self._merge(segments[len(self._loaded):], self.last_seq)
+                    tables = {table: _append_rows(self.tables[table], new[table], CATEGORY_COLS[table]) for table in TABLES}
+                else:
+                    tables, last = self._merge(segments)
+                    for table, cols in CATEGORY_COLS.items():
+                        for col in cols:
+                            tables[table][col] = tables[table][col].astype("category")
+            except FileNotFoundError:
+                continue  # 다른 프로세스가 합치는 중 - 목록부터 다시
+            self.tables, self.last_seq, self._loaded = tables, last, names
+            return
+
+    def _compact(self):
+        """세그먼트가 많으면 뒤쪽 세그먼트들을 하나로 (뒤쪽이 첫 세그먼트보다 커지면 전체를 하나로)"""
+        segments = self._segments()
+        if len(segments) <= MAX_SEGMENTS:
+            return
+        tail = segments[1:]
+        if tail[-1][1] - tail[0][0] >= segments[0][1] - segments[0][0]:
+            tail = segments
+        tables, last = self._merge(tail)
+        merged = self._write_segment(tables, tail[0][0], last)
+        for _, _, name in tail:
+            if name != merged:
+                try:
+                    os.unlink(os.path.join(self.folder, name))
+                except FileNotFoundError:
+                    pass
+
+    # -------------------------------------------------
+    # 갱신
+    # -------------------------------------------------
+    def built(self) -> bool:
+        """캐시 파일이 하나라도 있는지 (처음 만들기 전에는 저장 때마다 갱신하지 않기 위해)"""
+        return bool(self._segments())
+
+    def refresh(self, store, batch_size: int = REFRESH_BATCH) -> int:
+        """저장소에서 캐시 이후에 저장된 스냅샷만 읽어 덧붙이기 → 새로 반영한 견적 수
+
+        저장소가 새로 만들어져 마지막 seq 가 캐시보다 작으면 전체를 다시 만든다.
+        """
+        with self._lock:
+            for name in self._stale():
+                os.unlink(os.path.join(self.folder, name))
+            self._load()
+            if store.last_seq() < self.last_seq:
+                return self.rebuild(store, batch_size)
+            added, batch = 0, []
+            rate_table = get_rate_table()
+            for pair in store.iter_since(self.last_seq):
+                batch.append(pair)
+                if len(batch) >= batch_size:
+                    added += self._append(batch, rate_table)
+                    batch = []
+            if batch:
+                added += self._append(batch, rate_table)
+            if added:
+                self._compact()
+                self._load()
+            return added
+
+    def _append(self, pairs: list, rate_table) -> int:
+        self._write_segment(flatten_snapshots(pairs, rate_table), pairs[0][0], pairs[-1][0])
+        return len(pairs)
+
+    def rebuild(self, store, batch_size: int = REFRESH_BATCH) -> int:
+        """캐시를 지우고 저장소 전체로 다시 만들기"""
+        with self._lock:
+            for name in [name for _, _, name in self._segments()] + self._stale():
+                os.unlink(os.path.join(self.folder, name))
+            self.tables, self.last_seq, self._loaded = _empty_tables(), 0, None
+            return self.refresh(store, batch_size)
+
+    # -------------------------------------------------
+    # 조회
+    # -------------------------------------------------
+    def frames(self, car=None, company=None, date_from=None, date_to=None) -> tuple:
+        """(견적, 재료비 행, 가공비 행) - 조건(차종 / 업체 / 저장일 'YYYY-MM-DD')에 맞는 견적만"""
+        with self._lock:
+            self._load()
+            quotes, material, process = (self.tables[t] for t in ("quotes", "material", "process"))
+        mask = np.ones(len(quotes), dtype=bool)
+        if car is not None:
+            mask &= (quotes["car"] == car).to_numpy()
+        if company is not None:
+            mask &= (quotes["company"] == company).to_numpy()
+        if date_from:
+            mask &= (quotes["saved_at"] >= str(date_from)).to_numpy()
+        if date_to:
+            mask &= (quotes["saved_at"] <= f"{date_to} 23:59:59").to_numpy()
+        if mask.all():
+            return quotes, material, process
+        seqs = quotes[KEY].to_numpy()[mask]
+        return (quotes[mask],
+                material[np.isin(material[KEY].to_numpy(), seqs)],
+                process[np.isin(process[KEY].to_numpy(), seqs)])
+
+
+# =========================================================
+# 집계
+# =========================================================
+def cost_trend(quotes: pd.DataFrame, by: str = "car", value: str = "합계", how: str = "mean") -> pd.DataFrame:
+    """월별 × 차종(또는 업체) 견적 금액 (how: mean = 견적당 평균, sum = 합계, count = 건수)"""
+    month = quotes["saved_at"].str.slice(0, 7).rename("월")
+    groups = quotes[value].groupby([month, quotes[by].astype(str).replace("", "(미입력)")], observed=True)
+    result = getattr(groups, how)().unstack(fill_value=0)
+    return result.sort_index()
+
+
+def top_parts(material: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """재료비 합계 상위 부품 (부품코드 기준, 코드가 없으면 부품명)"""
+    groups = material.groupby("부품키", observed=True, sort=False)
+    result = pd.DataFrame({
+        "견적수": groups[KEY].nunique(),
+        "평균단가": groups["단가"].mean(),
+        "재료비합계": groups["재료비"].sum(),
+    })
+    total = float(result["재료비합계"].sum())
+    result = result.nlargest(n, "재료비합계")
+    # 부품명은 상위 n개만 (마지막으로 저장된 이름)
+    top = material[material["부품키"].isin(result.index)].drop_duplicates("부품키", keep="last").set_index("부품키")
+    result.insert(0, "부품명", top["부품명"].reindex(result.index))
+    result["비중(%)"] = result["재료비합계"] / total * 100 if total else np.nan
+    return result.rename_axis("부품").reset_index()
+
+
+def rate_distribution(process: pd.DataFrame, bins: int = 20) -> pd.DataFrame:
+    """가공비 행의 사용임율 분포 (구간별 행 수 / 총가공비 합계)"""
+    rates = process["사용임율"].to_numpy(dtype=float)
+    if not len(rates):
+        return pd.DataFrame(columns=["하한", "구간", "행수", "총가공비합계"])
+    counts, edges = np.histogram(rates, bins=bins)
+    cost, _ = np.histogram(rates, bins=edges, weights=process["총가공비"].to_numpy(dtype=float))
+    labels = [f"{lo:,.0f} ~ {hi:,.0f}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return pd.DataFrame({"하한": edges[:-1], "구간": labels, "행수": counts, "총가공비합계": cost})
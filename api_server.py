@@ -0,0 +1,360 @@
+# =========================================================
+# [HTTP API] ERP 등 다른 시스템용 JSON API (streamlit 비의존, 표준 라이브러리 http.server)
+# =========================================================
+# 실행)  python cli.py serve --port 8765 --token <비밀키>
+#
+#   GET  /health                      상태 / 저장 건수
+#   POST /price                       견적 여러 건 합계 산출 {"quotes": [스냅샷, ...], "default_labor_rate": 0}
+#                                      → {"results": [{"id", "재료비합계", "가공비합계", "합계"}, ...]}
+#   POST /quotes                      스냅샷 저장 (1건 dict 또는 {"quotes": [...]}) → {"ids": [...]}
+#   GET  /quotes?p_no=&car=&company=&from=&to=&limit=&before=   저장 목록 (메타 + 저장 시 합계, 최신순)
+#                                      → {"total", "next", "items"} - 다음 페이지는 before=<next> (마지막이면 null)
+#   GET  /quotes/<id>                 저장 스냅샷 전체
+#   GET  /quotes/<id>/export          저장 스냅샷 → 원가계산서 .xlsx
+#   POST /export                      스냅샷 1건 → 원가계산서 .xlsx (저장하지 않음)
+#   GET  /quotes/<id>/sheet           저장 스냅샷 → 원가계산서 시트 수식 셀 값 {"cells": {"O62": ..., ...}}
+#   POST /sheet                       스냅샷 1건 → 시트 수식 셀 값 (엑셀 파일을 만들지 않고 템플릿 합계 확인)
+#
+# - 스냅샷 형식은 화면 / 저장소와 같다: p_no, p_name, car, company, labor_rate, saved_at, material[], process[]
+#   (머리글은 단일 값, material / process 는 객체 목록 - 아니면 400. 500 응답에는 예외 내용을 담지 않음)
+# - 합계는 cost_engine.price_snapshots 로 요청 전체를 한 번에 계산 (견적 수천 건도 한 번의 배열 계산).
+# - HTTP/1.1 keep-alive: 모든 응답에 Content-Length 를 붙여 연결을 재사용할 수 있게 한다.
+# - HEAD 는 GET 과 같게 처리하되, /quotes/<id>/export · /sheet 는 생성 / 계산 비용만 들므로 405.
+# - 엑셀은 XML 직접 수정 방식(engine="xml")으로 만들어 수식 셀에 계산 값이 들어 있다
+#   (엑셀 없이 파일을 읽는 시스템도 합계를 볼 수 있음).
+# - 시트 값은 formula_eval 로 계산 (오류는 "#DIV/0!" 같은 문자열, 계산할 수 없는 수식은 null).
+# - token 을 주면 모든 요청에 "Authorization: Bearer <token>" 이 필요하다. 기본은 127.0.0.1 에서만 받음.
+import hmac
+import json
+import re
+import sys
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from cost_engine import price_snapshots
+from excel_export import DEFAULT_ENGINE, export_file_name, snapshot_inputs
+from export_cache import ExportCache, build_excel_cached
+from formula_eval import UNKNOWN, ExcelError, cell_ref
+from part_master import open_part_master
+from perf_timing import timed
+from quote_store import new_snapshot_id, open_store
+from rate_table import get_rate_table
+from template_layout import TEMPLATE_FILE
+from xml_export import evaluate_sheet
+
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+LIST_LIMIT = 1000
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+STREAM_CHUNK = 64 * 1024
+# 스냅샷 머리글 필드 (문자열 / 숫자 같은 단일 값만 허용)
+HEADER_FIELDS = ("id", "name", "p_no", "p_name", "car", "company", "labor_rate", "saved_at")
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+class ApiError(Exception):
+    """HTTP 오류 응답 (status, 메시지)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# =========================================================
+# [1] 요청 처리 (HTTP 와 무관한 부분)
+# =========================================================
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_quote(quote) -> dict:
+    """요청으로 받은 스냅샷 1건 형식 확인 - 객체, 머리글은 단일 값, material / process 는 객체 목록 (아니면 400)"""
+    if not isinstance(quote, dict):
+        raise ApiError(400, "견적은 JSON 객체여야 합니다.")
+    for field in HEADER_FIELDS:
+        if not isinstance(quote.get(field), SCALAR_TYPES):
+            raise ApiError(400, f"{field} 는 문자열 또는 숫자여야 합니다.")
+    if quote.get("labor_rate") is not None and not _is_number(quote["labor_rate"]):
+        raise ApiError(400, "labor_rate 는 숫자여야 합니다.")
+    for field in ("material", "process"):
+        rows = quote.get(field)
+        if rows is not None and not (isinstance(rows, list) and all(isinstance(row, dict) for row in rows)):
+            raise ApiError(400, f"{field} 는 JSON 객체 목록이어야 합니다.")
+    return quote
+
+
+def _quote_list(body) -> list:
+    """요청 본문 → 스냅샷 목록 (본문은 스냅샷 1건 또는 {"quotes": [...]})"""
+    if not isinstance(body, dict):
+        raise ApiError(400, "요청 본문은 JSON 객체여야 합니다.")
+    quotes = body["quotes"] if "quotes" in body else [body]
+    if not isinstance(quotes, list):
+        raise ApiError(400, "quotes 는 JSON 객체 목록이어야 합니다.")
+    return [_check_quote(q) for q in quotes]
+
+
+def _int_param(query: dict, name: str, default: int, minimum: int, maximum: int = None) -> int:
+    """쿼리 문자열의 정수 값 (없으면 default, 범위를 벗어나거나 숫자가 아니면 400)"""
+    raw = query.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = None
+    if value is None or value < minimum or (maximum is not None and value > maximum):
+        bound = f"{minimum} 이상" + (f" {maximum} 이하" if maximum is not None else "")
+        raise ApiError(400, f"{name} 은 {bound}의 정수여야 합니다.")
+    return value
+
+
+def price_quotes(quotes: list, default_labor_rate=0) -> list:
+    """견적 여러 건 합계 (입력 순서 그대로, id 는 입력값 - 없거나 겹쳐도 순번으로 따로 계산)"""
+    numbered = [{**q, "id": i} for i, q in enumerate(quotes)]
+    totals = price_snapshots(numbered, default_labor_rate=default_labor_rate, rate_table=get_rate_table())
+    return [
+        {"id": q.get("id"), "재료비합계": mat, "가공비합계": pro, "합계": total}
+        for q, mat, pro, total in zip(
+            quotes,
+            totals["재료비합계"].tolist(),
+            totals["가공비합계"].tolist(),
+            totals["합계"].tolist(),
+        )
+    ]
+
+
+def _new_snapshot(quote: dict) -> dict:
+    """저장할 스냅샷 (id / 저장일시가 없으면 지금 시각으로)"""
+    now = datetime.now()
+    snapshot = {**quote, "material": quote.get("material") or [], "process": quote.get("process") or []}
+    snapshot.setdefault("saved_at", now.strftime("%Y-%m-%d %H:%M:%S"))
+    if not snapshot.get("id"):
+        snapshot["id"] = new_snapshot_id(now)
+    snapshot.setdefault("name", f"{snapshot.get('p_no', '')} - {snapshot.get('p_name', '')}")
+    return snapshot
+
+
+class ApiService:
+    """API 가 쓰는 저장소 / 부품 마스터 / 엑셀 캐시 묶음 (서버 스레드들이 같이 사용)"""
+
+    def __init__(self, store=None, template_path: str = TEMPLATE_FILE, export_cache=None, part_master=None,
+                 engine: str = DEFAULT_ENGINE):
+        self.store = store or open_store()
+        self.part_master = part_master or open_part_master(store=self.store)
+        self.template_path = template_path
+        self.engine = engine
+        self.export_cache = export_cache or ExportCache()
+
+    def health(self, query) -> dict:
+        return {"status": "ok", "quotes": self.store.count()}
+
+    def price(self, body) -> dict:
+        quotes = _quote_list(body)
+        default_rate = body.get("default_labor_rate", 0)
+        if not _is_number(default_rate):
+            raise ApiError(400, "default_labor_rate 는 숫자여야 합니다.")
+        return {"results": price_quotes(quotes, default_labor_rate=default_rate)}
+
+    def save(self, body) -> dict:
+        snapshots = [_new_snapshot(q) for q in _quote_list(body)]
+        ids = self.store.append_many(snapshots)
+        self.part_master.update_from_snapshots([{**s, "id": i} for s, i in zip(snapshots, ids)])
+        return {"ids": ids}
+
+    def list(self, query) -> dict:
+        filters = {
+            "p_no": query.get("p_no"), "car": query.get("car"), "company": query.get("company"),
+            "date_from": query.get("from"), "date_to": query.get("to"),
+        }
+        limit = _int_param(query, "limit", LIST_LIMIT, 1, LIST_LIMIT)
+        before = _int_param(query, "before", None, 1)
+        items, total, next_before = self.store.list_page(limit, before=before, **filters)
+        return {"total": total, "next": next_before, "items": items}
+
+    def get(self, snap_id: str) -> dict:
+        snapshot = self.store.get(snap_id)
+        if snapshot is None:
+            raise ApiError(404, f"저장 산출을 찾을 수 없습니다: {snap_id}")
+        return snapshot
+
+    def export(self, snapshot: dict) -> tuple[str, bytes]:
+        """스냅샷 → (파일명, xlsx 바이트) - 같은 입력이면 엑셀 결과 캐시 사용"""
+        _check_quote(snapshot)
+        data = build_excel_cached(self.export_cache, *snapshot_inputs(snapshot), template_path=self.template_path,
+                                  engine=self.engine)
+        return export_file_name(snapshot), data.getvalue()
+
+    def sheet(self, snapshot: dict) -> dict:
+        """스냅샷 → 원가계산서 시트의 수식 셀 값 (셀 주소 → 값)"""
+        _check_quote(snapshot)
+        calc = evaluate_sheet(*snapshot_inputs(snapshot), template_path=self.template_path)
+        cells = {}
+        for key, value in sorted(calc.formula_values().items()):
+            if value is UNKNOWN:
+                value = None
+            elif isinstance(value, ExcelError):
+                value = value.code
+            cells[cell_ref(key)] = value
+        return {"cells": cells}
+
+
+# =========================================================
+# [2] HTTP
+# =========================================================
+# (메서드, 경로 정규식, 처리 이름)
+ROUTES = [
+    ("GET", re.compile(r"^/health$"), "health"),
+    ("POST", re.compile(r"^/price$"), "price"),
+    ("POST", re.compile(r"^/quotes$"), "save"),
+    ("GET", re.compile(r"^/quotes$"), "list"),
+    ("GET", re.compile(r"^/quotes/(?P<id>[^/]+)/export$"), "export_saved"),
+    ("GET", re.compile(r"^/quotes/(?P<id>[^/]+)/sheet$"), "sheet_saved"),
+    ("GET", re.compile(r"^/quotes/(?P<id>[^/]+)$"), "get"),
+    ("POST", re.compile(r"^/export$"), "export"),
+    ("POST", re.compile(r"^/sheet$"), "sheet"),
+]
+# HEAD 로 받지 않는 GET (본문을 버릴 뿐인데 엑셀 생성 / 시트 계산을 전부 하게 되므로 405)
+NO_HEAD = ("export_saved", "sheet_saved")
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive (응답마다 Content-Length)
+    server_version = "SSEP-API/1"
+    # 머리글 / 본문을 따로 쓰므로 Nagle 을 끄지 않으면 keep-alive 연결에서 응답마다 ACK 대기(~40ms)가 생긴다
+    disable_nagle_algorithm = True
+
+    # -------------------------------------------------
+    # 응답
+    # -------------------------------------------------
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")  # 클라이언트가 이 연결을 재사용하지 않도록
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        view = memoryview(body)
+        for start in range(0, len(view), STREAM_CHUNK):
+            self.wfile.write(view[start: start + STREAM_CHUNK])
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8")
+
+    def _send_xlsx(self, name: str, data: bytes):
+        # 한글 파일명은 RFC 5987 (filename*) 로, 구형 클라이언트용 filename 은 ASCII 만
+        fallback = name.encode("ascii", "ignore").decode() or "quote.xlsx"
+        disposition = f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name)}"
+        self._send(200, data, XLSX_MIME, {"Content-Disposition": disposition})
+
+    # -------------------------------------------------
+    # 요청
+    # -------------------------------------------------
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # 본문 길이를 모르므로 연결을 재사용하지 않음 (음수로 read 하면 연결이 끊길 때까지 멈춤)
+            self.close_connection = True
+            raise ApiError(400, "Content-Length 가 올바르지 않습니다.")
+        if length > MAX_BODY_BYTES:
+            # 본문을 읽지 않았으므로 연결을 재사용하지 않음
+            self.close_connection = True
+            raise ApiError(413, f"요청 본문이 너무 큽니다 (최대 {MAX_BODY_BYTES // (1024 * 1024)}MB).")
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            raise ApiError(400, "JSON 형식이 올바르지 않습니다.")
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        # 비교 시간으로 토큰이 드러나지 않게 상수 시간 비교
+        given = self.headers.get("Authorization", "").encode("utf-8", "surrogateescape")
+        return hmac.compare_digest(given, f"Bearer {token}".encode("utf-8", "surrogateescape"))
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        for method, pattern, name in ROUTES:
+            match = pattern.match(url.path)
+            if match and method == ("GET" if self.command == "HEAD" else self.command):
+                if self.command == "HEAD" and name in NO_HEAD:
+                    continue
+                break
+        else:
+            known = any(pattern.match(url.path) for _, pattern, _ in ROUTES)
+            # 본문을 읽지 않고 응답하므로 연결은 닫는다
+            self.close_connection = True
+            raise ApiError(405 if known else 404, "지원하지 않는 요청입니다.")
+
+        if not self._authorized():
+            self.close_connection = True
+            raise ApiError(401, "인증 토큰이 필요합니다.")
+        service = self.server.service
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        with timed(f"api.{name}"):
+            if name == "export":
+                self._send_xlsx(*service.export(self._read_json()))
+            elif name == "export_saved":
+                self._send_xlsx(*service.export(service.get(match["id"])))
+            elif name == "sheet_saved":
+                self._send_json(200, service.sheet(service.get(match["id"])))
+            elif name == "get":
+                self._send_json(200, service.get(match["id"]))
+            elif method == "POST":
+                self._send_json(200, getattr(service, name)(self._read_json()))
+            else:
+                self._send_json(200, getattr(service, name)(query))
+
+    def _handle(self):
+        try:
+            self._dispatch()
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception:
+            # 예외 내용(경로 / 내부 값)은 서버 로그에만 남기고 응답에는 고정 문구
+            print(f"SSEP API 오류: {self.command} {self.path}", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            self._send_json(500, {"error": "서버 내부 오류입니다."})
+
+    do_GET = do_POST = do_HEAD = _handle
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    """요청마다 스레드 1개 (keep-alive 연결은 그 스레드가 계속 처리)"""
+
+    daemon_threads = True
+
+    def __init__(self, address, service: ApiService, token: str = None, verbose: bool = False):
+        super().__init__(address, ApiHandler)
+        self.service = service
+        self.token = token or None
+        self.verbose = verbose
+
+
+def serve(host: str = API_HOST, port: int = API_PORT, token: str = None, verbose: bool = False,
+          service: ApiService = None):
+    """API 서버 실행 (Ctrl+C 로 종료)"""
+    server = ApiServer((host, port), service or ApiService(), token=token, verbose=verbose)
+    print(f"SSEP API: http://{host}:{server.server_port}" + (" (토큰 필요)" if token else ""), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,88 +1,25 @@
 import streamlit as st
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
-from io import BytesIO
-import traceback
-import json
+import hmac
 import os
-from datetime import datetime
+import time
+import uuid
+from perf_timing import PERF_LOG_FILE, PROCESS_STATS, TimingStats, bind_session, record, timed
 
-# =========================================================
-# [핵심] 안전하게 엑셀에 값을 넣는 함수
-# =========================================================
-def safe_write(ws, row, col, value):
-    try:
-        cell = ws.cell(row=row, column=col)
-        cell.value = value
-    except AttributeError:
-        pass  # 병합된 셀 에러 무시
-    except Exception:
-        pass
-
-# =========================================================
-# [설정] 엑셀 좌표 (이미지 양식 기준)
-# =========================================================
-# 재료비 섹션
-MAT_START_ROW = 9
-MAT_MAX_ROW = 24
-COL_MAT_CODE = 3      # 부품코드 (C열)
-COL_MAT_NAME = 6      # 부품명 (F열)
-COL_MAT_US = 4        # U/S (D열)
-COL_MAT_SPEC = 5      # 재질/규격 (E열)
-COL_MAT_UNIT = 7      # 단위 (G열)
-COL_MAT_PRICE = 8     # 단가 (H열)
-COL_MAT_NET = 9       # NET(g,mm) (I열)
-COL_MAT_SCRAP = 10    # SCRAP(g,mm) (J열)
-COL_MAT_INPUT = 11    # 투입중량 (K열)
-COL_MAT_AMOUNT = 12   # 금액 (L열)
-COL_MAT_LOSS_RATE = 13  # 자재LOSS율 (M열)
-COL_MAT_LOSS_AMOUNT = 14  # LOSS금액 (N열)
-COL_MAT_WASTE = 15    # 산업폐기물처리비용 (O열)
-COL_MAT_DIE_LOSS = 16 # 다이캐스팅LOSS인정 (P열)
-COL_MAT_DIE_AMOUNT = 17  # 금액 (Q열)
-COL_MAT_TOTAL = 18    # 재료비 (R열)
-
-# 가공비 섹션 (엑셀 템플릿 기준: (2) 가공비 표의 열 위치)
-PRO_START_ROW = 27
-PRO_MAX_ROW = 45
-COL_PRO_NAME = 3      # C열: 부품명
-COL_PRO_US = 5        # E열: U/S
-COL_PRO_PROCESS = 6   # F열: 공정명
-COL_PRO_MACH = 7      # G열: 사용기계
-COL_PRO_MAN = 9       # I열: 인
-COL_PRO_TIME = 10     # J열: 공수(SEC)
-COL_PRO_RATE = 11     # K열: 임율(원/HR)
-COL_PRO_AMOUNT1 = 12  # L열: 금액(원/EA)
-# 아래 컬럼은 현재 템플릿에서 직접 사용하지 않으므로 필요 시 확장
-COL_PRO_BASIS = 13    # (옵션) 산출근거(원/HR)
-COL_PRO_AMOUNT2 = 14  # (옵션) 금액(원/EA) 비
-COL_PRO_PREP = 15     # (옵션) 준비시간(분)
+# 로그인 화면은 streamlit + 표준 라이브러리만으로 그린다.
+# pandas / 저장소 / 엑셀(openpyxl) 모듈은 로그인 뒤에 import 하고,
+# 엑셀 생성 / ZIP / 분석처럼 버튼·토글 뒤에서만 쓰는 모듈은 그 자리에서 import 한다.
+st.set_page_config(page_title="원가계산서 시스템", layout="wide")
 
 # =========================================================
-# [저장/불러오기 유틸] 결과 저장소
+# [성능 계측] 세션별 구간 소요 시간 (관리자 패널 / perf_log.jsonl)
 # =========================================================
-SAVE_FILE = "saved_results.json"
-
-def load_saved_results():
-    """저장된 산출 목록 불러오기"""
-    if not os.path.exists(SAVE_FILE):
-        return []
-    try:
-        with open(SAVE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-def save_results_list(results):
-    """산출 목록 전체를 파일에 저장"""
-    try:
-        with open(SAVE_FILE, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+ADMIN_PASSWORD = os.environ.get("SSEP_ADMIN_PASSWORD", "")
 
-st.set_page_config(page_title="원가계산서 시스템", layout="wide")
+if "perf_stats" not in st.session_state:
+    st.session_state.perf_stats = TimingStats()
+    st.session_state.perf_session_id = uuid.uuid4().hex[:8]
+bind_session(st.session_state.perf_stats, st.session_state.perf_session_id)
+run_started = time.perf_counter()
 
 # =========================================================
 # [로그인] 초기 화면: 비밀번호 입력 후 본 화면 진입
@@ -115,6 +52,61 @@ if not st.session_state.logged_in:
     # 로그인 전에는 이하 내용 렌더링하지 않음
     st.stop()
 
+# =========================================================
+# [본 화면 모듈] 로그인 후에만 import (프로세스당 1회, 이후 rerun 은 sys.modules 재사용)
+# =========================================================
+import pandas as pd
+from datetime import datetime
+from quote_store import new_snapshot_id, open_store
+from part_master import open_part_master
+from bom_import import MAX_ERRORS, MAX_IMPORT_ROWS, import_bom
+from cost_engine import (
+    MATERIAL_INPUT_COLS,
+    PROCESS_INPUT_COLS,
+    calc_material,
+    calc_process,
+)
+from incremental_calc import IncrementalCalc, editor_changes
+from rate_table import RATE_COLS, get_rate_table, save_rate_table
+
+# =========================================================
+# [저장/불러오기 유틸] 결과 저장소
+# =========================================================
+@st.cache_resource
+def get_quote_store():
+    """산출 결과 저장소 (프로세스당 1회 생성, 최초 실행 시 saved_results.json 이관)"""
+    return open_store()
+
+
+@st.cache_resource
+def get_part_master():
+    """부품 마스터 (비어 있으면 저장된 산출의 재료비로 처음 채움)"""
+    return open_part_master(store=get_quote_store())
+
+@st.cache_resource
+def get_analytics_cache():
+    """전체 산출 분석용 컬럼형 캐시 (프로세스당 1개, 세션들이 같이 사용)"""
+    from analytics_cache import AnalyticsCache
+    return AnalyticsCache()
+
+@st.cache_resource
+def get_scenario_runner():
+    """시나리오 실행기 (결과를 프로세스 안에서 보관 - 시나리오 전환 시 재계산 없음)"""
+    from scenario import ScenarioRunner
+    return ScenarioRunner(get_analytics_cache())
+
+@st.cache_resource
+def get_export_cache():
+    """생성한 원가계산서 .xlsx 캐시 (같은 입력이면 다시 만들지 않음, 세션들이 같이 사용)"""
+    from export_cache import ExportCache
+    return ExportCache()
+
+@st.cache_resource
+def get_export_jobs():
+    """엑셀 생성 작업 큐 (프로세스당 1개 - 워커 스레드에서 생성, 화면은 상태만 확인)"""
+    from export_jobs import ExportJobQueue
+    return ExportJobQueue()
+
 st.title("📋 원가계산서 작성 시스템")
 
 # =========================================================
@@ -153,120 +145,175 @@ with header_col2:
 
 def get_default_material_df():
     """초기 재료비 테이블 (빈 페이지용 컬럼만 정의)"""
-    columns = [
-        "부품명",
-        "부품코드",
-        "U/S",
-        "재질/규격",
-        "단위",
-        "단가",
-        "NET(g,mm)",
-        "SCRAP(g,mm)",
-        "자재LOSS율(%)",
-        "산업폐기물처리비용",
-        "다이캐스팅LOSS인정",
-    ]
-    return pd.DataFrame(columns=columns)
+    return pd.DataFrame(columns=MATERIAL_INPUT_COLS)
 
 
 def get_default_process_df():
     """초기가공비 테이블 (빈 페이지용 컬럼만 정의)"""
-    columns = [
-        "부품명",
-        "U/S",
-        "공정명",
-        "사용기계",
-        "인",
-        "공수(SEC)",
-        "준비시간(분)",
-        "산출근거(원/HR)",
-        "여유율(%)",
-    ]
-    return pd.DataFrame(columns=columns)
+    return pd.DataFrame(columns=PROCESS_INPUT_COLS)
 
-# 세션 상태 초기화
-if 'material_df' not in st.session_state:
-    st.session_state.material_df = get_default_material_df()
+def calc_process_rows(df, context):
+    """가공비 행 계산 (context: (적용임율, 임율표, 기준일) - 임율표가 있으면 기계/공정 임율 반영)"""
+    rate, table, as_of = context
+    if table is not None:
+        rate = table.effective_rates(df, rate, as_of)
+    return calc_process(df, rate, with_inputs=True)
 
-# 편집 가능한 테이블 생성 (계산 컬럼 포함)
-# 항상 세션에 있는 입력값(material_df)을 기준으로 매 렌더링 때마다 재계산한다.
-edit_df = st.session_state.material_df.copy().reset_index(drop=True)
+def get_incremental_calc(name, calc_fn, input_cols, total_cols):
+    """세션별 행 단위 계산 메모 (편집된 행만 다시 계산)"""
+    key = f"{name}_calc_memo"
+    if key not in st.session_state:
+        st.session_state[key] = IncrementalCalc(calc_fn, input_cols, total_cols)
+    return st.session_state[key]
 
-# 숫자형 데이터 변환 및 계산
-calc_df = edit_df.copy()
-calc_df['단가'] = pd.to_numeric(calc_df['단가'], errors='coerce').fillna(0)
-calc_df['U/S'] = pd.to_numeric(calc_df['U/S'], errors='coerce').fillna(1)
-calc_df['NET(g,mm)'] = pd.to_numeric(calc_df['NET(g,mm)'], errors='coerce').fillna(0)
-calc_df['자재LOSS율(%)'] = pd.to_numeric(calc_df['자재LOSS율(%)'], errors='coerce').fillna(0)
-calc_df['산업폐기물처리비용'] = pd.to_numeric(calc_df['산업폐기물처리비용'], errors='coerce').fillna(0)
-calc_df['다이캐스팅LOSS인정'] = pd.to_numeric(calc_df['다이캐스팅LOSS인정'], errors='coerce').fillna(0)
 
-# 금액 계산: 단가 × NET(g,mm) × U/S
-calc_df['금액'] = calc_df['단가'] * calc_df['NET(g,mm)'] * calc_df['U/S']
+# 세션 상태 초기화
+if 'material_df' not in st.session_state:
+    st.session_state.material_df = get_default_material_df()
 
-# 자재LOSS 금액 계산
-calc_df['LOSS금액'] = calc_df['금액'] * (calc_df['자재LOSS율(%)'] / 100)
+# 고객 BOM 파일(Excel / CSV) 가져오기 - 머리글 이름으로 재료비 / 가공비 입력 컬럼에 맞춤
+with st.expander("📥 BOM 파일 가져오기 (Excel / CSV)"):
+    st.caption("머리글 행(부품명 / 공정명 등)이 있는 .xlsx / .csv 파일을 읽어 재료비 또는 가공비 표에 넣습니다. "
+               f"최대 {MAX_IMPORT_ROWS:,}행, 숫자가 아닌 값은 빈 칸으로 두고 아래에 오류로 표시합니다.")
+    imp_col1, imp_col2 = st.columns([1, 1])
+    bom_kind = imp_col1.radio("대상 표", ["재료비", "가공비"], horizontal=True, key="bom_kind")
+    bom_mode = imp_col2.radio("방식", ["기존 행 교체", "기존 행 뒤에 추가"], horizontal=True, key="bom_mode")
+    bom_file = st.file_uploader("BOM 파일", type=["xlsx", "xlsm", "csv"], key="bom_file")
+    if bom_file is not None and st.button("가져오기", use_container_width=True):
+        kind = "material" if bom_kind == "재료비" else "process"
+        state_key = "material_df" if kind == "material" else "process_df"
+        try:
+            with timed("app.bom_import", kind=kind):
+                imported = import_bom(bom_file, kind, name=bom_file.name)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            new_df = imported.df
+            if bom_mode == "기존 행 뒤에 추가" and state_key in st.session_state:
+                new_df = pd.concat([st.session_state[state_key], new_df], ignore_index=True)
+            st.session_state[state_key] = new_df.reset_index(drop=True)
+            # 결과 요약만 보관 (가져온 표는 위 세션 표에만)
+            st.session_state.bom_import_report = {
+                "message": f"{bom_file.name} → {bom_kind} {len(imported.df):,}행 가져옴"
+                           + (f" (시트: {imported.sheet})" if imported.sheet else "")
+                           + f" · 연결된 열: {', '.join(imported.mapping)}",
+                "error_count": imported.error_count,
+                "errors": imported.errors_frame(),
+            }
+            st.rerun()
+    report = st.session_state.get("bom_import_report")
+    if report:
+        st.success(report["message"])
+        if report["error_count"]:
+            st.warning(f"확인이 필요한 값 {report['error_count']:,}건 (행 번호는 파일 기준, 최대 {MAX_ERRORS}건 표시)")
+            st.dataframe(report["errors"], hide_index=True, use_container_width=True)
+
+# 금액 / LOSS금액 / 재료비 계산 (cost_engine 공용 공식)
+# 세션에 있는 입력값(material_df)이 지난 실행에서 계산한 표 그대로면 계산 없이 결과를 재사용한다.
+mat_memo = get_incremental_calc("material", calc_material, MATERIAL_INPUT_COLS, ["금액", "재료비"])
+with timed("app.material_calc"):
+    calc_df = mat_memo.update(st.session_state.material_df)
 
-# 재료비 계산
-calc_df['재료비'] = calc_df['금액'] + calc_df['LOSS금액'] + calc_df['산업폐기물처리비용'] + calc_df['다이캐스팅LOSS인정']
+# 편집 가능한 테이블 생성 (계산 컬럼 포함)
+edit_df = st.session_state.material_df.reset_index(drop=True)
+calc_df = calc_df.reset_index(drop=True)
 
 # 계산 컬럼 추가 (숫자형으로 명확히 설정)
-edit_df['금액'] = calc_df['금액'].astype(float)
-edit_df['LOSS금액'] = calc_df['LOSS금액'].astype(float)
-edit_df['재료비'] = calc_df['재료비'].astype(float)
+edit_df['금액'] = calc_df['금액']
+edit_df['LOSS금액'] = calc_df['LOSS금액']
+edit_df['재료비'] = calc_df['재료비']
 
 # 데이터 편집기 (편집 가능한 테이블)
-edited_mat = st.data_editor(
-    edit_df,
-    num_rows="dynamic",
-    use_container_width=True,
-    column_config={
-        "부품명": st.column_config.TextColumn("부품명", width="large", required=True),
-        "부품코드": st.column_config.TextColumn("부품코드", width="medium"),
-        "U/S": st.column_config.NumberColumn("U/S", min_value=0, default=1, width="small"),
-        "재질/규격": st.column_config.TextColumn("재질/규격", width="medium"),
-        "단위": st.column_config.TextColumn("단위", width="small"),
-        "단가": st.column_config.NumberColumn("단가", min_value=0.0, format="%.1f", width="medium"),
-        "NET(g,mm)": st.column_config.NumberColumn("NET(g,mm)", min_value=0.0, format="%.5f", width="medium"),
-        "SCRAP(g,mm)": st.column_config.TextColumn("SCRAP(g,mm)", width="medium"),
-        "자재LOSS율(%)": st.column_config.NumberColumn("자재LOSS율(%)", min_value=0.0, format="%.2f", width="medium"),
-        "산업폐기물처리비용": st.column_config.NumberColumn("산업폐기물처리비용", min_value=0.0, format="%.2f", width="medium"),
-        "다이캐스팅LOSS인정": st.column_config.NumberColumn("다이캐스팅LOSS인정", min_value=0.0, format="%.2f", width="medium"),
-        "금액": st.column_config.NumberColumn("금액", format="%.2f", width="medium"),
-        "LOSS금액": st.column_config.NumberColumn("LOSS금액", format="%.2f", width="medium"),
-        "재료비": st.column_config.NumberColumn("재료비", format="%.2f", width="medium"),
-    },
-    key="material_editor",
-    hide_index=True
-)
+with timed("app.render.material_editor"):
+    edited_mat = st.data_editor(
+        edit_df,
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "부품명": st.column_config.TextColumn("부품명", width="large", required=True),
+            "부품코드": st.column_config.TextColumn("부품코드", width="medium"),
+            "U/S": st.column_config.NumberColumn("U/S", min_value=0, default=1, width="small"),
+            "재질/규격": st.column_config.TextColumn("재질/규격", width="medium"),
+            "단위": st.column_config.TextColumn("단위", width="small"),
+            "단가": st.column_config.NumberColumn("단가", min_value=0.0, format="%.1f", width="medium"),
+            "NET(g,mm)": st.column_config.NumberColumn("NET(g,mm)", min_value=0.0, format="%.5f", width="medium"),
+            "SCRAP(g,mm)": st.column_config.TextColumn("SCRAP(g,mm)", width="medium"),
+            "자재LOSS율(%)": st.column_config.NumberColumn("자재LOSS율(%)", min_value=0.0, format="%.2f", width="medium"),
+            "산업폐기물처리비용": st.column_config.NumberColumn("산업폐기물처리비용", min_value=0.0, format="%.2f", width="medium"),
+            "다이캐스팅LOSS인정": st.column_config.NumberColumn("다이캐스팅LOSS인정", min_value=0.0, format="%.2f", width="medium"),
+            "금액": st.column_config.NumberColumn("금액", format="%.2f", width="medium"),
+            "LOSS금액": st.column_config.NumberColumn("LOSS금액", format="%.2f", width="medium"),
+            "재료비": st.column_config.NumberColumn("재료비", format="%.2f", width="medium"),
+        },
+        key="material_editor",
+        hide_index=True
+    )
 
 # 세션 상태 업데이트 및 재계산
 if not edited_mat.empty:
+    mat_base = st.session_state.material_df
     # 입력 컬럼만 업데이트 (인덱스 리셋만 수행, 빈 행은 그대로 유지)
-    input_cols = ['부품명', '부품코드', 'U/S', '재질/규격', '단위', '단가', 'NET(g,mm)', 'SCRAP(g,mm)', '자재LOSS율(%)', '산업폐기물처리비용', '다이캐스팅LOSS인정']
-    updated_df = edited_mat[input_cols].copy().reset_index(drop=True)
+    updated_df = edited_mat[MATERIAL_INPUT_COLS].copy().reset_index(drop=True)
+    changed_rows = editor_changes(st.session_state.get("material_editor"), len(edit_df))
+
+    # 부품 마스터: 부품코드를 새로 입력 / 변경한 행의 비어 있는 재질/규격 / 단위 / 단가를 최신 값으로 채움
+    # (사용자가 지운 칸은 다시 채우지 않음. 행 삭제 등으로 편집 행을 모르면 채우지 않음)
+    filled = 0
+    if changed_rows is not None:
+        with timed("app.part_autofill"):
+            updated_df, filled = get_part_master().autofill(updated_df, rows=changed_rows, previous=mat_base)
     st.session_state.material_df = updated_df
-    
-    # 편집된 데이터로 재계산 (합계 표시용)
-    final_calc = st.session_state.material_df.copy()
-    final_calc['단가'] = pd.to_numeric(final_calc['단가'], errors='coerce').fillna(0)
-    final_calc['U/S'] = pd.to_numeric(final_calc['U/S'], errors='coerce').fillna(1)
-    final_calc['NET(g,mm)'] = pd.to_numeric(final_calc['NET(g,mm)'], errors='coerce').fillna(0)
-    final_calc['자재LOSS율(%)'] = pd.to_numeric(final_calc['자재LOSS율(%)'], errors='coerce').fillna(0)
-    final_calc['산업폐기물처리비용'] = pd.to_numeric(final_calc['산업폐기물처리비용'], errors='coerce').fillna(0)
-    final_calc['다이캐스팅LOSS인정'] = pd.to_numeric(final_calc['다이캐스팅LOSS인정'], errors='coerce').fillna(0)
-
-    final_calc['금액'] = final_calc['단가'] * final_calc['NET(g,mm)'] * final_calc['U/S']
-    final_calc['LOSS금액'] = final_calc['금액'] * (final_calc['자재LOSS율(%)'] / 100)
-    final_calc['재료비'] = final_calc['금액'] + final_calc['LOSS금액'] + final_calc['산업폐기물처리비용'] + final_calc['다이캐스팅LOSS인정']
-
-    # 재료비 합계 계산 및 표시
-    total_material_cost = final_calc['재료비'].sum()
+    if filled:
+        st.rerun()  # 채운 값이 편집기에 바로 보이도록
+
+    # 편집된 행만 재계산 (합계는 차이만큼 보정)
+    with timed("app.material_calc"):
+        final_calc = mat_memo.update(updated_df, rows=changed_rows, base=mat_base)
+
+    # 재료비 합계 표시
+    total_material_cost = mat_memo.totals['재료비']
     st.markdown("---")
     col1, col2 = st.columns([1, 3])
     with col1:
         st.metric("**재료비 합계**", f"₩ {total_material_cost:,.1f}")
 
+# 부품 마스터: 부품코드별 최신 단가 (저장된 산출 + 단가표 파일)
+with st.expander("📚 부품 마스터 (부품코드별 최신 단가)"):
+    part_master = get_part_master()
+    pm_col1, pm_col2 = st.columns([1, 1])
+    with pm_col1:
+        st.caption(f"등록 부품 {part_master.count():,}건 · 재료비 표에 부품코드를 입력하면 비어 있는 재질/규격 / 단위 / 단가를 채웁니다.")
+        if st.button("🔄 재료비 표 단가를 최신 단가로 일괄 갱신", use_container_width=True):
+            with timed("app.part_reprice"):
+                repriced, n_changed = part_master.reprice(st.session_state.material_df)
+            if n_changed:
+                st.session_state.material_df = repriced
+                st.rerun()
+            st.info("갱신할 단가가 없습니다.")
+        price_file = st.file_uploader("단가표 가져오기 (CSV / XLSX: 부품코드, 단가 [, 부품명, 재질/규격, 단위, 적용일])",
+                                      type=["csv", "xlsx"], key="part_price_file")
+        if price_file is not None and st.button("단가표 반영", use_container_width=True):
+            try:
+                n_parts = part_master.import_price_list(price_file, name=price_file.name)
+                st.success(f"{n_parts}개 부품 단가를 반영했습니다.")
+            except ValueError as e:
+                st.error(str(e))
+    with pm_col2:
+        part_prefix = st.text_input("부품코드 검색 (앞부분 일치)", key="part_prefix")
+        if part_prefix:
+            found = part_master.search(part_prefix)
+            if found:
+                st.dataframe(
+                    pd.DataFrame(found)[["code", "name", "spec", "unit", "price", "updated_at"]].rename(columns={
+                        "code": "부품코드", "name": "부품명", "spec": "재질/규격", "unit": "단위",
+                        "price": "단가", "updated_at": "기준일",
+                    }),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            else:
+                st.caption("일치하는 부품이 없습니다.")
+
 st.divider()
 
 # =========================================================
@@ -279,10 +326,11 @@ col_save_left, col_save_right = st.columns([2, 3])
 with col_save_left:
     save_name = st.text_input("저장 이름 (예: 96240-BQ000 1차 산출)", value=f"{p_no} - {p_name}")
     if st.button("📥 현재 산출 저장", type="primary", use_container_width=True):
-        # 현재 재료비/가공비, 기본 정보 스냅샷
+        # 현재 재료비/가공비, 기본 정보 스냅샷 (id 와 저장일시는 같은 시각으로)
+        now = datetime.now()
         snapshot = {
-            "id": datetime.now().strftime("%Y%m%d%H%M%S"),
-            "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "id": new_snapshot_id(now),
+            "saved_at": now.strftime("%Y-%m-%d %H:%M:%S"),
             "name": save_name,
             "p_no": p_no,
             "p_name": p_name,
@@ -292,22 +340,61 @@ with col_save_left:
             "material": st.session_state.material_df.to_dict(orient="records") if "material_df" in st.session_state else [],
             "process": st.session_state.process_df.to_dict(orient="records") if "process_df" in st.session_state else [],
         }
-        all_results = load_saved_results()
-        all_results.append(snapshot)
-        save_results_list(all_results)
-        st.success("현재 산출이 저장되었습니다. 아래 목록에서 확인할 수 있습니다.")
+        saved_id = get_quote_store().append(snapshot)
+        get_part_master().update_from_snapshots([{**snapshot, "id": saved_id}])
+        if get_analytics_cache().built():
+            with timed("app.analytics_refresh"):
+                get_analytics_cache().refresh(get_quote_store())
+        st.success(f"현재 산출이 저장되었습니다 (ID: {saved_id}). 아래 목록에서 확인할 수 있습니다.")
 
-# 2) 저장된 산출 목록
-saved_results = load_saved_results()
+# 2) 저장된 산출 목록 (메타 정보 + 저장 시 계산한 합계만, 최신순, 페이지 단위 조회)
+#    재료비/가공비 본문은 상세 보기 / 불러오기 할 때만 읽는다.
+QUOTE_PAGE_SIZES = [20, 50, 100]
 
 st.subheader("📂 저장된 산출 목록")
-if not saved_results:
+if get_quote_store().count() == 0:
     st.info("저장된 산출 결과가 없습니다. 먼저 위에서 산출을 저장해주세요.")
 else:
-    # 메타 정보용 테이블
+    fcol1, fcol2, fcol3, fcol4, fcol5 = st.columns([3, 2, 2, 2, 2])
+    list_search = fcol1.text_input("검색 (품번 / 품명 / 차종 / 업체 / 이름)", key="list_search")
+    list_car = fcol2.selectbox("차종", ["전체"] + get_quote_store().distinct("car"), key="list_car")
+    list_company = fcol3.selectbox("업체", ["전체"] + get_quote_store().distinct("company"), key="list_company")
+    list_from = fcol4.date_input("저장일 (시작)", value=None, key="list_from")
+    list_to = fcol5.date_input("저장일 (종료)", value=None, key="list_to")
+    list_filters = {
+        "search": list_search.strip() or None,
+        "car": None if list_car == "전체" else list_car,
+        "company": None if list_company == "전체" else list_company,
+        "date_from": list_from.isoformat() if list_from else None,
+        "date_to": list_to.isoformat() if list_to else None,
+    }
+
+    # 페이지는 seq 기준 keyset - 지나온 페이지의 before 값을 쌓아 두고 이전 / 다음 으로 이동
+    # (조건 / 페이지당 건수가 바뀌면 첫 페이지부터)
+    pcol1, pcol2, pcol3, pcol4 = st.columns([1, 1, 1, 3])
+    page_size = pcol1.selectbox("페이지당 건수", QUOTE_PAGE_SIZES, key="list_page_size")
+    list_signature = (tuple(sorted(list_filters.items())), page_size)
+    if st.session_state.get("list_signature") != list_signature:
+        st.session_state.list_signature = list_signature
+        st.session_state.list_cursors = [None]
+    list_cursors = st.session_state.list_cursors
+    with timed("app.quote_list"):
+        saved_results, list_total, next_before = get_quote_store().list_page(
+            page_size, before=list_cursors[-1], **list_filters
+        )
+    page_no = len(list_cursors)
+    page_count = max(1, -(-list_total // page_size))
+    pcol2.button("◀ 이전", key="list_prev", disabled=page_no == 1, on_click=list_cursors.pop,
+                 use_container_width=True)
+    pcol3.button("다음 ▶", key="list_next", disabled=next_before is None, on_click=list_cursors.append,
+                 args=(next_before,), use_container_width=True)
+    pcol4.caption(f"조건에 맞는 산출 {list_total:,}건 · {page_no} / {page_count} 페이지")
+
+    # 현재 페이지 메타 정보용 테이블
+    page_offset = (page_no - 1) * page_size
     meta_rows = [
         {
-            "번호": len(saved_results) - idx,
+            "번호": list_total - page_offset - idx,
             "저장ID": item["id"],
             "저장일시": item.get("saved_at", ""),
             "품번": item.get("p_no", ""),
@@ -315,22 +402,36 @@ else:
             "차종": item.get("car", ""),
             "업체": item.get("company", ""),
             "이름": item.get("name", ""),
+            "재료비": item.get("material_total"),
+            "가공비": item.get("process_total"),
+            "합계": item.get("total"),
         }
-        for idx, item in enumerate(reversed(saved_results))
+        for idx, item in enumerate(saved_results)
     ]
     meta_df = pd.DataFrame(meta_rows)
+    meta_labels = {row["저장ID"]: f"{row['저장ID']} - {row['이름']}" for row in meta_rows}
 
     selected_id = st.selectbox(
         "불러올 산출 선택 (저장ID 기준)",
-        options=[row["저장ID"] for row in meta_rows],
-        format_func=lambda x: next((f"{row['저장ID']} - {row['이름']}" for row in meta_rows if row["저장ID"] == x), x),
+        options=list(meta_labels),
+        format_func=lambda x: meta_labels.get(x, x),
     )
 
-    st.dataframe(meta_df, use_container_width=True, hide_index=True)
+    if meta_rows:
+        with timed("app.render.quote_table"):
+            st.dataframe(
+                meta_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={col: st.column_config.NumberColumn(col, format="localized") for col in ("재료비", "가공비", "합계")},
+            )
+    else:
+        st.info("조건에 맞는 저장 산출이 없습니다.")
 
     # 선택된 산출 상세 보기 / 불러오기
     if selected_id:
-        target = next((item for item in saved_results if item["id"] == selected_id), None)
+        with timed("app.quote_detail_load"):
+            target = get_quote_store().get(selected_id)
         if target:
             st.markdown("---")
             st.markdown("### 🔍 선택한 산출 상세")
@@ -363,6 +464,106 @@ else:
                         if hasattr(st, "experimental_rerun"):
                             st.experimental_rerun()
 
+    # 3) 리비전 비교 (같은 품번의 저장 산출 여러 건)
+    with st.expander("🔀 리비전 비교 (같은 품번)"):
+        diff_p_nos = get_quote_store().distinct("p_no")
+        if not diff_p_nos:
+            st.info("품번이 입력된 저장 산출이 없습니다.")
+        else:
+            default_p_no = target.get("p_no") if selected_id and target else p_no
+            diff_p_no = st.selectbox(
+                "품번", diff_p_nos,
+                index=diff_p_nos.index(default_p_no) if default_p_no in diff_p_nos else 0,
+                key="diff_p_no",
+            )
+            diff_meta = get_quote_store().list_meta(p_no=diff_p_no, newest_first=False)
+            diff_labels = {item["id"]: f"{item['id']} - {item.get('name', '')} ({item.get('saved_at', '')})" for item in diff_meta}
+            diff_ids = st.multiselect(
+                "비교할 산출 (저장일시 순서로 1차, 2차 …)",
+                options=list(diff_labels),
+                default=list(diff_labels),
+                format_func=lambda x: diff_labels.get(x, x),
+                key=f"diff_ids_{diff_p_no}",
+            )
+            if len(diff_ids) < 2:
+                st.info("비교할 산출을 2건 이상 선택하세요.")
+            else:
+                from quote_diff import STATUS_SAME, compare_snapshots
+                # 같은 선택 / 같은 임율표면 이전 비교 결과 재사용
+                diff_key = (tuple(diff_ids), id(get_rate_table()))
+                cached_diff = st.session_state.get("quote_diff")
+                if cached_diff is None or cached_diff[0] != diff_key:
+                    with timed("app.quote_diff"):
+                        cached_diff = (diff_key, compare_snapshots(get_quote_store().find(ids=diff_ids), rate_table=get_rate_table()))
+                    st.session_state.quote_diff = cached_diff
+                quote_diff = cached_diff[1]
+                money = {col: st.column_config.NumberColumn(col, format="localized") for col in
+                         ["재료비합계", "가공비합계", "합계", "첫 리비전 대비", "직전 대비", "증감"] + quote_diff.labels}
+                st.markdown("**차수별 합계**")
+                st.dataframe(quote_diff.revisions, use_container_width=True, hide_index=True, column_config=money)
+                st.markdown(f"**주요 변동 요인 ({quote_diff.labels[0]} → {quote_diff.labels[-1]})**")
+                diff_drivers = quote_diff.drivers()
+                if diff_drivers.empty:
+                    st.info("금액이 바뀐 행이 없습니다.")
+                else:
+                    st.dataframe(diff_drivers, use_container_width=True, hide_index=True,
+                                 column_config={**money, "비중(%)": st.column_config.NumberColumn("비중(%)", format="%.1f")})
+                diff_changed_only = st.checkbox("바뀐 행만 보기", value=True, key="diff_changed_only")
+                for tab, part in zip(st.tabs(["재료비 행별 비교", "가공비 행별 비교"]), ("material", "process")):
+                    with tab:
+                        part_rows = quote_diff.rows[part]
+                        if diff_changed_only:
+                            part_rows = part_rows[part_rows["상태"] != STATUS_SAME]
+                        st.dataframe(part_rows, use_container_width=True, hide_index=True,
+                                     column_config={**money, "증감률(%)": st.column_config.NumberColumn("증감률(%)", format="%.1f")})
+
+    # 4) 저장된 산출 일괄 엑셀 생성 (ZIP)
+    with st.expander("📦 저장된 산출 일괄 엑셀 생성 (ZIP)"):
+        st.caption("조건에 맞는 저장 산출을 모두 원가계산서로 만들어 ZIP 파일 하나로 내려받습니다. 비워 둔 조건은 적용하지 않습니다.")
+        bcol1, bcol2, bcol3, bcol4 = st.columns(4)
+        bulk_p_no = bcol1.text_input("품번", key="bulk_p_no")
+        bulk_car = bcol2.text_input("차종", key="bulk_car")
+        bulk_from = bcol3.date_input("저장일 (시작)", value=None, key="bulk_from")
+        bulk_to = bcol4.date_input("저장일 (종료)", value=None, key="bulk_to")
+        # 선택지는 현재 목록 페이지 + 이미 선택한 ID (전체 ID 를 나열하지 않음)
+        bulk_ids = st.multiselect(
+            "저장ID 직접 선택 (목록 페이지를 넘기며 추가)",
+            options=list(dict.fromkeys(st.session_state.get("bulk_ids", []) + list(meta_labels))),
+            key="bulk_ids",
+        )
+        if st.button("📦 ZIP 생성", use_container_width=True):
+            bulk_filters = {
+                "p_no": bulk_p_no.strip() or None,
+                "car": bulk_car.strip() or None,
+                "ids": bulk_ids or None,
+                "date_from": bulk_from.isoformat() if bulk_from else None,
+                "date_to": bulk_to.isoformat() if bulk_to else None,
+            }
+            bulk_total = get_quote_store().count(**bulk_filters)
+            if bulk_total == 0:
+                st.warning("조건에 맞는 저장 산출이 없습니다.")
+            else:
+                from io import BytesIO
+                from bulk_export import export_zip
+                bulk_bar = st.progress(0.0, text=f"0 / {bulk_total}")
+                zip_buffer = BytesIO()
+                bulk_summary = export_zip(
+                    get_quote_store().iter_find(**bulk_filters),
+                    zip_buffer,
+                    total=bulk_total,
+                    progress=lambda done, total, name: bulk_bar.progress(done / total, text=f"{done} / {total}  {name}"),
+                )
+                st.success(f"{bulk_summary['written']}건의 원가계산서가 생성되었습니다.")
+                for err_name, err in bulk_summary["errors"]:
+                    st.error(f"{err_name}: {err}")
+                st.download_button(
+                    label="📥 원가계산서 ZIP 다운로드",
+                    data=zip_buffer.getvalue(),
+                    file_name=f"원가계산서_일괄_{datetime.now().strftime('%Y%m%d%H%M%S')}.zip",
+                    mime="application/zip",
+                    use_container_width=True,
+                )
+
  # =========================================================
 # [UI 3] 가공비 입력
 # =========================================================
@@ -373,50 +574,47 @@ st.caption("가공비 정보를 입력하세요. 엑셀 양식과 동일하게 
 if "process_df" not in st.session_state:
     st.session_state.process_df = get_default_process_df()
 
-edited_pro = st.data_editor(
-    st.session_state.process_df,
-    num_rows="dynamic",
-    use_container_width=True,
-    column_config={
-        "부품명": st.column_config.TextColumn("부품명", width="medium"),
-        "U/S": st.column_config.NumberColumn("U/S", min_value=0, default=1, width="small"),
-        "공정명": st.column_config.TextColumn("공정명", width="medium"),
-        "사용기계": st.column_config.TextColumn("사용기계", width="medium"),
-        "인": st.column_config.NumberColumn("인", min_value=0, default=1, width="small"),
-        "공수(SEC)": st.column_config.NumberColumn("공수(SEC)", min_value=0.0, format="%.1f", width="medium"),
-        "준비시간(분)": st.column_config.NumberColumn("준비시간(분)", min_value=0.0, format="%.1f", width="medium"),
-        "산출근거(원/HR)": st.column_config.NumberColumn("산출근거(원/HR)", min_value=0.0, format="%.0f", width="medium"),
-        "여유율(%)": st.column_config.NumberColumn("여유율(%)", min_value=0.0, format="%.1f", width="medium"),
-    },
-    key="process_editor",
-)
+with timed("app.render.process_editor"):
+    edited_pro = st.data_editor(
+        st.session_state.process_df,
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "부품명": st.column_config.TextColumn("부품명", width="medium"),
+            "U/S": st.column_config.NumberColumn("U/S", min_value=0, default=1, width="small"),
+            "공정명": st.column_config.TextColumn("공정명", width="medium"),
+            "사용기계": st.column_config.TextColumn("사용기계", width="medium"),
+            "인": st.column_config.NumberColumn("인", min_value=0, default=1, width="small"),
+            "공수(SEC)": st.column_config.NumberColumn("공수(SEC)", min_value=0.0, format="%.1f", width="medium"),
+            "준비시간(분)": st.column_config.NumberColumn("준비시간(분)", min_value=0.0, format="%.1f", width="medium"),
+            "산출근거(원/HR)": st.column_config.NumberColumn("산출근거(원/HR)", min_value=0.0, format="%.0f", width="medium"),
+            "여유율(%)": st.column_config.NumberColumn("여유율(%)", min_value=0.0, format="%.1f", width="medium"),
+        },
+        key="process_editor",
+    )
 
 # 편집 결과를 세션에 반영
-st.session_state.process_df = edited_pro.copy().reset_index(drop=True)
+process_base = st.session_state.process_df
+process_rows = editor_changes(st.session_state.get("process_editor"), len(process_base))
+st.session_state.process_df = edited_pro.reset_index(drop=True)
 
 # 가공비 계산 및 표시
 total_process_cost = 0.0
 if not st.session_state.process_df.empty:
-    # 숫자형 데이터 변환
-    calc_pro = st.session_state.process_df.copy()
-    calc_pro['U/S'] = pd.to_numeric(calc_pro['U/S'], errors='coerce').fillna(1)
-    calc_pro['인'] = pd.to_numeric(calc_pro['인'], errors='coerce').fillna(1)
-    calc_pro['공수(SEC)'] = pd.to_numeric(calc_pro['공수(SEC)'], errors='coerce').fillna(0)
-    calc_pro['준비시간(분)'] = pd.to_numeric(calc_pro['준비시간(분)'], errors='coerce').fillna(0)
-    calc_pro['산출근거(원/HR)'] = pd.to_numeric(calc_pro['산출근거(원/HR)'], errors='coerce').fillna(0)
-    calc_pro['여유율(%)'] = pd.to_numeric(calc_pro.get('여유율(%)', 0), errors='coerce').fillna(0)
-    
-    # 가공비 계산: (공수(SEC) / 3600) × 임율 × 인 × U/S
-    # 산출근거가 있으면 산출근거 사용, 없으면 적용임율 사용
-    calc_pro['사용임율'] = calc_pro['산출근거(원/HR)'].apply(lambda x: x if x > 0 else labor_rate)
-    calc_pro['가공비'] = (calc_pro['공수(SEC)'] / 3600) * calc_pro['사용임율'] * calc_pro['인'] * calc_pro['U/S']
-    
-    # 준비시간 가공비 계산 (분을 시간으로 변환)
-    calc_pro['준비시간가공비'] = (calc_pro['준비시간(분)'] / 60) * calc_pro['사용임율'] * calc_pro['인'] * calc_pro['U/S']
+    # 가공비 계산 (cost_engine 공용 공식)
+    #  - 가공비 = (공수(SEC) / 3600) × 사용임율 × 인 × U/S
+    #  - 사용임율: 산출근거가 있으면 산출근거, 없으면 임율표(사용기계/공정명), 둘 다 없으면 적용임율
+    #  - 총가공비 = 가공비 × (1 + 여유율/100) + 준비시간가공비
+    #  - 편집된 행만 재계산 (적용임율 / 임율표 / 날짜가 바뀌면 전체 재계산)
+    with timed("app.process_calc"):
+        pro_memo = get_incremental_calc("process", calc_process_rows, PROCESS_INPUT_COLS, ["총가공비"])
+        calc_pro = st.session_state.process_df.copy()
+        rate_context = (labor_rate, get_rate_table(), datetime.now().strftime("%Y-%m-%d"))
+        for col, values in pro_memo.update(
+            st.session_state.process_df, rows=process_rows, base=process_base, context=rate_context
+        ).items():
+            calc_pro[col] = values
 
-    # 여유율 적용: 총가공비 = 가공비 × (1 + 여유율/100) + 준비시간가공비
-    calc_pro['총가공비'] = calc_pro['가공비'] * (1 + calc_pro['여유율(%)'] / 100) + calc_pro['준비시간가공비']
-    
     # 부품별 가공비 표시
     st.markdown("**부품별 가공비 산출**")
     display_cols = ['부품명', '공정명', '사용기계', '인', '공수(SEC)', '임율(원/HR)', '여유율(%)', '가공비', '준비시간(분)', '준비시간가공비', '총가공비']
@@ -436,39 +634,50 @@ if not st.session_state.process_df.empty:
     if '준비시간(분)' in display_df.columns:
         display_df['준비시간(분)'] = display_df['준비시간(분)'].apply(lambda x: f"{x:.1f}" if pd.notna(x) else "0.0")
     
-    st.dataframe(display_df, use_container_width=True, hide_index=True)
+    with timed("app.render.process_table"):
+        st.dataframe(display_df, use_container_width=True, hide_index=True)
     
-    # 가공비 합계 계산 및 표시
-    total_process_cost = calc_pro['총가공비'].sum()
+    # 가공비 합계 표시
+    total_process_cost = pro_memo.totals['총가공비']
     st.markdown("---")
     col1, col2 = st.columns([1, 3])
     with col1:
         st.metric("**가공비 합계**", f"{total_process_cost:,.2f} 원")
 
+with st.expander("⚙️ 기계 / 공정 임율표"):
+    st.caption(
+        "사용기계 / 공정명별 임율을 등록하면 산출근거(원/HR)가 비어 있는 행에 적용됩니다. "
+        "공정명을 비우면 그 기계의 기본 임율, 적용종료를 비우면 계속 적용됩니다 (날짜: YYYY-MM-DD)."
+    )
+    rate_table = get_rate_table()
+    edited_rates = st.data_editor(
+        rate_table.df if rate_table is not None else pd.DataFrame(columns=RATE_COLS),
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "사용기계": st.column_config.TextColumn("사용기계", width="medium"),
+            "공정명": st.column_config.TextColumn("공정명", width="medium"),
+            "임율(원/HR)": st.column_config.NumberColumn("임율(원/HR)", min_value=0.0, format="%.0f"),
+            "적용시작": st.column_config.TextColumn("적용시작"),
+            "적용종료": st.column_config.TextColumn("적용종료"),
+        },
+        key="rate_table_editor",
+    )
+    if st.button("💾 임율표 저장", key="rate_table_save"):
+        saved_rates = save_rate_table(edited_rates)
+        st.session_state.rate_table_saved = len(saved_rates)
+        st.rerun()
+    if "rate_table_saved" in st.session_state:
+        st.success(f"임율표 {st.session_state.pop('rate_table_saved')}건을 저장했습니다.")
+
 # =========================================================
 # [UI 4] 실시간 미리보기
 # =========================================================
 st.markdown("---")
 st.header("👀 미리보기")
 
-# 재료비 계산 (편집된 재료비 데이터 기준)
-try:
-    preview_mat = st.session_state.material_df.copy()
-except Exception:
-    # 세션에 없으면 edited_mat 사용 (초기 로드 대응)
-    preview_mat = edited_mat.copy()
-
-if not preview_mat.empty:
-    preview_mat['단가'] = pd.to_numeric(preview_mat.get('단가', 0), errors='coerce').fillna(0)
-    preview_mat['U/S'] = pd.to_numeric(preview_mat.get('U/S', 1), errors='coerce').fillna(1)
-    preview_mat['NET(g,mm)'] = pd.to_numeric(preview_mat.get('NET(g,mm)', 0), errors='coerce').fillna(0)
-    # 금액 = 단가 × NET(g,mm) × U/S  (상단 산출 로직과 동일)
-    preview_mat['예상금액'] = preview_mat['단가'] * preview_mat['NET(g,mm)'] * preview_mat['U/S']
-else:
-    preview_mat = pd.DataFrame(columns=['예상금액'])
-
-# 합계
-total_mat_cost = preview_mat['예상금액'].sum()
+# 재료비 합계: 예상금액 = 단가 × NET(g,mm) × U/S (상단 산출 결과 재사용)
+total_mat_cost = float(mat_memo.totals['금액'])
 # 가공비 합계는 위에서 계산한 total_process_cost 사용 (실제 총가공비와 일치)
 total_pro_cost = total_process_cost
 
@@ -480,307 +689,37 @@ m2.metric("가공비 합계 (예상)", f"{total_pro_cost:,.0f} 원")
 # =========================================================
 # [엑셀 생성 및 다운로드]
 # =========================================================
-def generate_excel():
+EXPORT_POLL_SECONDS = 1.0
+
+
+def generate_excel(cache, header, material_df, process_df):
+    """원가계산서 생성 (작업 큐 워커 스레드에서 실행 - st.session_state 를 읽지 않음)"""
     try:
-        wb = load_workbook("template.xlsx")
-
-        # 시트 찾기
-        target_sheet = None
-        for s in wb.sheetnames:
-            if "원가" in s or "견적" in s or "계산" in s:
-                target_sheet = s
-                break
-        
-        if target_sheet:
-            ws = wb[target_sheet]
-        else:
-            ws = wb.active
-
-        # -------------------------------------------------
-        # [공통] 헤더 텍스트를 이용해 실제 컬럼 번호 찾기
-        #        (템플릿에서 한 칸씩 밀리는 문제 방지용)
-        # -------------------------------------------------
-        def find_col(keyword: str, default_col: int) -> int:
-            """시트 상단에서 헤더 텍스트를 찾아 실제 컬럼 번호를 반환"""
-            try:
-                for row in ws.iter_rows(min_row=1, max_row=40):
-                    for cell in row:
-                        if not cell.value:
-                            continue
-                        cell_str = str(cell.value)
-                        if keyword in cell_str:
-                            return cell.column
-            except Exception:
-                pass
-            return default_col
-
-        # 재료비 영역 실제 컬럼 위치
-        mat_code_col = find_col("품번", COL_MAT_CODE)
-        mat_name_col = find_col("부품명", COL_MAT_NAME)
-        mat_us_col = find_col("U/S", COL_MAT_US)
-        mat_spec_col = find_col("재질", COL_MAT_SPEC)
-        mat_unit_col = find_col("단위", COL_MAT_UNIT)
-        mat_price_col = find_col("단가", COL_MAT_PRICE)
-        mat_net_col = find_col("NET", COL_MAT_NET)
-        mat_scrap_col = find_col("SCRAP", COL_MAT_SCRAP)
-        mat_input_col = find_col("투입", COL_MAT_INPUT)
-        mat_lossrate_col = find_col("LOSS율", COL_MAT_LOSS_RATE)
-        mat_waste_col = find_col("산업폐기물", COL_MAT_WASTE)
-        mat_die_col = find_col("다이캐스팅", COL_MAT_DIE_LOSS)
-
-        # -------------------------------------------------
-        # [A] 파이썬 기준 가공비 총합 재계산 (화면과 동일 로직)
-        # -------------------------------------------------
-        total_process_cost_excel = 0.0
-        try:
-            process_df = st.session_state.get("process_df", pd.DataFrame())
-            if not process_df.empty:
-                calc_pro_excel = process_df.copy()
-                calc_pro_excel['U/S'] = pd.to_numeric(calc_pro_excel['U/S'], errors='coerce').fillna(1)
-                calc_pro_excel['인'] = pd.to_numeric(calc_pro_excel['인'], errors='coerce').fillna(1)
-                calc_pro_excel['공수(SEC)'] = pd.to_numeric(calc_pro_excel['공수(SEC)'], errors='coerce').fillna(0)
-                calc_pro_excel['준비시간(분)'] = pd.to_numeric(calc_pro_excel['준비시간(분)'], errors='coerce').fillna(0)
-                calc_pro_excel['산출근거(원/HR)'] = pd.to_numeric(calc_pro_excel['산출근거(원/HR)'], errors='coerce').fillna(0)
-                calc_pro_excel['여유율(%)'] = pd.to_numeric(calc_pro_excel.get('여유율(%)', 0), errors='coerce').fillna(0)
-
-                # 사용임율: 산출근거가 있으면 그 값, 없으면 적용임율 사용
-                calc_pro_excel['사용임율'] = calc_pro_excel['산출근거(원/HR)'].apply(
-                    lambda x: x if x > 0 else labor_rate
-                )
-                # 기본 가공비
-                calc_pro_excel['가공비'] = (
-                    (calc_pro_excel['공수(SEC)'] / 3600) *
-                    calc_pro_excel['사용임율'] *
-                    calc_pro_excel['인'] *
-                    calc_pro_excel['U/S']
-                )
-                # 준비시간 가공비
-                calc_pro_excel['준비시간가공비'] = (
-                    (calc_pro_excel['준비시간(분)'] / 60) *
-                    calc_pro_excel['사용임율'] *
-                    calc_pro_excel['인'] *
-                    calc_pro_excel['U/S']
-                )
-                # 여유율 적용 총가공비
-                calc_pro_excel['총가공비'] = (
-                    calc_pro_excel['가공비'] * (1 + calc_pro_excel['여유율(%)'] / 100) +
-                    calc_pro_excel['준비시간가공비']
-                )
-                total_process_cost_excel = float(calc_pro_excel['총가공비'].sum())
-        except Exception:
-            total_process_cost_excel = 0.0
-
-        # 1. 기본 정보 입력
-        for row in ws.iter_rows(min_row=1, max_row=10):
-            for cell in row:
-                if cell.value:
-                    cell_str = str(cell.value)
-                    # 품번
-                    if "품 번" in cell_str or "품번" in cell_str:
-                        safe_write(ws, cell.row, cell.column+2, p_no)
-                    # 품명
-                    if "품명" in cell_str and "부품명" not in cell_str:
-                        safe_write(ws, cell.row, cell.column+2, p_name)
-                    # 차종
-                    if "차종" in cell_str:
-                        safe_write(ws, cell.row, cell.column+1, car)
-                    # 업체
-                    if "업체" in cell_str:
-                        safe_write(ws, cell.row, cell.column+1, company)
-                    # 적용임율
-                    if "적용임율" in cell_str or ("임율" in cell_str and "적용" in cell_str):
-                        safe_write(ws, cell.row, cell.column+1, labor_rate)
-
-        # 2. 재료비 입력 (기존 데이터 지우기)
-        for r in range(MAT_START_ROW, MAT_MAX_ROW + 1):
-            safe_write(ws, r, mat_code_col, "")
-            safe_write(ws, r, mat_name_col, "")
-            safe_write(ws, r, mat_us_col, None)
-            safe_write(ws, r, mat_spec_col, "")
-            safe_write(ws, r, mat_unit_col, "")
-            safe_write(ws, r, mat_price_col, None)
-            safe_write(ws, r, mat_net_col, None)
-            safe_write(ws, r, mat_scrap_col, None)
-            safe_write(ws, r, mat_input_col, None)
-            safe_write(ws, r, mat_lossrate_col, None)
-            safe_write(ws, r, mat_waste_col, None)
-            safe_write(ws, r, mat_die_col, None)
-
-        # 재료비 데이터 쓰기
-        current_row = MAT_START_ROW
-        for idx, row in edited_mat.iterrows():
-            if current_row > MAT_MAX_ROW:
-                break
-            if pd.notna(row.get('부품명')) and str(row.get('부품명', '')).strip():
-                # 품번 / 부품명
-                safe_write(ws, current_row, mat_code_col, row.get('부품코드', ''))
-                safe_write(ws, current_row, mat_name_col, row.get('부품명', ''))
-                # U/S 는 반드시 숫자 (화면의 U/S 값)
-                safe_write(ws, current_row, mat_us_col, row.get('U/S', 1))
-                # 재질/규격에는 지금까지 U/S 열에 들어가던 정보를 넣어야 한다고 요청하셨음
-                # 현재 화면 구조상 이 값은 별도 컬럼 '재질/규격' 에 들어있으므로 우선 그 값을 사용
-                # (필요 시 부품코드 등을 추가로 입력 가능)
-                safe_write(ws, current_row, mat_spec_col, row.get('재질/규격', ''))
-                # 나머지 단위/단가/NET 등
-                safe_write(ws, current_row, mat_unit_col, row.get('단위', 'EA'))
-                safe_write(ws, current_row, mat_price_col, row.get('단가', 0))
-                safe_write(ws, current_row, mat_net_col, row.get('NET(g,mm)', 0))
-                # SCRAP은 텍스트이므로 숫자 변환 시도
-                scrap_val = row.get('SCRAP(g,mm)', '')
-                scrap_num = pd.to_numeric(scrap_val, errors='coerce')
-                safe_write(ws, current_row, mat_scrap_col, scrap_num if pd.notna(scrap_num) else None)
-                # 투입중량은 NET(g,mm)와 동일하게 설정 (엑셀 양식에 따라)
-                safe_write(ws, current_row, mat_input_col, row.get('NET(g,mm)', 0))
-                safe_write(ws, current_row, mat_lossrate_col, row.get('자재LOSS율(%)', 0))
-                safe_write(ws, current_row, mat_waste_col, row.get('산업폐기물처리비용', 0))
-                safe_write(ws, current_row, mat_die_col, row.get('다이캐스팅LOSS인정', 0))
-                current_row += 1
-
-        # 3. 가공비 입력 (기존 데이터 지우기)
-        for r in range(PRO_START_ROW, PRO_MAX_ROW + 1):
-            safe_write(ws, r, COL_PRO_NAME, "")
-            safe_write(ws, r, COL_PRO_US, None)
-            safe_write(ws, r, COL_PRO_PROCESS, "")
-            safe_write(ws, r, COL_PRO_MACH, "")
-            safe_write(ws, r, COL_PRO_MAN, None)
-            safe_write(ws, r, COL_PRO_TIME, None)
-            safe_write(ws, r, COL_PRO_PREP, None)
-            safe_write(ws, r, COL_PRO_BASIS, None)
-            # 임율은 기본값으로 설정
-            safe_write(ws, r, COL_PRO_RATE, labor_rate)
-
-        # 3. 가공비 데이터 쓰기 (행별 금액은 화면에서 계산한 총가공비 사용)
-        process_df = st.session_state.get("process_df", pd.DataFrame())
-        if not process_df.empty:
-            # 시트에서 공정명 텍스트를 기준으로 실제 행 번호를 매핑
-            process_row_map: dict[str, int] = {}
-            try:
-                for r in range(PRO_START_ROW, PRO_MAX_ROW + 20):
-                    cell = ws.cell(row=r, column=COL_PRO_PROCESS)
-                    if cell.value:
-                        key = str(cell.value).strip()
-                        process_row_map[key] = r
-            except Exception:
-                process_row_map = {}
-
-            # 위에서 계산한 calc_pro_excel과 인덱스를 맞춰 사용
-            calc_table = calc_pro_excel if 'calc_pro_excel' in locals() else process_df
-
-            for idx, row in process_df.iterrows():
-                proc_name = str(row.get('공정명', '')).strip()
-                if not proc_name:
-                    continue
-
-                # 템플릿 상에서 동일한 공정명을 가진 행을 찾아서 그 위치에 써준다
-                target_row = process_row_map.get(proc_name)
-                if not target_row:
-                    # 못 찾으면 해외 가공비 표 안에서 순차 배치 (fallback)
-                    for r in range(PRO_START_ROW, PRO_MAX_ROW + 1):
-                        if not ws.cell(row=r, column=COL_PRO_PROCESS).value:
-                            target_row = r
-                            break
-                if not target_row:
-                    continue
-
-                safe_write(ws, target_row, COL_PRO_NAME, row.get('부품명', ''))
-                safe_write(ws, target_row, COL_PRO_US, row.get('U/S', 1))
-                safe_write(ws, target_row, COL_PRO_PROCESS, proc_name)
-                safe_write(ws, target_row, COL_PRO_MACH, row.get('사용기계', ''))
-                safe_write(ws, target_row, COL_PRO_MAN, row.get('인', 1))
-                safe_write(ws, target_row, COL_PRO_TIME, row.get('공수(SEC)', 0))
-                safe_write(ws, target_row, COL_PRO_PREP, row.get('준비시간(분)', 0))
-                safe_write(ws, target_row, COL_PRO_BASIS, row.get('산출근거(원/HR)', 0))
-
-                # 사용임율(임율/HR)
-                use_rate = float(calc_table.loc[idx, '사용임율']) if '사용임율' in calc_table.columns else float(labor_rate)
-                safe_write(ws, target_row, COL_PRO_RATE, use_rate)
-
-                # 행별 금액(원/EA) = 총가공비 (화면과 동일)
-                row_total = float(calc_table.loc[idx, '총가공비']) if '총가공비' in calc_table.columns else 0.0
-                safe_write(ws, target_row, COL_PRO_AMOUNT1, row_total)
-
-            # -------------------------------------------------
-            # [특수 처리] 국내 가공비 두 행을 템플릿 고정 위치에 강제로 반영
-            #  - 하역/리패킹/검사  → 44행
-            #  - 라벨/포장/출하     → 45행
-            # (화면 값은 맞는데 엑셀에서 해당 행 금액이 표시되지 않는 문제 보완)
-            # -------------------------------------------------
-            try:
-                DOM_START_ROW = 44
-                domestic_names = ["하역/리패킹/검사", "라벨/포장/출하"]
-                for offset, dname in enumerate(domestic_names):
-                    mask = process_df.get("공정명", "").astype(str).str.contains(dname)
-                    if not mask.any():
-                        continue
-                    idx = process_df[mask].index[0]
-                    row = process_df.loc[idx]
-                    target_row = DOM_START_ROW + offset
-
-                    safe_write(ws, target_row, COL_PRO_NAME, row.get('부품명', ''))
-                    safe_write(ws, target_row, COL_PRO_US, row.get('U/S', 1))
-                    safe_write(ws, target_row, COL_PRO_PROCESS, str(row.get('공정명', '')))
-                    safe_write(ws, target_row, COL_PRO_MACH, row.get('사용기계', ''))
-                    safe_write(ws, target_row, COL_PRO_MAN, row.get('인', 1))
-                    safe_write(ws, target_row, COL_PRO_TIME, row.get('공수(SEC)', 0))
-                    safe_write(ws, target_row, COL_PRO_PREP, row.get('준비시간(분)', 0))
-                    safe_write(ws, target_row, COL_PRO_BASIS, row.get('산출근거(원/HR)', 0))
-
-                    use_rate = float(calc_table.loc[idx, '사용임율']) if '사용임율' in calc_table.columns else float(labor_rate)
-                    safe_write(ws, target_row, COL_PRO_RATE, use_rate)
-
-                    row_total = float(calc_table.loc[idx, '총가공비']) if '총가공비' in calc_table.columns else 0.0
-                    safe_write(ws, target_row, COL_PRO_AMOUNT1, row_total)
-            except Exception:
-                # 실패해도 전체 생성에는 영향 없게 처리
-                pass
-
-        # 5. 엑셀 하단 (4)가공비 합계를 파이썬에서 계산한 total_process_cost_excel로 덮어쓰기
-        #    템플릿 수식과 파이썬 로직이 다를 수 있으므로, 최종 합계만은 일치시키기 위함
-        try:
-            found_gagongbi_row = False
-            for row in ws.iter_rows(min_row=1, max_row=200):
-                for cell in row:
-                    if not cell.value:
-                        continue
-                    cell_str = str(cell.value).replace(" ", "")
-                    # "(4)가공비" 또는 "가공비"가 포함된 셀을 찾는다
-                    if "가공비" in cell_str and "(4)" in cell_str:
-                        # 같은 행에서 가장 오른쪽에 있는 숫자/수식 셀을 찾아서 거기에 총가공비를 쓴다
-                        target_cell = None
-                        for c2 in row:
-                            if c2.column <= cell.column:
-                                continue
-                            if isinstance(c2.value, (int, float)) or (
-                                isinstance(c2.value, str) and c2.value.startswith("=")
-                            ):
-                                target_cell = c2
-                        if target_cell is None:
-                            # 못 찾으면 오른쪽 몇 칸 뒤에 강제로 기록
-                            target_cell = ws.cell(row=cell.row, column=cell.column + 5)
-                        target_cell.value = total_process_cost_excel
-                        found_gagongbi_row = True
-                        break
-                if found_gagongbi_row:
-                    break
-        except Exception:
-            # 실패해도 엑셀 저장 자체는 계속 진행
-            pass
-
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        return output
+        from export_cache import build_excel_cached
+        return build_excel_cached(cache, header, material_df, process_df)
 
     except FileNotFoundError:
         return f"ERROR: template.xlsx 파일을 찾을 수 없습니다.\n프로젝트 폴더에 template.xlsx 파일이 있는지 확인해주세요."
     except Exception as e:
+        import traceback
         return f"ERROR: {str(e)}\n\n{traceback.format_exc()}"
 
-# 다운로드 버튼
-st.markdown("---")
-if st.button("✅ 엑셀 파일 생성 및 다운로드", type="primary", use_container_width=True):
-    result = generate_excel()
-    
+
+def show_export_job():
+    """엑셀 생성 작업 상태 / 다운로드 (진행 중에는 이 부분만 EXPORT_POLL_SECONDS 마다 다시 그림)"""
+    from export_jobs import STATUS_DONE
+    job_id = st.session_state.get("export_job_id")
+    job = get_export_jobs().get(job_id) if job_id else None
+    if job is None:
+        return
+    if job.active:
+        ahead = get_export_jobs().waiting_ahead(job.id)
+        st.info(f"⏳ 엑셀 파일 {job.status} … {job.elapsed():.0f}초" + (f" (앞 대기 {ahead}건)" if ahead else ""))
+        return
+    if st.session_state.get("export_job_polling"):
+        # 진행 중에 시작한 주기 갱신을 멈추도록 전체 화면을 한 번 다시 그림
+        st.rerun()
+    result = job.result if job.status == STATUS_DONE else f"ERROR: 엑셀 생성 {job.status}\n\n{job.error}"
     if isinstance(result, str) and result.startswith("ERROR"):
         st.error("오류가 발생했습니다.")
         st.text(result)
@@ -789,7 +728,196 @@ if st.button("✅ 엑셀 파일 생성 및 다운로드", type="primary", use_co
         st.download_button(
             label="📥 원가계산서 다운로드",
             data=result,
-            file_name=f"원가계산서_{p_no}_{p_name}.xlsx",
+            file_name=job.name,
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
         )
+
+# 다운로드 버튼 - 생성은 작업 큐에 맡기고 화면은 바로 다음 내용을 그린다
+st.markdown("---")
+if st.button("✅ 엑셀 파일 생성 및 다운로드", type="primary", use_container_width=True):
+    from export_jobs import ExportQueueFull
+    header = {
+        "p_no": p_no,
+        "p_name": p_name,
+        "car": car,
+        "company": company,
+        "labor_rate": labor_rate,
+    }
+    try:
+        with timed("app.generate_excel"):
+            st.session_state.export_job_id = get_export_jobs().submit(
+                st.session_state.perf_session_id,
+                generate_excel,
+                get_export_cache(),
+                header,
+                edited_mat.copy(),
+                st.session_state.get("process_df", pd.DataFrame()).copy(),
+                name=f"원가계산서_{p_no}_{p_name}.xlsx",
+            )
+    except ExportQueueFull as e:
+        st.warning(str(e))
+
+export_job_id = st.session_state.get("export_job_id")
+export_job = get_export_jobs().get(export_job_id) if export_job_id else None
+st.session_state.export_job_polling = export_job is not None and export_job.active
+st.fragment(run_every=EXPORT_POLL_SECONDS if st.session_state.export_job_polling else None)(show_export_job)()
+
+# =========================================================
+# [UI 5] 전체 산출 분석 (차종 / 업체별 추이, 상위 부품, 임율 분포)
+# =========================================================
+# 저장 산출 전체를 펼친 컬럼형 캐시(analytics_cache)에서 집계한다.
+# 켰을 때만 계산 (처음 켤 때 캐시를 만들고, 이후에는 새로 저장된 산출만 덧붙임).
+st.markdown("---")
+st.header("📊 전체 산출 분석")
+if st.toggle("분석 보기 (저장된 산출 전체)", key="analytics_on"):
+    from analytics_cache import cost_trend, rate_distribution, top_parts
+    from scenario import Scenario, scenario_summary
+    with timed("app.analytics_refresh"):
+        analytics_added = get_analytics_cache().refresh(get_quote_store())
+    if analytics_added:
+        st.caption(f"분석 캐시에 새 산출 {analytics_added:,}건을 반영했습니다.")
+
+    acol1, acol2, acol3, acol4 = st.columns(4)
+    analytics_by = acol1.radio("구분", ["차종", "업체"], horizontal=True, key="analytics_by")
+    analytics_how = acol2.radio("금액", ["견적당 평균", "합계"], horizontal=True, key="analytics_how")
+    analytics_from = acol3.date_input("저장일 (시작)", value=None, key="analytics_from")
+    analytics_to = acol4.date_input("저장일 (종료)", value=None, key="analytics_to")
+
+    with timed("app.analytics_aggregate"):
+        a_quotes, a_material, a_process = get_analytics_cache().frames(
+            date_from=analytics_from.isoformat() if analytics_from else None,
+            date_to=analytics_to.isoformat() if analytics_to else None,
+        )
+        a_trend = cost_trend(
+            a_quotes, by="car" if analytics_by == "차종" else "company", how="mean" if analytics_how == "견적당 평균" else "sum"
+        )
+        a_parts = top_parts(a_material, n=20)
+        a_rates = rate_distribution(a_process)
+
+    if a_quotes.empty:
+        st.info("분석할 저장 산출이 없습니다.")
+    else:
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("견적 수", f"{len(a_quotes):,}건")
+        k2.metric("견적당 평균 합계", f"{a_quotes['합계'].mean():,.0f} 원")
+        k3.metric("재료비 합계", f"{a_quotes['재료비'].sum():,.0f} 원")
+        k4.metric("가공비 합계", f"{a_quotes['가공비'].sum():,.0f} 원")
+
+        st.markdown(f"**월별 {analytics_by}별 견적 금액 ({analytics_how})**")
+        st.line_chart(a_trend)
+        tcol1, tcol2 = st.columns([3, 2])
+        with tcol1:
+            st.markdown("**재료비 상위 부품**")
+            st.dataframe(
+                a_parts, use_container_width=True, hide_index=True,
+                column_config={
+                    "평균단가": st.column_config.NumberColumn("평균단가", format="localized"),
+                    "재료비합계": st.column_config.NumberColumn("재료비합계", format="localized"),
+                    "비중(%)": st.column_config.NumberColumn("비중(%)", format="%.2f"),
+                },
+            )
+        with tcol2:
+            st.markdown("**사용임율 분포 (가공비 행 수)**")
+            st.bar_chart(a_rates.set_index("하한")["행수"])
+
+    # 시나리오: 적용임율 / 단가 / LOSS율 변경 시 저장 산출 전체 재산출 (분석 캐시 위에서 일괄 계산)
+    with st.expander("🧪 시나리오 (적용임율 / 단가 / LOSS율 변경 영향)"):
+        if "scenarios" not in st.session_state:
+            st.session_state.scenarios = {}
+        scol1, scol2, scol3 = st.columns(3)
+        sc_name = scol1.text_input("시나리오 이름", value=f"시나리오 {len(st.session_state.scenarios) + 1}", key="sc_name")
+        sc_rate_on = scol2.checkbox("적용임율 변경", key="sc_rate_on")
+        sc_rate = scol2.number_input("새 적용임율 (원/HR)", value=int(labor_rate), min_value=0, key="sc_rate", disabled=not sc_rate_on)
+        sc_loss_on = scol3.checkbox("자재LOSS율 일괄 변경", key="sc_loss_on")
+        sc_loss = scol3.number_input("새 자재LOSS율 (%)", value=0.0, min_value=0.0, key="sc_loss", disabled=not sc_loss_on)
+        st.caption("단가 배수: 부품코드 또는 재질/규격별로 단가에 곱할 값 (예: PA66 → 1.1 = 10% 인상, 부품코드 지정이 우선)")
+        sc_factors = st.data_editor(
+            pd.DataFrame({"구분": pd.Series(dtype=str), "값": pd.Series(dtype=str), "배수": pd.Series(dtype=float)}),
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "구분": st.column_config.SelectboxColumn("구분", options=["부품코드", "재질/규격"], default="재질/규격"),
+                "값": st.column_config.TextColumn("값"),
+                "배수": st.column_config.NumberColumn("배수", min_value=0.0, default=1.0, format="%.3f"),
+            },
+            key="sc_factor_editor",
+        )
+        if st.button("➕ 시나리오 추가", key="sc_add"):
+            valid = sc_factors.dropna(subset=["값", "배수"])
+            st.session_state.scenarios[sc_name] = Scenario(
+                sc_name,
+                labor_rate=sc_rate if sc_rate_on else None,
+                price_factors=dict(zip(valid.loc[valid["구분"] == "부품코드", "값"], valid.loc[valid["구분"] == "부품코드", "배수"])),
+                material_factors=dict(zip(valid.loc[valid["구분"] != "부품코드", "값"], valid.loc[valid["구분"] != "부품코드", "배수"])),
+                loss_rate=sc_loss if sc_loss_on else None,
+            )
+
+        if st.session_state.scenarios:
+            sc_selected = st.radio("시나리오 선택", list(st.session_state.scenarios), horizontal=True, key="sc_selected")
+            st.caption(f"변경 내용: {st.session_state.scenarios[sc_selected].describe()}")
+            with timed("app.scenario_run"):
+                sc_result = get_scenario_runner().run(
+                    st.session_state.scenarios[sc_selected],
+                    date_from=analytics_from.isoformat() if analytics_from else None,
+                    date_to=analytics_to.isoformat() if analytics_to else None,
+                )
+            sc_sum = scenario_summary(sc_result)
+            r1, r2, r3, r4 = st.columns(4)
+            r1.metric("대상 견적", f"{sc_sum['견적수']:,}건", f"변경 {sc_sum['변경견적수']:,}건", delta_color="off")
+            r2.metric("기존 합계", f"{sc_sum['기존합계']:,.0f} 원")
+            r3.metric("새 합계", f"{sc_sum['새합계']:,.0f} 원")
+            r4.metric("증감", f"{sc_sum['증감']:,.0f} 원", f"{sc_sum['증감률(%)']:+.2f}%", delta_color="inverse")
+            sc_view = sc_result.reindex(sc_result["증감"].abs().sort_values(ascending=False).index)
+            st.dataframe(
+                sc_view, use_container_width=True, hide_index=True,
+                column_config={
+                    **{col: st.column_config.NumberColumn(col, format="localized")
+                       for col in ["기존재료비", "기존가공비", "기존합계", "새재료비", "새가공비", "새합계", "증감"]},
+                    "증감률(%)": st.column_config.NumberColumn("증감률(%)", format="%.2f"),
+                },
+            )
+            st.download_button(
+                "📥 시나리오 결과 CSV",
+                data=sc_result.to_csv(index=False).encode("utf-8-sig"),
+                file_name=f"시나리오_{sc_selected}.csv",
+                mime="text/csv",
+                key="sc_download",
+            )
+
+# =========================================================
+# [관리자] 성능 계측 패널 (사이드바)
+# =========================================================
+record("app.rerun", (time.perf_counter() - run_started) * 1000)
+
+# SSEP_ADMIN_PASSWORD 가 없으면 관리자 패널을 표시하지 않음 (기본 비밀번호 없음)
+if ADMIN_PASSWORD:
+    with st.sidebar.expander("⏱️ 성능 계측 (관리자)"):
+        admin_pw = st.text_input("관리자 비밀번호", type="password", key="perf_admin_pw")
+        if admin_pw and not hmac.compare_digest(admin_pw.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8")):
+            st.error("비밀번호가 올바르지 않습니다.")
+        elif admin_pw:
+            perf_scope = st.radio("범위", ["현재 세션", "프로세스 전체"], horizontal=True, key="perf_scope")
+            perf_stats = st.session_state.perf_stats if perf_scope == "현재 세션" else PROCESS_STATS
+            perf_rows = perf_stats.summary()
+            if perf_rows:
+                st.dataframe(
+                    pd.DataFrame(perf_rows).round(2),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+            else:
+                st.info("기록된 구간이 없습니다.")
+            st.caption(f"세션 {st.session_state.perf_session_id} · 로그: {PERF_LOG_FILE or '사용 안 함'}")
+            if st.button("현재 세션 기록 초기화", key="perf_reset"):
+                st.session_state.perf_stats.reset()
+
+            st.markdown("**엑셀 결과 캐시**")
+            # 비우기를 먼저 처리해야 아래 표에 비운 뒤 상태가 보인다
+            clear_export_cache = st.button("엑셀 결과 캐시 비우기", key="export_cache_clear")
+            if clear_export_cache:
+                get_export_cache().clear()
+            export_stats = get_export_cache().stats()
+            st.dataframe(pd.DataFrame([export_stats]).round(1), use_container_width=True, hide_index=True)
+            st.caption(f"디스크: {get_export_cache().folder or '사용 안 함'}")
+            st.caption("생성 작업 큐: " + ", ".join(f"{k} {v}" for k, v in get_export_jobs().stats().items()))
@@ -0,0 +1,97 @@
+# =========================================================
+# [벤치마크] 엑셀 생성 방식 비교 (openpyxl vs 시트 XML 직접 수정)
+# =========================================================
+# 사용 예)
+#   python benchmarks/bench_export.py                       # 기본 입력, 각 20회
+#   python benchmarks/bench_export.py --repeat 50 --material-csv mat.csv --process-csv pro.csv
+#
+# 두 방식의 결과를 openpyxl 로 다시 읽어 셀 값이 같은지도 함께 확인한다.
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from excel_export import EXPORT_ENGINES, build_excel  # noqa: E402
+from template_layout import TEMPLATE_FILE, get_template  # noqa: E402
+
+
+def sample_inputs():
+    """템플릿 한 장을 채우는 정도의 기본 입력 (재료비 12행, 가공비 10행 + 국내 2행)"""
+    material = pd.DataFrame([
+        {"부품코드": f"P{i:03d}", "부품명": f"부품{i}", "U/S": 1 + i % 3, "재질/규격": "PA66",
+         "단위": "EA", "단가": 1200 + 10 * i, "NET(g,mm)": 0.1 * (i + 1), "SCRAP(g,mm)": "0.01",
+         "자재LOSS율(%)": 2, "산업폐기물처리비용": 0, "다이캐스팅LOSS인정": 0}
+        for i in range(12)
+    ])
+    process = pd.DataFrame(
+        [{"부품명": f"부품{i}", "U/S": 1, "공정명": f"공정{i}", "사용기계": "M-100", "인": 1,
+          "공수(SEC)": 30 + i, "준비시간(분)": 5, "산출근거(원/HR)": 0} for i in range(10)]
+        + [{"부품명": "", "U/S": 1, "공정명": name, "사용기계": "", "인": 1, "공수(SEC)": 12,
+            "준비시간(분)": 0, "산출근거(원/HR)": 0} for name in ("하역/리패킹/검사", "라벨/포장/출하")]
+    )
+    return material, process
+
+
+def cell_values(data: bytes) -> dict:
+    wb = load_workbook(BytesIO(data))
+    return {
+        (ws.title, cell.coordinate): cell.value
+        for ws in wb.worksheets for row in ws.iter_rows() for cell in row
+        if cell.value not in (None, "")
+    }
+
+
+def run(engine, header, material, process, template_path, repeat):
+    build_excel(header, material, process, template_path, engine=engine)  # 캐시 준비
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = build_excel(header, material, process, template_path, engine=engine).getvalue()
+        times.append(time.perf_counter() - started)
+    return data, times
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="엑셀 생성 방식별 소요 시간 비교")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--template", default=TEMPLATE_FILE)
+    parser.add_argument("--material-csv")
+    parser.add_argument("--process-csv")
+    args = parser.parse_args(argv)
+
+    material, process = sample_inputs()
+    if args.material_csv:
+        material = pd.read_csv(args.material_csv)
+    if args.process_csv:
+        process = pd.read_csv(args.process_csv)
+    header = {"p_no": "96240-BQ000", "p_name": "BENCH", "car": "QU2i", "company": "BENCH", "labor_rate": 3500}
+
+    started = time.perf_counter()
+    get_template(args.template)
+    print(f"템플릿 준비: {time.perf_counter() - started:.3f}s")
+
+    results = {}
+    for engine in EXPORT_ENGINES:
+        data, times = run(engine, header, material, process, args.template, args.repeat)
+        results[engine] = data
+        print(f"{engine:>8}: 평균 {statistics.mean(times) * 1000:7.1f}ms  "
+              f"중앙값 {statistics.median(times) * 1000:7.1f}ms  "
+              f"최대 {max(times) * 1000:7.1f}ms  크기 {len(data):,}B")
+
+    base = cell_values(results["openpyxl"])
+    for engine in EXPORT_ENGINES[1:]:
+        other = cell_values(results[engine])
+        diff = [k for k in base.keys() | other.keys() if base.get(k) != other.get(k)]
+        print(f"{engine} 셀 값 차이: {len(diff)}건 {sorted(diff)[:5]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
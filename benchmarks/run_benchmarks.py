@@ -0,0 +1,417 @@
+# =========================================================
+# [벤치마크] 원가 계산 / 엑셀 생성 / 저장소 / 일괄 생성
+# =========================================================
+# 사용 예)
+#   python benchmarks/run_benchmarks.py                       # 전체 (수 분 소요)
+#   python benchmarks/run_benchmarks.py --quick               # 작은 크기만 (CI / 빠른 확인)
+#   python benchmarks/run_benchmarks.py --suite calc --suite store --out before.json
+#   python benchmarks/run_benchmarks.py --quick --compare before.json   # 이전 결과 대비 비교
+#   python benchmarks/run_benchmarks.py --suite startup        # 앱 콜드 스타트 / rerun (로그인 전후)
+#
+# 결과는 JSON 으로 저장한다 (기본: benchmarks/results/bench_<시각>.json).
+#   {"meta": {커밋, 파이썬/패키지 버전, CPU 수 ...},
+#    "results": [{"suite", "case", "size", "median_ms", "p95_ms", "throughput_per_s", "peak_mem_kb", ...}]}
+# peak_mem_kb 는 tracemalloc 기준 (측정 대상 1회 실행 중 파이썬/NumPy 할당 최대치).
+# 일괄 생성처럼 워커 프로세스를 쓰는 항목은 부모 프로세스 기준이므로 max_rss_kb 도 함께 기록한다.
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import openpyxl  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from bulk_export import export_zip  # noqa: E402
+from cost_engine import MATERIAL_INPUT_COLS, calc_material, calc_process, price_snapshots  # noqa: E402
+from excel_export import EXPORT_ENGINES, build_excel, build_excel_from_snapshot  # noqa: E402
+from formula_eval import SheetCalc  # noqa: E402
+from incremental_calc import IncrementalCalc  # noqa: E402
+from quote_store import QuoteStore  # noqa: E402
+from synthetic import iter_snapshots, make_material, make_process, make_snapshot  # noqa: E402
+from template_layout import TEMPLATE_FILE, TemplateCache, get_template  # noqa: E402
+from xml_export import record_writes  # noqa: E402
+
+# 크기 단계 (전체 / --quick)
+SIZES = {
+    "calc_rows": ([10, 100, 1000, 10000], [10, 1000]),
+    "price_snapshots": ([100, 1000, 10000], [100]),
+    "export_rows": ([10, 16, 100, 1000, 10000], [10, 100]),
+    "store_snapshots": ([10, 1000, 10000, 50000], [10, 1000]),
+    "bulk_snapshots": ([10, 50, 200], [10]),
+}
+SUITES = ["calc", "export", "store", "bulk", "startup"]
+HEADER = {"p_no": "96240-BQ000", "p_name": "BENCH", "car": "QU2i", "company": "BENCH", "labor_rate": 3500}
+
+
+# =========================================================
+# [측정]
+# =========================================================
+def measure(fn, repeat: int, items: int = 1, warmup: int = 1) -> dict:
+    """fn() 을 repeat 번 실행한 소요 시간 통계 + 1회 실행 중 최대 메모리"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    median = statistics.median(times)
+    return {
+        "repeat": repeat,
+        "min_ms": times[0] * 1000,
+        "median_ms": median * 1000,
+        "mean_ms": statistics.mean(times) * 1000,
+        "p95_ms": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))] * 1000,
+        "throughput_per_s": items / median if median > 0 else None,
+        "items": items,
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+def measure_once(fn, items: int = 1, trace_fn=None) -> dict:
+    """오래 걸리거나 상태를 바꾸는 작업(대량 저장, 템플릿 준비)을 1회만 측정
+
+    tracemalloc 은 할당이 많은 코드를 크게 느리게 하므로 시간은 추적 없이 잰다.
+    최대 메모리는 trace_fn (같은 작업을 다른 대상에 1회 더 실행) 이 있을 때만 잰다.
+    """
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace_fn is not None:
+        tracemalloc.start()
+        try:
+            trace_fn()
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    return {
+        "repeat": 1,
+        "min_ms": elapsed * 1000,
+        "median_ms": elapsed * 1000,
+        "mean_ms": elapsed * 1000,
+        "p95_ms": elapsed * 1000,
+        "throughput_per_s": items / elapsed if elapsed > 0 else None,
+        "items": items,
+        "peak_mem_kb": peak,
+    }
+
+
+class Recorder:
+    def __init__(self, verbose: bool = True):
+        self.results = []
+        self.verbose = verbose
+
+    def add(self, suite: str, case: str, size, stats: dict, **extra):
+        row = {"suite": suite, "case": case, "size": size, **stats, **extra}
+        self.results.append(row)
+        if self.verbose:
+            tput = f"{row['throughput_per_s']:>12,.1f}/s" if row.get("throughput_per_s") else " " * 14
+            peak = f"{row['peak_mem_kb']:>10,.0f}KB" if row.get("peak_mem_kb") is not None else ""
+            print(
+                f"{suite:>7} {case:<28} {str(size):>7}  median {row['median_ms']:>10.2f}ms  "
+                f"p95 {row['p95_ms']:>10.2f}ms  {tput}  peak {peak}",
+                file=sys.stderr,
+            )
+
+
+def _repeat_for(elapsed_hint_rows: int, base: int) -> int:
+    """큰 입력은 반복 횟수를 줄인다"""
+    if elapsed_hint_rows >= 10000:
+        return max(3, base // 10)
+    if elapsed_hint_rows >= 1000:
+        return max(5, base // 3)
+    return base
+
+
+# =========================================================
+# [1] 원가 계산
+# =========================================================
+def bench_calc(rec: Recorder, quick: bool, repeat: int):
+    for n in SIZES["calc_rows"][quick]:
+        reps = _repeat_for(n, repeat)
+        material = make_material(n, seed=n)
+        process = make_process(n, seed=n)
+        rec.add("calc", "calc_material", n, measure(lambda: calc_material(material), reps, items=n))
+        rec.add("calc", "calc_process", n, measure(lambda: calc_process(process, 3500), reps, items=n))
+
+        # 화면 편집 1셀 → 증분 재계산 (IncrementalCalc)
+        memo = IncrementalCalc(calc_material, MATERIAL_INPUT_COLS, ["금액", "재료비"])
+        memo.update(material)
+        state = {"base": material, "step": 0}
+
+        def edit_one():
+            base = state["base"]
+            edited = base.copy()
+            row = state["step"] % n
+            edited.iloc[row, edited.columns.get_loc("단가")] = float(state["step"] % 997 + 1)
+            memo.update(edited, rows={row}, base=base)
+            state["base"] = edited
+            state["step"] += 1
+
+        rec.add("calc", "incremental_edit_1cell", n, measure(edit_one, reps))
+
+    for count in SIZES["price_snapshots"][quick]:
+        snapshots = list(iter_snapshots(count))
+        reps = _repeat_for(count, repeat)
+        rec.add("calc", "price_snapshots", count, measure(lambda: price_snapshots(snapshots), reps, items=count))
+
+
+# =========================================================
+# [2] 엑셀 생성 (견적 1건)
+# =========================================================
+def bench_export(rec: Recorder, quick: bool, repeat: int):
+    # 템플릿 파싱 / 레이아웃 준비 (프로세스당 1회, 캐시와 별도로 새로 만들어 측정)
+    with open(TEMPLATE_FILE, "rb") as f:
+        data = f.read()
+    rec.add("export", "template_prepare", 1, measure(lambda: TemplateCache(data, "bench"), 3, warmup=0))
+    process = make_process(12, seed=7)
+
+    # 시트 수식 계산: 전체 vs 기록한 셀에서 이어지는 수식만 (size = 수식 수 / 기록한 셀 수)
+    graph = get_template(TEMPLATE_FILE).formulas
+    writes, _ = record_writes(HEADER, make_material(16, seed=16), process)
+    rec.add("export", "formula_full", len(graph.formulas), measure(lambda: SheetCalc(graph), repeat))
+    rec.add("export", "formula_incremental", len(writes), measure(lambda: graph.recalculate(writes), repeat))
+
+    for n in SIZES["export_rows"][quick]:
+        material = make_material(n, seed=n)
+        reps = _repeat_for(n, max(3, repeat // 2))
+        for engine in EXPORT_ENGINES:
+            stats = measure(lambda: build_excel(HEADER, material, process, engine=engine), reps)
+            rec.add("export", f"build_excel[{engine}]", n, stats)
+
+
+# =========================================================
+# [3] 저장소
+# =========================================================
+def bench_store(rec: Recorder, quick: bool, repeat: int):
+    workdir = tempfile.mkdtemp(prefix="bench_store_")
+    try:
+        for count in SIZES["store_snapshots"][quick]:
+            path = os.path.join(workdir, f"store_{count}.db")
+            store = QuoteStore(path)
+            snapshots = list(iter_snapshots(count))
+            scratch = os.path.join(workdir, f"scratch_{count}.db")
+            stats = measure_once(
+                lambda: store.append_many(snapshots),
+                items=count,
+                trace_fn=lambda: QuoteStore(scratch).append_many(snapshots),
+            )
+            os.remove(scratch)
+            rec.add("store", "append_many", count, stats, db_size_kb=os.path.getsize(path) / 1024)
+            del snapshots
+
+            extra = make_snapshot(count + 1)
+            rec.add("store", "append_one", count, measure_once(lambda: store.append(extra)))
+
+            rec.add("store", "count", count, measure(store.count, repeat))
+            rec.add("store", "list_page_first", count, measure(lambda: store.list_page(20), repeat, items=20))
+            # keyset: 가장 오래된 20건 (seq 1~20) 페이지
+            rec.add("store", "list_page_last", count, measure(lambda: store.list_page(20, before=21), repeat, items=20))
+            rec.add("store", "list_search", count, measure(lambda: store.list_page(20, search="BQ01"), repeat))
+            rec.add("store", "list_search_no_total", count,
+                    measure(lambda: store.list_page(20, search="BQ01", with_total=False), repeat))
+            rec.add("store", "list_filter_car", count, measure(lambda: store.list_page(20, car="SV1"), repeat))
+
+            ids = [row["id"] for row in store.list_page(50)[0]]
+            cursor = {"i": 0}
+
+            def get_cold():
+                # 본문 캐시를 비우고 조회 (DB 에서 본문 읽기)
+                store._cache.clear()
+                store.get(ids[cursor["i"] % len(ids)])
+                cursor["i"] += 1
+
+            rec.add("store", "get_cold", count, measure(get_cold, repeat))
+            store.get(ids[0])
+            rec.add("store", "get_cached", count, measure(lambda: store.get(ids[0]), repeat))
+            rec.add(
+                "store", "iter_find_all", count,
+                measure(lambda: sum(1 for _ in store.iter_find()), _repeat_for(count, 3), items=count + 1),
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================================================
+# [4] 일괄 생성 (ZIP)
+# =========================================================
+def bench_bulk(rec: Recorder, quick: bool, repeat: int, workers: int = None):
+    for count in SIZES["bulk_snapshots"][quick]:
+        snapshots = list(iter_snapshots(count, n_material=12, n_process=10))
+        for engine in EXPORT_ENGINES:
+            stats = measure(
+                lambda: export_zip(snapshots, BytesIO(), workers=workers, engine=engine), 1, items=count, warmup=0
+            )
+            rec.add("bulk", f"export_zip[{engine}]", count, stats,
+                    workers=workers or os.cpu_count(),
+                    max_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                    max_rss_children_kb=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        # 워커 없이 한 프로세스에서 1건씩 (기준값)
+        single = measure(lambda: [build_excel_from_snapshot(s) for s in snapshots], 1, items=count, warmup=0)
+        rec.add("bulk", "sequential[openpyxl]", count, single)
+
+
+# =========================================================
+# [startup] 앱 콜드 스타트 / rerun (새 파이썬 프로세스에서 AppTest 로 실행)
+# =========================================================
+# 로그인 화면 첫 실행 = 프로세스 시작 후 app.py 첫 실행 (모듈 import 포함, streamlit import 제외)
+STARTUP_CHILD = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+times = {}
+started = time.perf_counter(); at.run(); times["login_first_run"] = time.perf_counter() - started
+heavy = sorted(m for m in sys.argv[3].split(",") if m in sys.modules)
+started = time.perf_counter(); at.run(); times["login_rerun"] = time.perf_counter() - started
+at.text_input[0].input(sys.argv[2]); at.button[0].click()
+started = time.perf_counter(); at.run(); times["main_first_render"] = time.perf_counter() - started
+started = time.perf_counter(); at.run(); times["main_rerun"] = time.perf_counter() - started
+print(json.dumps({"times": times, "heavy_at_login": heavy, "modules": len(sys.modules), "exception": bool(at.exception)}))
+"""
+# 로그인 화면에서 올라와 있으면 안 되는 모듈 (pandas / 엑셀 / 저장소 / 분석 등 본 화면 전용)
+STARTUP_HEAVY = ["pandas", "numpy", "openpyxl", "excel_export", "xml_export", "bulk_export", "bom_import", "quote_store",
+                 "part_master", "analytics_cache", "scenario", "quote_diff", "detail_sheet"]
+
+
+def bench_startup(rec: Recorder, quick: bool, repeat: int):
+    """app.py 콜드 스타트 / rerun 시간 (저장소 파일은 임시 폴더에 만들어 작업 폴더를 건드리지 않음)"""
+    runs = 2 if quick else max(3, min(repeat, 7))
+    samples = {}
+    heavy = set()
+    with tempfile.TemporaryDirectory() as work:
+        for name in (TEMPLATE_FILE, "saved_results.json"):
+            if os.path.exists(os.path.join(ROOT, name)):
+                shutil.copy(os.path.join(ROOT, name), work)
+        for _ in range(runs):
+            for name in os.listdir(work):
+                if name.startswith(("saved_results.db", "part_master.db", "perf_log")):
+                    os.remove(os.path.join(work, name))
+            done = subprocess.run(
+                [sys.executable, "-c", STARTUP_CHILD, os.path.join(ROOT, "app.py"), "ssep2025", ",".join(STARTUP_HEAVY)],
+                cwd=work, capture_output=True, text=True, timeout=600,
+                env={**os.environ, "PYTHONPATH": ROOT},
+            )
+            result = json.loads(done.stdout.strip().splitlines()[-1])
+            for case, elapsed in result["times"].items():
+                samples.setdefault(case, []).append(elapsed)
+            heavy.update(result["heavy_at_login"])
+    for case, times in samples.items():
+        times.sort()
+        median = statistics.median(times)
+        rec.add("startup", case, runs, {
+            "repeat": runs, "min_ms": times[0] * 1000, "median_ms": median * 1000,
+            "mean_ms": statistics.mean(times) * 1000, "p95_ms": times[-1] * 1000,
+            "throughput_per_s": None, "items": 1, "peak_mem_kb": None,
+        }, heavy_at_login=sorted(heavy))
+
+
+# =========================================================
+# [결과 저장 / 비교]
+# =========================================================
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "openpyxl": openpyxl.__version__,
+    }
+
+
+def compare(base: dict, current: dict, threshold: float) -> list:
+    """같은 (suite, case, size) 의 median_ms 비교 → threshold 배 넘게 느려진 항목 목록"""
+    old = {(r["suite"], r["case"], str(r["size"])): r for r in base.get("results", [])}
+    regressions = []
+    print(f"\n{'suite':>7} {'case':<28} {'size':>7} {'before':>11} {'after':>11} {'ratio':>7}", file=sys.stderr)
+    for row in current["results"]:
+        prev = old.get((row["suite"], row["case"], str(row["size"])))
+        if not prev or not prev.get("median_ms") or not row.get("median_ms"):
+            continue
+        ratio = row["median_ms"] / prev["median_ms"]
+        mark = "  <-- 느려짐" if ratio > threshold else ""
+        print(f"{row['suite']:>7} {row['case']:<28} {str(row['size']):>7} {prev['median_ms']:>9.2f}ms "
+              f"{row['median_ms']:>9.2f}ms {ratio:>6.2f}x{mark}", file=sys.stderr)
+        if ratio > threshold:
+            regressions.append({**row, "before_ms": prev["median_ms"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="원가계산서 벤치마크 (결과는 JSON)")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="실행할 항목 (여러 번 지정, 기본: 전체)")
+    parser.add_argument("--quick", action="store_true", help="작은 크기만 실행")
+    parser.add_argument("--repeat", type=int, default=15, help="항목별 기본 반복 횟수 (큰 입력은 자동으로 줄임)")
+    parser.add_argument("--workers", type=int, default=None, help="일괄 생성 워커 수 (기본: CPU 코어 수)")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: benchmarks/results/bench_<시각>.json, '-' 는 stdout)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="느려짐으로 볼 배율 (기본: %(default)s)")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)  # 템플릿 상대 경로 기준
+    rec = Recorder()
+    quick = 1 if args.quick else 0
+    for suite in [name for name in SUITES if name in (args.suite or SUITES)]:
+        if suite == "bulk":
+            bench_bulk(rec, quick, args.repeat, args.workers)
+        else:
+            {"calc": bench_calc, "export": bench_export, "store": bench_store,
+             "startup": bench_startup}[suite](rec, quick, args.repeat)
+
+    report = {"meta": {**environment(), "quick": bool(args.quick), "repeat": args.repeat}, "results": rec.results}
+    if args.out == "-":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        out = args.out or os.path.join(
+            ROOT, "benchmarks", "results", f"bench_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)}개 항목이 {args.threshold}배 넘게 느려졌습니다.", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# =========================================================
+# [벤치마크] 합성 견적 데이터 생성
+# =========================================================
+# - 시드가 같으면 항상 같은 데이터를 만든다 (버전 간 결과 비교용).
+# - 컬럼 / 값 형태는 실제 저장 스냅샷(saved_results.json)과 같게 맞춘다.
+#   (SCRAP 은 문자열, 빈 칸은 NaN, 국내 가공비 2행 포함 등)
+import numpy as np
+import pandas as pd
+
+MATERIALS = ["PA6-GF30%", "PC+ABS", "SPCC", "ADC12", "TAPPING_SCREW", "PCB ASSY", "CABLE", "LABEL"]
+PROCESSES = ["사출", "조립", "납땜", "검사", "포장", "도장", "프레스", "용접"]
+MACHINES = ["180TON", "220TON", "수동", "자동화라인", "검사기"]
+CARS = ["QU2i", "SV1", "NQ5", "MQ4", "CN7", "JW1"]
+COMPANIES = ["인팩일렉스", "대성", "한일", "동양", "세원"]
+DOMESTIC = ["하역/리패킹/검사", "라벨/포장/출하"]
+
+
+def make_material(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """재료비 입력 n_rows 행"""
+    rng = np.random.default_rng(seed)
+    codes = [f"PDC{seed % 10000:04d}{i:06d}" for i in range(n_rows)]
+    scrap = rng.uniform(0, 5, n_rows).round(2).astype(str)
+    scrap[rng.random(n_rows) < 0.3] = ""
+    df = pd.DataFrame({
+        "부품명": codes,
+        "부품코드": codes,
+        "U/S": rng.integers(1, 5, n_rows).astype(float),
+        "재질/규격": rng.choice(MATERIALS, n_rows),
+        "단위": "EA",
+        "단가": rng.uniform(1, 2000, n_rows).round(3),
+        "NET(g,mm)": rng.uniform(0.1, 50, n_rows).round(3),
+        "SCRAP(g,mm)": scrap,
+        "자재LOSS율(%)": rng.choice([0.0, 1.0, 2.0, 3.0], n_rows),
+        "산업폐기물처리비용": rng.choice([0.0, 0.5, 1.0], n_rows),
+        "다이캐스팅LOSS인정": rng.choice([0.0, 0.5], n_rows),
+    })
+    # 실제 데이터처럼 일부 숫자 칸은 비어 있음
+    blank = rng.random(n_rows) < 0.2
+    df.loc[blank, ["자재LOSS율(%)", "산업폐기물처리비용", "다이캐스팅LOSS인정"]] = np.nan
+    return df
+
+
+def make_process(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """가공비 입력 n_rows 행 (마지막 2행은 국내 가공비 고정 공정)"""
+    rng = np.random.default_rng(seed + 1)
+    names = [f"{rng.choice(PROCESSES)}{i + 1}" for i in range(n_rows)]
+    for offset, name in enumerate(DOMESTIC[: min(2, n_rows)]):
+        names[n_rows - 1 - offset] = name
+    return pd.DataFrame({
+        "부품명": [f"부품{i}" for i in range(n_rows)],
+        "U/S": rng.integers(1, 3, n_rows).astype(float),
+        "공정명": names,
+        "사용기계": rng.choice(MACHINES, n_rows),
+        "인": rng.integers(1, 3, n_rows).astype(float),
+        "공수(SEC)": rng.uniform(5, 120, n_rows).round(1),
+        "준비시간(분)": rng.choice([0.0, 5.0, 10.0], n_rows),
+        "산출근거(원/HR)": np.where(rng.random(n_rows) < 0.3, rng.choice([4200.0, 5100.0], n_rows), 0.0),
+        "여유율(%)": rng.choice([0.0, 5.0, 10.0], n_rows),
+    })
+
+
+def make_payload(n_material: int = 12, n_process: int = 8, seed: int = 0) -> dict:
+    """스냅샷 본문 (material / process 레코드 목록)"""
+    return {
+        "material": make_material(n_material, seed).to_dict(orient="records"),
+        "process": make_process(n_process, seed).to_dict(orient="records"),
+    }
+
+
+def make_snapshot(i: int, n_material: int = 12, n_process: int = 8, seed: int = 0, payload: dict = None) -> dict:
+    """저장 스냅샷 1건 (id / 저장일시 / 기본 정보는 i 로 결정, payload 를 주면 본문 재사용)"""
+    rng = np.random.default_rng(seed * 1_000_003 + i)
+    day = pd.Timestamp("2025-01-01") + pd.Timedelta(minutes=int(i) * 7)
+    p_no = f"{96000 + i % 500}-BQ{i % 1000:03d}"
+    p_name = f"ASSY-{i % 300:03d}"
+    return {
+        "id": day.strftime("%Y%m%d%H%M%S"),
+        "saved_at": day.strftime("%Y-%m-%d %H:%M:%S"),
+        "name": f"{p_no} - {p_name}",
+        "p_no": p_no,
+        "p_name": p_name,
+        "car": CARS[int(rng.integers(len(CARS)))],
+        "company": COMPANIES[int(rng.integers(len(COMPANIES)))],
+        "labor_rate": float(rng.choice([3500, 4000, 4500])),
+        **(payload or make_payload(n_material, n_process, seed + i)),
+    }
+
+
+def iter_snapshots(count: int, n_material: int = 12, n_process: int = 8, seed: int = 0, distinct_payloads: int = 64):
+    """스냅샷 count 건을 하나씩 생성 (대량 생성 시 메모리 절약)
+
+    본문은 distinct_payloads 종류를 돌려 쓴다 (수만 건 생성 시간을 줄이기 위함).
+    """
+    payloads = {}
+    for i in range(count):
+        key = i % distinct_payloads
+        if key not in payloads:
+            payloads[key] = make_payload(n_material, n_process, seed + key)
+        yield make_snapshot(i, n_material, n_process, seed, payload=payloads[key])
@@ -0,0 +1,241 @@
+# =========================================================
+# [BOM 가져오기] 고객 BOM 엑셀 / CSV → 재료비 / 가공비 입력 표 (streamlit 비의존)
+# =========================================================
+# - .xlsx 는 openpyxl read_only 모드, .csv 는 csv 모듈로 행을 하나씩 읽어
+#   CHUNK_ROWS 행씩 묶어 변환한다 (파일 전체를 한 번에 DataFrame 으로 올리지 않음).
+# - 머리글 행은 앞쪽 HEADER_SCAN_ROWS 행 안에서 찾고, 열 이름 별칭으로 입력 컬럼에 맞춘다.
+# - 숫자 컬럼은 청크마다 한 번에 숫자형으로 바꾸고, 바꿀 수 없는 값 / 음수는 오류 목록에 남긴다.
+# - 읽는 행 수는 max_rows, 오류 목록은 MAX_ERRORS 건까지만 보관 (파일 크기와 무관하게 메모리 제한).
+import codecs
+import csv
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from cost_engine import MATERIAL_INPUT_COLS, PROCESS_INPUT_COLS
+
+CHUNK_ROWS = 2000
+HEADER_SCAN_ROWS = 30
+MAX_IMPORT_ROWS = 50_000
+MAX_ERRORS = 200
+
+# 입력 컬럼 → 파일 머리글 별칭 (공백 / 줄바꿈 / 대소문자 무시, 앞쪽 우선)
+MATERIAL_ALIASES = {
+    "부품명": ["부품명", "품명", "partname", "description"],
+    "부품코드": ["부품코드", "품번", "partno", "partnumber", "code"],
+    "U/S": ["u/s", "us", "수량", "qty", "quantity"],
+    "재질/규격": ["재질/규격", "재질,규격", "재질", "규격", "material", "spec"],
+    "단위": ["단위", "unit", "uom"],
+    "단가": ["단가", "unitprice", "price"],
+    "NET(g,mm)": ["net(g,mm)", "net", "중량"],
+    "SCRAP(g,mm)": ["scrap(g,mm)", "scrap"],
+    "자재LOSS율(%)": ["자재loss율(%)", "자재loss율", "loss율", "loss(%)"],
+    "산업폐기물처리비용": ["산업폐기물처리비용", "산업폐기물"],
+    "다이캐스팅LOSS인정": ["다이캐스팅loss인정", "다이캐스팅"],
+}
+PROCESS_ALIASES = {
+    "부품명": ["부품명", "품명", "partname"],
+    "U/S": ["u/s", "us", "수량", "qty"],
+    "공정명": ["공정명", "공정", "process"],
+    "사용기계": ["사용기계", "기계", "설비", "machine"],
+    "인": ["인", "인원", "작업자", "man"],
+    "공수(SEC)": ["공수(sec)", "공수", "c/t", "ct", "cycletime"],
+    "준비시간(분)": ["준비시간(분)", "준비시간", "setup"],
+    "산출근거(원/HR)": ["산출근거(원/hr)", "산출근거", "임율", "rate"],
+    "여유율(%)": ["여유율(%)", "여유율", "allowance"],
+}
+# 입력 컬럼 중 숫자 컬럼 (SCRAP 은 화면에서 텍스트 컬럼)
+MATERIAL_NUMERIC = ["U/S", "단가", "NET(g,mm)", "자재LOSS율(%)", "산업폐기물처리비용", "다이캐스팅LOSS인정"]
+PROCESS_NUMERIC = ["U/S", "인", "공수(SEC)", "준비시간(분)", "산출근거(원/HR)", "여유율(%)"]
+
+KINDS = {
+    "material": (MATERIAL_INPUT_COLS, MATERIAL_ALIASES, MATERIAL_NUMERIC, "부품명"),
+    "process": (PROCESS_INPUT_COLS, PROCESS_ALIASES, PROCESS_NUMERIC, "공정명"),
+}
+
+
+def _norm(header) -> str:
+    return re.sub(r"\s+", "", str(header)).lower() if header is not None else ""
+
+
+def match_columns(header_row, kind: str) -> dict:
+    """머리글 행 → {입력 컬럼: 파일 열 위치} (정확히 같은 이름 우선, 없으면 별칭 순서대로)"""
+    _, aliases, _, _ = KINDS[kind]
+    names = [_norm(h) for h in header_row]
+    mapping, used = {}, set()
+    for col, candidates in aliases.items():
+        for alias in candidates:
+            pos = next((i for i, name in enumerate(names) if name == alias and i not in used), None)
+            if pos is not None:
+                mapping[col] = pos
+                used.add(pos)
+                break
+    return mapping
+
+
+class BomImport:
+    """가져오기 결과 (df: 입력 컬럼 순서의 표, errors: [(파일 행 번호, 컬럼, 내용)])"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.df = None
+        self.sheet = None
+        self.header_row = None
+        self.mapping = {}
+        self.rows_read = 0
+        self.skipped = 0
+        self.truncated = False
+        self.error_count = 0
+        self.errors: list[tuple] = []
+
+    def error(self, row_no, col, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((row_no, col, message))
+
+    def errors_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.errors, columns=["행", "컬럼", "내용"])
+
+
+# =========================================================
+# [1] 파일 → 행 (한 행씩 / 한 청크씩)
+# =========================================================
+def _xlsx_sheets(source):
+    """(시트명, 행 iterator) - read_only 모드 (행 값만)"""
+    from openpyxl import load_workbook  # CSV 만 가져올 때는 openpyxl 을 올리지 않음
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _csv_encoding(f) -> str:
+    """앞부분 64KB 로 인코딩 판단 (UTF-8 이 아니면 CP949 - 한글 엑셀에서 저장한 CSV)"""
+    sample = f.read(65536)
+    f.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(sample, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp949"
+
+
+def _csv_rows(source):
+    """CSV 행 iterator (파일을 줄 단위로 읽음 - 제목 줄 등 열 수가 다른 행도 허용)"""
+    f = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        text = io.TextIOWrapper(f, encoding=_csv_encoding(f), errors="replace", newline="")
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()  # 업로드 파일 객체는 닫지 않음
+    finally:
+        if f is not source:
+            f.close()
+
+
+def _find_header(rows, kind: str):
+    """앞쪽 HEADER_SCAN_ROWS 행에서 머리글 찾기 → (머리글 행 번호(1부터), 매핑) 또는 (None, {})"""
+    _, _, _, required = KINDS[kind]
+    for row_no, row in enumerate(rows, start=1):
+        mapping = match_columns(row, kind)
+        if required in mapping and len(mapping) >= 2:
+            return row_no, mapping
+        if row_no >= HEADER_SCAN_ROWS:
+            break
+    return None, {}
+
+
+# =========================================================
+# [2] 행 → 입력 표 (청크 단위 형 변환 / 검증)
+# =========================================================
+def _chunk_frame(result: BomImport, rows: list, first_row_no: int) -> pd.DataFrame:
+    """원본 행 청크 → 입력 컬럼 DataFrame (숫자형 변환 + 오류 기록, 빈 행 / 필수값 없는 행 제외)"""
+    columns, _, numeric, required = KINDS[result.kind]
+    width = max(result.mapping.values()) + 1
+    block = np.array([tuple(r[:width]) + (None,) * (width - len(r)) for r in rows], dtype=object)
+    row_no = np.arange(first_row_no, first_row_no + len(rows))
+
+    data = {}
+    for col in columns:
+        pos = result.mapping.get(col)
+        values = pd.Series(block[:, pos] if pos is not None else None, index=row_no, dtype=object)
+        text = values.where(values.notna(), "").astype(str).str.strip()
+        if col in numeric:
+            number = pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce")
+            for r in text.index[(text != "") & number.isna()]:
+                result.error(int(r), col, f"숫자가 아닌 값: {text[r]}")
+            negative = number < 0
+            for r in number.index[negative]:
+                result.error(int(r), col, f"음수: {number[r]:g}")
+            data[col] = number.where(~negative).astype(float)
+        else:
+            data[col] = text
+    frame = pd.DataFrame(data, index=row_no)
+
+    text_cols = [c for c in columns if c not in numeric]
+    empty = (frame[text_cols] == "").all(axis=1) & frame[numeric].isna().all(axis=1)
+    missing = ~empty & (frame[required] == "")
+    for r in frame.index[missing]:
+        result.error(int(r), required, f"{required} 이(가) 비어 있어 제외")
+    result.skipped += int(missing.sum())
+    frame = frame[~empty & ~missing]
+    # 화면 표와 같게 빈 텍스트는 None
+    for col in text_cols:
+        frame[col] = frame[col].where(frame[col] != "", None)
+    return frame
+
+
+def _read_rows(result: BomImport, rows, max_rows: int):
+    header_no, result.mapping = _find_header(rows, result.kind)
+    if header_no is None:
+        return False
+    result.header_row = header_no
+    frames, chunk, row_no = [], [], header_no + 1
+    for row in rows:
+        if result.rows_read >= max_rows:
+            result.truncated = True
+            break
+        chunk.append(row)
+        result.rows_read += 1
+        if len(chunk) >= CHUNK_ROWS:
+            frames.append(_chunk_frame(result, chunk, row_no))
+            row_no += len(chunk)
+            chunk = []
+    if chunk:
+        frames.append(_chunk_frame(result, chunk, row_no))
+    columns = KINDS[result.kind][0]
+    result.df = (pd.concat(frames) if frames else pd.DataFrame(columns=columns)).reset_index(drop=True)
+    return True
+
+
+def import_bom(source, kind: str = "material", name: str = None, max_rows: int = MAX_IMPORT_ROWS) -> BomImport:
+    """BOM 파일(.xlsx / .csv) → BomImport
+
+    source: 파일 경로 또는 파일 객체 (업로드 파일은 name 에 파일명)
+    kind: "material" (재료비 11개 컬럼) / "process" (가공비 9개 컬럼)
+    엑셀은 머리글이 맞는 첫 시트를 읽는다. 머리글을 못 찾으면 ValueError.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"알 수 없는 가져오기 종류: {kind}")
+    name = name or str(source)
+    result = BomImport(kind)
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        for title, rows in _xlsx_sheets(source):
+            if _read_rows(result, rows, max_rows):
+                result.sheet = title
+                break
+    else:
+        _read_rows(result, _csv_rows(source), max_rows)
+    if result.df is None:
+        _, _, _, required = KINDS[kind]
+        raise ValueError(f"{name}: 머리글 행을 찾을 수 없습니다 ('{required}' 열과 다른 입력 열이 필요합니다).")
+    if result.truncated:
+        result.error(None, None, f"최대 {max_rows:,}행까지만 가져왔습니다.")
+    return result
@@ -0,0 +1,90 @@
+# =========================================================
+# [일괄 엑셀 생성] 저장된 스냅샷 여러 건 → 원가계산서 ZIP
+# =========================================================
+# - 스냅샷마다 템플릿 채우기를 프로세스 풀에서 병렬로 실행한다.
+#   (워커 프로세스마다 template_layout 캐시가 한 번만 만들어진다)
+# - 완료되는 순서대로 ZIP 에 바로 기록하므로 결과 파일을 모두 메모리에 모아 두지 않는다.
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from excel_export import DEFAULT_ENGINE, build_excel_from_snapshot, export_file_name
+from template_layout import TEMPLATE_FILE
+
+
+def _export_one(snapshot: dict, template_path: str, engine: str = DEFAULT_ENGINE):
+    """워커: 스냅샷 1건 → (파일명, xlsx 바이트, 오류 메시지)"""
+    name = export_file_name(snapshot, with_id=True)
+    try:
+        return name, build_excel_from_snapshot(snapshot, template_path, engine).getvalue(), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def iter_exports(snapshots, template_path: str = TEMPLATE_FILE, workers: int = None, engine: str = DEFAULT_ENGINE):
+    """스냅샷들을 원가계산서로 만들면서 완료 순서대로 (파일명, xlsx 바이트, 오류) 반환"""
+    workers = workers or default_workers()
+    if workers == 1:
+        for snapshot in snapshots:
+            yield _export_one(snapshot, template_path, engine)
+        return
+
+    # 동시에 실행 중인 작업 수를 워커 수의 2배로 제한 (메모리 사용량 고정)
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for snapshot in snapshots:
+            pending.add(pool.submit(_export_one, snapshot, template_path, engine))
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def _export_to(snapshots, write, template_path, workers, progress, total, engine) -> dict:
+    """iter_exports 결과를 write(파일명, 바이트) 로 넘기고 진행 상황 보고"""
+    if total is None and hasattr(snapshots, "__len__"):
+        total = len(snapshots)
+    summary = {"written": 0, "errors": []}
+    for done, (name, data, error) in enumerate(iter_exports(snapshots, template_path, workers, engine), start=1):
+        if error is None:
+            write(name, data)
+            summary["written"] += 1
+        else:
+            summary["errors"].append((name, error))
+        if progress:
+            progress(done, total, name)
+    return summary
+
+
+def export_zip(snapshots, target, template_path: str = TEMPLATE_FILE, workers: int = None,
+               progress=None, total: int = None, engine: str = DEFAULT_ENGINE) -> dict:
+    """스냅샷들을 원가계산서로 만들어 target(경로 또는 파일 객체) ZIP 에 기록
+
+    snapshots: 스냅샷 dict 의 iterable (QuoteStore.iter_find() 결과 등)
+    progress: progress(완료 건수, 전체 건수, 파일명) 콜백 (전체 건수를 모르면 total=None)
+    engine: "xml"(기본) 또는 "openpyxl" (excel_export.build_excel 참고)
+    반환: {"written": 성공 건수, "errors": [(파일명, 오류), ...]}
+    """
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        return _export_to(snapshots, zf.writestr, template_path, workers, progress, total, engine)
+
+
+def export_dir(snapshots, out_dir: str, template_path: str = TEMPLATE_FILE, workers: int = None,
+               progress=None, total: int = None, engine: str = DEFAULT_ENGINE) -> dict:
+    """스냅샷들을 원가계산서로 만들어 out_dir 폴더에 .xlsx 파일로 기록 (반환값은 export_zip 과 동일)"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    def write(name, data):
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(data)
+
+    return _export_to(snapshots, write, template_path, workers, progress, total, engine)
@@ -0,0 +1,341 @@
+# =========================================================
+# [CLI] Streamlit 없이 견적 산출 / 원가계산서 생성
+# =========================================================
+# 사용 예)
+#   python cli.py price                                  # 저장소(saved_results.db) 전체 합계
+#   python cli.py price --json saved_results.json --format csv
+#   python cli.py price --p-no 96240-BQ000 --from 2025-12-01
+#   python cli.py export --out exports/ --car QU2i --workers 4
+#   python cli.py export --zip month_end.zip --from 2025-12-01 --to 2025-12-31
+#   python cli.py export --zip month_end.zip --engine openpyxl  # openpyxl 로 전체 로드/저장 (기본 xml)
+#   python cli.py export --material-csv mat.csv --process-csv pro.csv \
+#       --p-no 96240-BQ000 --p-name "ANTENA ASSY" --labor-rate 3500 --out exports/
+#   python cli.py diff --p-no 96240-BQ000 --rows                # 같은 품번 리비전 비교
+#   python cli.py analytics --by company --from 2025-01-01   # 저장 산출 전체 분석 (캐시 증분 갱신)
+#   python cli.py scenario --labor-rate 3800 --material PA66=1.1   # 임율 / 단가 변경 영향 (저장 산출 전체)
+#   python cli.py parts --import price_list.xlsx              # 단가표를 부품 마스터에 반영
+#   python cli.py parts --search PDC2022                       # 부품코드 앞부분 검색
+#   python cli.py serve --port 8765 --token SECRET             # ERP 연동용 HTTP JSON API (api_server.py)
+#
+# streamlit 을 import 하지 않으므로 배치 작업 / 야간 작업 / 벤치마크에 바로 쓸 수 있다.
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from analytics_cache import ANALYTICS_DIR, AnalyticsCache, cost_trend, rate_distribution, top_parts
+from api_server import API_HOST, API_PORT, ApiService, serve
+from bulk_export import export_dir, export_zip
+from cost_engine import price_snapshots
+from excel_export import DEFAULT_ENGINE, EXPORT_ENGINES
+from export_cache import EXPORT_CACHE_DIR, ExportCache
+from part_master import PART_MASTER_FILE, open_part_master
+from quote_diff import PART_LABELS, STATUS_SAME, compare_snapshots
+from quote_store import STORE_FILE, new_snapshot_id, open_store
+from rate_table import get_rate_table
+from scenario import Scenario, ScenarioRunner, scenario_summary
+from template_layout import TEMPLATE_FILE
+
+
+def _match(snapshot: dict, args) -> bool:
+    """JSON 입력용 조건 필터 (저장소 조회 조건과 동일)"""
+    if args.id and str(snapshot.get("id")) not in args.id:
+        return False
+    for field in ("p_no", "car", "company"):
+        value = getattr(args, field)
+        if value is not None and snapshot.get(field) != value:
+            return False
+    saved_at = str(snapshot.get("saved_at", ""))
+    if args.date_from and saved_at < args.date_from:
+        return False
+    if args.date_to and saved_at > f"{args.date_to} 23:59:59":
+        return False
+    return True
+
+
+def _csv_snapshot(args) -> dict:
+    """CSV 입력 1건 → 스냅샷 (기본 정보는 명령행 옵션 사용)"""
+    material = pd.read_csv(args.material_csv) if args.material_csv else pd.DataFrame()
+    process = pd.read_csv(args.process_csv) if args.process_csv else pd.DataFrame()
+    now = datetime.now()
+    return {
+        "id": new_snapshot_id(now),
+        "saved_at": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "name": f"{args.p_no or ''} - {args.p_name or ''}",
+        "p_no": args.p_no or "",
+        "p_name": args.p_name or "",
+        "car": args.car or "",
+        "company": args.company or "",
+        "labor_rate": args.labor_rate,
+        "material": material.to_dict(orient="records"),
+        "process": process.to_dict(orient="records"),
+    }
+
+
+def load_snapshots(args):
+    """입력 소스(CSV / JSON / 저장소)에서 스냅샷 목록 읽기"""
+    if args.material_csv or args.process_csv:
+        return [_csv_snapshot(args)]
+    if args.json:
+        with open(args.json, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [data]
+        return [s for s in data if _match(s, args)]
+    store = open_store(args.store)
+    return store.find(
+        p_no=args.p_no,
+        car=args.car,
+        company=args.company,
+        ids=args.id,
+        date_from=args.date_from,
+        date_to=args.date_to,
+    )
+
+
+def cmd_price(args) -> int:
+    snapshots = load_snapshots(args)
+    totals = price_snapshots(snapshots, rate_table=get_rate_table())
+    meta = pd.DataFrame(
+        [{"id": s.get("id"), "p_no": s.get("p_no", ""), "p_name": s.get("p_name", ""),
+          "labor_rate": s.get("labor_rate")} for s in snapshots],
+        columns=["id", "p_no", "p_name", "labor_rate"],
+    )
+    result = meta.merge(totals, on="id", how="left") if len(meta) else totals
+
+    if args.format == "csv":
+        result.to_csv(sys.stdout, index=False)
+    elif args.format == "json":
+        json.dump(result.to_dict(orient="records"), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(result.to_string(index=False) if len(result) else "산출 대상이 없습니다.")
+    return 0
+
+
+def cmd_export(args) -> int:
+    if not args.out and not args.zip:
+        print("--out 또는 --zip 중 하나를 지정하세요.", file=sys.stderr)
+        return 2
+    snapshots = load_snapshots(args)
+
+    def progress(done, total, name):
+        if not args.quiet:
+            print(f"[{done}/{total}] {name}", file=sys.stderr)
+
+    options = {"template_path": args.template, "workers": args.workers, "progress": progress, "engine": args.engine}
+    if args.zip:
+        summary = export_zip(snapshots, args.zip, **options)
+    else:
+        summary = export_dir(snapshots, args.out, **options)
+
+    for name, error in summary["errors"]:
+        print(f"ERROR {name}: {error}", file=sys.stderr)
+    print(f"{summary['written']}건 생성 ({args.zip or args.out})")
+    return 1 if summary["errors"] else 0
+
+
+def cmd_parts(args) -> int:
+    master = open_part_master(args.parts_db, store=open_store(args.store))
+    if args.rebuild:
+        print(f"저장 스냅샷에서 {master.update_from_snapshots(open_store(args.store).iter_find())}개 부품 갱신")
+    for path in args.import_files or []:
+        print(f"{path}: {master.import_price_list(path)}개 부품 반영")
+    if args.search:
+        found = pd.DataFrame(master.search(args.search, limit=args.limit))
+        print(found.to_string(index=False) if len(found) else "일치하는 부품이 없습니다.")
+    print(f"부품 마스터: {master.count()}건 ({args.parts_db})", file=sys.stderr)
+    return 0
+
+
+def cmd_diff(args) -> int:
+    snapshots = load_snapshots(args)
+    if len(snapshots) < 2:
+        print("비교할 스냅샷이 2건 이상 필요합니다 (--p-no / --id 로 지정).", file=sys.stderr)
+        return 2
+    result = compare_snapshots(snapshots, rate_table=get_rate_table())
+    print(result.revisions.to_string(index=False))
+    print()
+    drivers = result.drivers(top=args.top)
+    print(drivers.to_string(index=False) if len(drivers) else "금액이 바뀐 행이 없습니다.")
+    if args.rows:
+        for part, label in PART_LABELS.items():
+            rows = result.rows[part]
+            print(f"\n[{label}]")
+            print(rows[rows["상태"] != STATUS_SAME].to_string(index=False))
+    return 0
+
+
+def cmd_analytics(args) -> int:
+    cache = AnalyticsCache(args.cache_dir)
+    store = open_store(args.store)
+    added = cache.rebuild(store) if args.rebuild else cache.refresh(store)
+    print(f"분석 캐시: 새로 반영 {added}건 ({args.cache_dir})", file=sys.stderr)
+    quotes, material, process = cache.frames(car=args.car, company=args.company,
+                                             date_from=args.date_from, date_to=args.date_to)
+    if quotes.empty:
+        print("분석할 저장 산출이 없습니다.")
+        return 0
+    print(f"[월별 {args.by} 견적 금액 ({args.how})]")
+    print(cost_trend(quotes, by=args.by, how=args.how).round(0).to_string())
+    print(f"\n[재료비 상위 {args.top}개 부품]")
+    print(top_parts(material, n=args.top).to_string(index=False))
+    print("\n[사용임율 분포]")
+    print(rate_distribution(process, bins=args.bins).drop(columns="하한").to_string(index=False))
+    return 0
+
+
+def _factor_pairs(items) -> dict:
+    """['PA66=1.1', ...] → {'PA66': 1.1}"""
+    pairs = {}
+    for item in items or []:
+        key, sep, value = item.rpartition("=")
+        if not sep or not key:
+            raise SystemExit(f"배수 형식 오류: {item} (예: PA66=1.1)")
+        pairs[key] = float(value)
+    return pairs
+
+
+def cmd_scenario(args) -> int:
+    cache = AnalyticsCache(args.cache_dir)
+    cache.refresh(open_store(args.store))
+    scenario = Scenario(
+        labor_rate=args.labor_rate,
+        price_factors=_factor_pairs(args.price),
+        material_factors=_factor_pairs(args.material),
+        loss_rate=args.loss_rate,
+    )
+    result = ScenarioRunner(cache).run(scenario, car=args.car, company=args.company,
+                                       date_from=args.date_from, date_to=args.date_to)
+    summary = scenario_summary(result)
+    print(f"시나리오: {scenario.describe()} / 대상 {summary['견적수']}건, 변경 {summary['변경견적수']}건, "
+          f"합계 {summary['기존합계']:,.0f} → {summary['새합계']:,.0f} ({summary['증감']:+,.0f}원, {summary['증감률(%)']:+.2f}%)",
+          file=sys.stderr)
+    if args.format == "csv":
+        result.to_csv(sys.stdout, index=False)
+    else:
+        changed = result[result["증감"].abs() > 1e-9]
+        print(changed.to_string(index=False) if len(changed) else "금액이 바뀐 견적이 없습니다.")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="원가계산서 산출 / 엑셀 생성 (Streamlit 없이 실행)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    src = common.add_argument_group("입력")
+    src.add_argument("--store", default=STORE_FILE, help="스냅샷 저장소 DB (기본: %(default)s)")
+    src.add_argument("--json", help="스냅샷 JSON 파일 (saved_results.json 형식 또는 스냅샷 1건)")
+    src.add_argument("--material-csv", help="재료비 CSV (견적 1건)")
+    src.add_argument("--process-csv", help="가공비 CSV (견적 1건)")
+    flt = common.add_argument_group("조건 (CSV 입력에서는 기본 정보 값으로 사용)")
+    flt.add_argument("--id", action="append", help="저장ID (여러 번 지정 가능)")
+    flt.add_argument("--p-no", dest="p_no", help="품번")
+    flt.add_argument("--p-name", dest="p_name", help="품명 (CSV 입력 전용)")
+    flt.add_argument("--car", help="차종")
+    flt.add_argument("--company", help="업체")
+    flt.add_argument("--labor-rate", dest="labor_rate", type=float, default=3500, help="적용임율 (CSV 입력 전용)")
+    flt.add_argument("--from", dest="date_from", help="저장일 시작 (YYYY-MM-DD)")
+    flt.add_argument("--to", dest="date_to", help="저장일 종료 (YYYY-MM-DD)")
+    common.add_argument("--timing", action="store_true", help="소요 시간을 stderr 로 출력")
+
+    p_price = sub.add_parser("price", parents=[common], help="재료비 / 가공비 합계 산출")
+    p_price.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    p_price.set_defaults(func=cmd_price)
+
+    p_export = sub.add_parser("export", parents=[common], help="원가계산서 엑셀 생성")
+    p_export.add_argument("--out", help="xlsx 파일을 기록할 폴더")
+    p_export.add_argument("--zip", help="xlsx 파일을 묶을 ZIP 경로")
+    p_export.add_argument("--template", default=TEMPLATE_FILE, help="템플릿 파일 (기본: %(default)s)")
+    p_export.add_argument("--engine", choices=EXPORT_ENGINES, default=DEFAULT_ENGINE,
+                          help="엑셀 생성 방식 (xml: 시트 XML 만 직접 수정하고 수식 값까지 기록, 기본: %(default)s)")
+    p_export.add_argument("--workers", type=int, default=None, help="병렬 프로세스 수 (기본: CPU 코어 수)")
+    p_export.add_argument("--quiet", action="store_true", help="진행 상황 출력 안 함")
+    p_export.set_defaults(func=cmd_export)
+
+    p_diff = sub.add_parser("diff", parents=[common], help="저장 산출 리비전 비교 (저장일시 순서)")
+    p_diff.add_argument("--top", type=int, default=10, help="주요 변동 요인 건수")
+    p_diff.add_argument("--rows", action="store_true", help="바뀐 행 전체 출력")
+    p_diff.set_defaults(func=cmd_diff)
+
+    p_an = sub.add_parser("analytics", help="저장 산출 전체 분석 (컬럼형 캐시를 갱신한 뒤 집계)")
+    p_an.add_argument("--store", default=STORE_FILE, help="스냅샷 저장소 DB (기본: %(default)s)")
+    p_an.add_argument("--cache-dir", default=ANALYTICS_DIR, help="분석 캐시 폴더 (기본: %(default)s)")
+    p_an.add_argument("--rebuild", action="store_true", help="캐시를 지우고 전체를 다시 만들기")
+    p_an.add_argument("--car", help="차종")
+    p_an.add_argument("--company", help="업체")
+    p_an.add_argument("--from", dest="date_from", help="저장일 시작 (YYYY-MM-DD)")
+    p_an.add_argument("--to", dest="date_to", help="저장일 종료 (YYYY-MM-DD)")
+    p_an.add_argument("--by", choices=["car", "company"], default="car", help="추이 구분 (기본: %(default)s)")
+    p_an.add_argument("--how", choices=["mean", "sum", "count"], default="mean", help="견적 금액 집계 (기본: %(default)s)")
+    p_an.add_argument("--top", type=int, default=20, help="상위 부품 수")
+    p_an.add_argument("--bins", type=int, default=10, help="임율 분포 구간 수")
+    p_an.add_argument("--timing", action="store_true", help="소요 시간을 stderr 로 출력")
+    p_an.set_defaults(func=cmd_analytics)
+
+    p_sc = sub.add_parser("scenario", help="적용임율 / 단가 / LOSS율 변경 시 저장 산출 전체 재산출")
+    p_sc.add_argument("--store", default=STORE_FILE, help="스냅샷 저장소 DB (기본: %(default)s)")
+    p_sc.add_argument("--cache-dir", default=ANALYTICS_DIR, help="분석 캐시 폴더 (기본: %(default)s)")
+    p_sc.add_argument("--labor-rate", dest="labor_rate", type=float, help="새 적용임율 (산출근거 / 임율표 행 제외)")
+    p_sc.add_argument("--price", action="append", help="부품코드별 단가 배수 CODE=배수 (여러 번 지정 가능)")
+    p_sc.add_argument("--material", action="append", help="재질/규격별 단가 배수 재질=배수 (여러 번 지정 가능)")
+    p_sc.add_argument("--loss-rate", dest="loss_rate", type=float, help="자재LOSS율(%%) 일괄 변경")
+    p_sc.add_argument("--car", help="차종")
+    p_sc.add_argument("--company", help="업체")
+    p_sc.add_argument("--from", dest="date_from", help="저장일 시작 (YYYY-MM-DD)")
+    p_sc.add_argument("--to", dest="date_to", help="저장일 종료 (YYYY-MM-DD)")
+    p_sc.add_argument("--format", choices=["table", "csv"], default="table")
+    p_sc.add_argument("--timing", action="store_true", help="소요 시간을 stderr 로 출력")
+    p_sc.set_defaults(func=cmd_scenario)
+
+    p_parts = sub.add_parser("parts", help="부품 마스터 (부품코드별 최신 단가) 관리")
+    p_parts.add_argument("--parts-db", default=PART_MASTER_FILE, help="부품 마스터 DB (기본: %(default)s)")
+    p_parts.add_argument("--store", default=STORE_FILE, help="스냅샷 저장소 DB (기본: %(default)s)")
+    p_parts.add_argument("--import", dest="import_files", action="append", help="단가표 CSV / XLSX (여러 번 지정 가능)")
+    p_parts.add_argument("--rebuild", action="store_true", help="저장된 스냅샷 전체로 다시 갱신")
+    p_parts.add_argument("--search", help="부품코드 앞부분 검색")
+    p_parts.add_argument("--limit", type=int, default=50, help="검색 결과 최대 건수")
+    p_parts.add_argument("--timing", action="store_true", help="소요 시간을 stderr 로 출력")
+    p_parts.set_defaults(func=cmd_parts)
+
+    p_serve = sub.add_parser("serve", help="HTTP JSON API 서버 (산출 / 저장 / 원가계산서 생성)")
+    p_serve.add_argument("--host", default=API_HOST, help="받을 주소 (기본: %(default)s, 외부 공개는 0.0.0.0)")
+    p_serve.add_argument("--port", type=int, default=API_PORT, help="포트 (기본: %(default)s)")
+    p_serve.add_argument("--token", default=os.environ.get("SSEP_API_TOKEN"),
+                         help="요청마다 필요한 Bearer 토큰 (기본: 환경변수 SSEP_API_TOKEN, 없으면 인증 없음)")
+    p_serve.add_argument("--store", default=STORE_FILE, help="스냅샷 저장소 DB (기본: %(default)s)")
+    p_serve.add_argument("--template", default=TEMPLATE_FILE, help="템플릿 파일 (기본: %(default)s)")
+    p_serve.add_argument("--export-cache", default=EXPORT_CACHE_DIR,
+                         help="엑셀 결과 디스크 캐시 폴더 (기본: %(default)s, 빈 값이면 메모리만)")
+    p_serve.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    p_serve.add_argument("--timing", action="store_true", help="소요 시간을 stderr 로 출력")
+    p_serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def cmd_serve(args) -> int:
+    service = ApiService(
+        store=open_store(args.store),
+        template_path=args.template,
+        export_cache=ExportCache(folder=args.export_cache or None),
+    )
+    serve(args.host, args.port, token=args.token, verbose=args.verbose, service=service)
+    return 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    code = args.func(args)
+    if args.timing:
+        print(f"elapsed: {time.perf_counter() - started:.3f}s", file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
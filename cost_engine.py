@@ -0,0 +1,294 @@
+# =========================================================
+# [원가 계산 엔진] 재료비 / 가공비 산출 공식 (UI·엑셀·배치 공용)
+# =========================================================
+# - streamlit 에 의존하지 않는 순수 함수만 둔다.
+# - 입력 테이블을 한 번만 숫자형으로 변환한 뒤 NumPy 배열 연산으로 계산한다.
+# - 여러 견적을 한 테이블로 쌓아(stack) 넘기면 견적별 합계를 한 번에 구한다.
+# - 금액 계산 방식(MONEY_MODE, 환경변수 SSEP_MONEY_MODE)
+#     "float" : float64 그대로 (기본)
+#     "exact" : 금액을 1전(0.01원) 단위 int64 로 반올림해 더한다 (MONEY_ROUNDING 규칙).
+#               행 합계 / 견적 합계 / 화면 합계 / 엑셀 합계가 모두 같은 정수 합으로 맞는다.
+import os
+
+import numpy as np
+import pandas as pd
+
+# 재료비 입력 컬럼 (data_editor / 저장 스냅샷 기준)
+MATERIAL_INPUT_COLS = [
+    "부품명",
+    "부품코드",
+    "U/S",
+    "재질/규격",
+    "단위",
+    "단가",
+    "NET(g,mm)",
+    "SCRAP(g,mm)",
+    "자재LOSS율(%)",
+    "산업폐기물처리비용",
+    "다이캐스팅LOSS인정",
+]
+
+# 가공비 입력 컬럼
+PROCESS_INPUT_COLS = [
+    "부품명",
+    "U/S",
+    "공정명",
+    "사용기계",
+    "인",
+    "공수(SEC)",
+    "준비시간(분)",
+    "산출근거(원/HR)",
+    "여유율(%)",
+]
+
+# 계산 결과 컬럼
+MATERIAL_CALC_COLS = ["금액", "LOSS금액", "재료비"]
+PROCESS_CALC_COLS = ["사용임율", "가공비", "준비시간가공비", "총가공비"]
+
+
+# =========================================================
+# [금액 단위] exact 모드: 1전(0.01원) 단위 int64 고정소수점
+# =========================================================
+MONEY_MODES = ("float", "exact")
+MONEY_MODE = os.environ.get("SSEP_MONEY_MODE", "float")
+MONEY_SCALE = 100  # 1원 = 100전
+# 컬럼별 반올림 단위 (전, 사사오입 - 엑셀 ROUND 와 같이 0.5 는 0 에서 먼 쪽으로)
+#   1 = 0.01원, 10 = 0.1원, 100 = 1원
+#   재료비 = 금액 + LOSS금액 + 산업폐기물처리비용 + 다이캐스팅LOSS인정 (반올림된 값의 정수 합)
+#   총가공비 = 가공비 × (1 + 여유율) 을 반올림한 값 + 준비시간가공비
+MONEY_ROUNDING = {
+    "금액": 1,
+    "LOSS금액": 1,
+    "가공비": 1,
+    "준비시간가공비": 1,
+    "총가공비": 1,
+}
+# float 곱셈 오차 보정 (예: 5215.4865 가 5215.48649999… 로 계산돼 내림되는 것 방지)
+_ULP_FIX = 8 * np.finfo(float).eps
+
+
+def set_money_mode(mode: str):
+    """금액 계산 방식 변경 ("float" / "exact") - 이후 계산부터 적용"""
+    global MONEY_MODE
+    if mode not in MONEY_MODES:
+        raise ValueError(f"알 수 없는 금액 계산 방식: {mode}")
+    MONEY_MODE = mode
+
+
+def money_mode() -> str:
+    return MONEY_MODE
+
+
+def to_money(values, unit: int = 1) -> np.ndarray:
+    """원 단위 float → 전 단위 int64 (unit 전 단위로 사사오입)"""
+    scaled = np.asarray(values, dtype=float) * (MONEY_SCALE / unit)
+    magnitude = np.abs(scaled)
+    rounded = np.floor(magnitude + 0.5 + magnitude * _ULP_FIX)
+    return (np.sign(scaled) * rounded).astype(np.int64) * unit
+
+
+def from_money(money) -> np.ndarray:
+    """전 단위 int64 → 원 단위 float"""
+    return np.asarray(money, dtype=np.int64) / MONEY_SCALE
+
+
+def money_sum(values) -> float:
+    """금액 합계 (exact 모드는 전 단위 정수로 더함)"""
+    values = np.asarray(values, dtype=float)
+    if MONEY_MODE != "exact":
+        return float(values.sum())
+    return int(to_money(values).sum()) / MONEY_SCALE
+
+
+def money_add(a, b) -> np.ndarray:
+    """배열 금액 덧셈 (exact 모드는 전 단위 정수로 더함)"""
+    if MONEY_MODE != "exact":
+        return np.asarray(a, dtype=float) + np.asarray(b, dtype=float)
+    return from_money(to_money(a) + to_money(b))
+
+
+def money_bincount(codes: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """위치(codes)별 금액 합계 n 개 (np.bincount 와 같음, exact 모드는 정수 합)"""
+    if MONEY_MODE != "exact":
+        return np.bincount(codes, weights=values, minlength=n)[:n] if len(codes) else np.zeros(n)
+    if not len(codes):
+        return np.zeros(n)
+    # 정수(전)끼리의 float64 합은 2^53 전(약 90조 원)까지 오차가 없다 → bincount 그대로 사용
+    sums = np.bincount(codes, weights=to_money(values), minlength=n)[:n]
+    return from_money(np.rint(sums).astype(np.int64))
+
+
+def _num(df: pd.DataFrame, col: str, default: float) -> np.ndarray:
+    """컬럼을 float 배열로 변환 (컬럼이 없거나 숫자가 아니면 default)"""
+    if col not in df.columns:
+        return np.full(len(df), default, dtype=float)
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(values), default, values)
+
+
+def material_arrays(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """재료비 입력값을 계산용 배열로 변환 (빈 값 기본값: U/S=1, 나머지=0)"""
+    return {
+        "단가": _num(df, "단가", 0.0),
+        "U/S": _num(df, "U/S", 1.0),
+        "NET(g,mm)": _num(df, "NET(g,mm)", 0.0),
+        "자재LOSS율(%)": _num(df, "자재LOSS율(%)", 0.0),
+        "산업폐기물처리비용": _num(df, "산업폐기물처리비용", 0.0),
+        "다이캐스팅LOSS인정": _num(df, "다이캐스팅LOSS인정", 0.0),
+    }
+
+
+def process_arrays(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """가공비 입력값을 계산용 배열로 변환 (빈 값 기본값: U/S=1, 인=1, 나머지=0)"""
+    return {
+        "U/S": _num(df, "U/S", 1.0),
+        "인": _num(df, "인", 1.0),
+        "공수(SEC)": _num(df, "공수(SEC)", 0.0),
+        "준비시간(분)": _num(df, "준비시간(분)", 0.0),
+        "산출근거(원/HR)": _num(df, "산출근거(원/HR)", 0.0),
+        "여유율(%)": _num(df, "여유율(%)", 0.0),
+    }
+
+
+def material_formula(a: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """재료비 공식
+    - 금액 = 단가 × NET(g,mm) × U/S
+    - LOSS금액 = 금액 × 자재LOSS율(%) / 100
+    - 재료비 = 금액 + LOSS금액 + 산업폐기물처리비용 + 다이캐스팅LOSS인정
+    """
+    amount = a["단가"] * a["NET(g,mm)"] * a["U/S"]
+    if MONEY_MODE == "exact":
+        amount_m = to_money(amount, MONEY_ROUNDING["금액"])
+        loss_m = to_money(from_money(amount_m) * (a["자재LOSS율(%)"] / 100), MONEY_ROUNDING["LOSS금액"])
+        total_m = amount_m + loss_m + to_money(a["산업폐기물처리비용"]) + to_money(a["다이캐스팅LOSS인정"])
+        return {"금액": from_money(amount_m), "LOSS금액": from_money(loss_m), "재료비": from_money(total_m)}
+    loss_amount = amount * (a["자재LOSS율(%)"] / 100)
+    total = amount + loss_amount + a["산업폐기물처리비용"] + a["다이캐스팅LOSS인정"]
+    return {"금액": amount, "LOSS금액": loss_amount, "재료비": total}
+
+
+def process_formula(a: dict[str, np.ndarray], labor_rate) -> dict[str, np.ndarray]:
+    """가공비 공식
+    - 사용임율 = 산출근거(원/HR) > 0 이면 산출근거, 아니면 적용임율
+    - 가공비 = (공수(SEC) / 3600) × 사용임율 × 인 × U/S
+    - 준비시간가공비 = (준비시간(분) / 60) × 사용임율 × 인 × U/S
+    - 총가공비 = 가공비 × (1 + 여유율/100) + 준비시간가공비
+    labor_rate 는 스칼라 또는 행별 배열(견적별 임율을 펼친 값) 모두 가능
+    """
+    basis = a["산출근거(원/HR)"]
+    use_rate = np.where(basis > 0, basis, labor_rate).astype(float)
+    factor = use_rate * a["인"] * a["U/S"]
+    cost = (a["공수(SEC)"] / 3600) * factor
+    prep_cost = (a["준비시간(분)"] / 60) * factor
+    if MONEY_MODE == "exact":
+        cost_m = to_money(cost, MONEY_ROUNDING["가공비"])
+        prep_m = to_money(prep_cost, MONEY_ROUNDING["준비시간가공비"])
+        total_m = to_money(from_money(cost_m) * (1 + a["여유율(%)"] / 100), MONEY_ROUNDING["총가공비"]) + prep_m
+        return {"사용임율": use_rate, "가공비": from_money(cost_m), "준비시간가공비": from_money(prep_m),
+                "총가공비": from_money(total_m)}
+    total = cost * (1 + a["여유율(%)"] / 100) + prep_cost
+    return {"사용임율": use_rate, "가공비": cost, "준비시간가공비": prep_cost, "총가공비": total}
+
+
+def calc_material(df: pd.DataFrame, with_inputs: bool = False) -> pd.DataFrame:
+    """재료비 계산 컬럼(금액, LOSS금액, 재료비) 반환 (입력 인덱스 유지)
+
+    with_inputs=True 이면 숫자형으로 변환된 입력 컬럼도 함께 반환한다.
+    """
+    arrays = material_arrays(df)
+    result = material_formula(arrays)
+    if with_inputs:
+        result = {**arrays, **result}
+    return pd.DataFrame(result, index=df.index)
+
+
+def calc_process(df: pd.DataFrame, labor_rate, with_inputs: bool = False) -> pd.DataFrame:
+    """가공비 계산 컬럼(사용임율, 가공비, 준비시간가공비, 총가공비) 반환 (입력 인덱스 유지)
+
+    with_inputs=True 이면 숫자형으로 변환된 입력 컬럼도 함께 반환한다.
+    """
+    arrays = process_arrays(df)
+    result = process_formula(arrays, labor_rate)
+    if with_inputs:
+        result = {**arrays, **result}
+    return pd.DataFrame(result, index=df.index)
+
+
+# =========================================================
+# [배치] 여러 견적을 쌓은 테이블을 한 번에 계산
+# =========================================================
+def _group_sum(keys: pd.Series, values: np.ndarray) -> pd.Series:
+    """키별 합계 (np.bincount 한 번으로 집계, 키 등장 순서 유지)"""
+    codes, uniques = pd.factorize(keys, sort=False)
+    sums = money_bincount(codes, values, len(uniques))
+    return pd.Series(sums, index=pd.Index(uniques, name=keys.name))
+
+
+def calc_material_batch(df: pd.DataFrame, key: str = "quote_id"):
+    """여러 견적의 재료비 행을 한 번에 계산
+
+    df 는 key 컬럼으로 견적을 구분하는 stacked 테이블.
+    반환: (행별 계산 DataFrame, 견적별 재료비 합계 Series)
+    """
+    rows = calc_material(df)
+    return rows, _group_sum(df[key], rows["재료비"].to_numpy())
+
+
+def calc_process_batch(df: pd.DataFrame, labor_rate, key: str = "quote_id"):
+    """여러 견적의 가공비 행을 한 번에 계산
+
+    labor_rate 는 공통 스칼라 또는 {견적키: 적용임율} 매핑.
+    반환: (행별 계산 DataFrame, 견적별 총가공비 합계 Series)
+    """
+    if isinstance(labor_rate, (dict, pd.Series)):
+        rate = df[key].map(labor_rate).astype(float).fillna(0).to_numpy()
+    else:
+        rate = labor_rate
+    rows = calc_process(df, rate)
+    return rows, _group_sum(df[key], rows["총가공비"].to_numpy())
+
+
+def stack_snapshots(snapshots, part: str, key: str = "quote_id") -> pd.DataFrame:
+    """저장 스냅샷 목록에서 material/process 레코드를 하나의 테이블로 쌓기"""
+    records = []
+    for snap in snapshots:
+        for rec in snap.get(part) or []:
+            row = dict(rec)
+            row[key] = snap.get("id")
+            records.append(row)
+    cols = (MATERIAL_INPUT_COLS if part == "material" else PROCESS_INPUT_COLS) + [key]
+    return pd.DataFrame.from_records(records, columns=cols) if records else pd.DataFrame(columns=cols)
+
+
+def snapshot_labor_rates(snapshots, process: pd.DataFrame, default_labor_rate=0, rate_table=None,
+                         key: str = "quote_id"):
+    """stacked 가공비 행별 기본 임율 (견적별 적용임율, 임율표가 있으면 저장일 기준 기계/공정 임율 우선)
+
+    반환값은 calc_process_batch 의 labor_rate 로 바로 넘길 수 있다.
+    """
+    rates = {s.get("id"): s.get("labor_rate", default_labor_rate) for s in snapshots}
+    if rate_table is None or not len(rate_table) or not len(process):
+        return rates
+    saved = {s.get("id"): str(s.get("saved_at") or "")[:10] or None for s in snapshots}
+    base = process[key].map(rates).astype(float).fillna(0).to_numpy()
+    return rate_table.effective_rates(process, base, process[key].map(saved).to_numpy())
+
+
+def price_snapshots(snapshots, default_labor_rate=0, rate_table=None) -> pd.DataFrame:
+    """저장 스냅샷 여러 건의 재료비/가공비 합계를 한 번에 산출
+
+    rate_table: 임율표(rate_table.RateTable) - 주어지면 견적별 저장일 기준으로 기계/공정 임율을 반영
+    반환 컬럼: id, 재료비합계, 가공비합계, 합계 (입력 순서 유지)
+    """
+    snapshots = list(snapshots)
+    ids = [s.get("id") for s in snapshots]
+
+    _, mat_totals = calc_material_batch(stack_snapshots(snapshots, "material"))
+    process = stack_snapshots(snapshots, "process")
+    _, pro_totals = calc_process_batch(process, snapshot_labor_rates(snapshots, process, default_labor_rate, rate_table))
+
+    result = pd.DataFrame({"id": ids})
+    result["재료비합계"] = result["id"].map(mat_totals).fillna(0.0).astype(float)
+    result["가공비합계"] = result["id"].map(pro_totals).fillna(0.0).astype(float)
+    result["합계"] = money_add(result["재료비합계"], result["가공비합계"])
+    return result
@@ -0,0 +1,158 @@
+# =========================================================
+# [별지 상세내역] 양식 행 수를 넘는 재료비 / 가공비 행 (streamlit 비의존)
+# =========================================================
+# - 원가계산서 양식은 재료비 16행 / 가공비 19행까지만 들어가므로,
+#   넘치는 행은 통합문서 끝에 "상세내역" 시트를 붙여 페이지 단위로 적는다.
+# - 페이지마다 머리글 / (전 페이지 이월) / 데이터 / 소계 / 누계 행을 두고 페이지 나누기를 넣는다.
+# - 행 값은 한 번에 2차원 목록으로 만들어 두고 엔진별로 통째로 쓴다
+#   (openpyxl: ws.append, xml: 시트 XML 문자열 생성) - 수천 행도 셀 단위 기록 없이 처리.
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.pagebreak import Break
+
+from cost_engine import calc_material, calc_process, from_money, money_mode, to_money
+
+DETAIL_SHEET_NAME = "상세내역"
+DETAIL_PAGE_ROWS = 40  # 페이지당 데이터 행 수 (A4 세로 기준)
+LABEL_COL = 1          # 소계 / 누계 / 이월 문구 위치 (0부터, B열)
+
+MATERIAL_DETAIL_COLS = [
+    "No", "부품코드", "부품명", "U/S", "재질/규격", "단위", "단가", "NET(g,mm)", "SCRAP(g,mm)",
+    "자재LOSS율(%)", "산업폐기물처리비용", "다이캐스팅LOSS인정", "금액", "LOSS금액", "재료비",
+]
+PROCESS_DETAIL_COLS = [
+    "No", "부품명", "U/S", "공정명", "사용기계", "인", "공수(SEC)", "준비시간(분)",
+    "산출근거(원/HR)", "여유율(%)", "사용임율", "가공비", "준비시간가공비", "총가공비",
+]
+MATERIAL_SUM_COLS = ["금액", "LOSS금액", "재료비"]
+PROCESS_SUM_COLS = ["가공비", "준비시간가공비", "총가공비"]
+
+DETAIL_COL_WIDTHS = [6, 16, 24, 6, 18, 8, 12, 12, 12, 12, 14, 14, 14, 14, 14]
+
+
+def _text(df: pd.DataFrame, col: str) -> np.ndarray:
+    """텍스트 컬럼 (없거나 빈 값은 "", 엑셀에 쓸 수 없는 문자는 제거)"""
+    if col not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    values = df[col].astype(object).where(df[col].notna(), "").to_numpy(dtype=object)
+    return np.array([ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v for v in values], dtype=object)
+
+
+def _row_numbers(df: pd.DataFrame, numbers) -> np.ndarray:
+    """행별 No (주어지지 않으면 1부터)"""
+    return np.arange(1, len(df) + 1) if numbers is None else np.asarray(numbers)
+
+
+def _material_table(df: pd.DataFrame, numbers=None) -> pd.DataFrame:
+    """재료비 상세 표 (숫자 칸은 계산에 쓴 값 - 빈 값은 기본값으로 채워짐)"""
+    calc = calc_material(df, with_inputs=True)
+    scrap = pd.to_numeric(df["SCRAP(g,mm)"], errors="coerce") if "SCRAP(g,mm)" in df.columns else np.nan
+    table = pd.DataFrame({
+        "No": _row_numbers(df, numbers),
+        "부품코드": _text(df, "부품코드"),
+        "부품명": _text(df, "부품명"),
+        "재질/규격": _text(df, "재질/규격"),
+        "단위": _text(df, "단위"),
+        "SCRAP(g,mm)": np.asarray(scrap, dtype=float) if len(df) else [],
+    }, index=df.index)
+    for col in calc.columns:
+        table[col] = calc[col]
+    return table.reindex(columns=MATERIAL_DETAIL_COLS)
+
+
+def _process_table(df: pd.DataFrame, labor_rate, numbers=None) -> pd.DataFrame:
+    """가공비 상세 표"""
+    calc = calc_process(df, labor_rate, with_inputs=True)
+    table = pd.DataFrame({
+        "No": _row_numbers(df, numbers),
+        "부품명": _text(df, "부품명"),
+        "공정명": _text(df, "공정명"),
+        "사용기계": _text(df, "사용기계"),
+    }, index=df.index)
+    for col in calc.columns:
+        table[col] = calc[col]
+    return table.reindex(columns=PROCESS_DETAIL_COLS)
+
+
+def _section_rows(title: str, table: pd.DataFrame, sum_cols: list, page_rows: int):
+    """표 1개 → (행 목록, 페이지 끝 행 위치 목록(0부터)) - 소계 / 누계는 페이지 단위로 한 번에 계산"""
+    columns = list(table.columns)
+    sum_pos = [columns.index(col) for col in sum_cols]
+    values = table.to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+    data = values.tolist()
+
+    n = len(data)
+    starts = np.arange(0, n, page_rows)
+    amounts = table[sum_cols].to_numpy(dtype=float)
+    if money_mode() == "exact":
+        # 소계 / 누계도 전 단위 정수로 더해 원가계산서 합계와 맞춘다
+        page_cents = np.add.reduceat(to_money(amounts), starts, axis=0) if n else np.zeros((0, len(sum_cols)), dtype=np.int64)
+        page_sums, cum_sums = from_money(page_cents), from_money(np.cumsum(page_cents, axis=0))
+    else:
+        page_sums = np.add.reduceat(amounts, starts, axis=0) if n else np.zeros((0, len(sum_cols)))
+        cum_sums = np.cumsum(page_sums, axis=0)
+
+    def total_row(label, sums):
+        row = [None] * len(columns)
+        row[LABEL_COL] = label
+        for pos, value in zip(sum_pos, sums):
+            row[pos] = float(value)
+        return row
+
+    rows = [[title]]
+    breaks = []
+    for page, start in enumerate(starts):
+        rows.append(columns)
+        if page:
+            rows.append(total_row("전 페이지 이월", cum_sums[page - 1]))
+        rows.extend(data[start: start + page_rows])
+        rows.append(total_row(f"소계 ({page + 1}/{len(starts)} 페이지)", page_sums[page]))
+        rows.append(total_row("누계", cum_sums[page]))
+        breaks.append(len(rows) - 1)
+    return rows, breaks
+
+
+def detail_rows(header: dict, material_over: pd.DataFrame, process_over: pd.DataFrame,
+                material_no=None, process_no=None, page_rows: int = DETAIL_PAGE_ROWS):
+    """상세내역 시트 내용 → (행 목록, 페이지 나누기 행 번호 목록(1부터, 그 행 아래에서 나눔))
+
+    material_over / process_over: 양식에 들어가지 못한 입력 행 (excel_export.fill_sheet 반환값)
+    material_no / process_no: 행별 No (화면 표의 행 번호, 없으면 1부터)
+    """
+    rows = [
+        [f"원가계산서 상세내역 - {header.get('p_no', '')} {header.get('p_name', '')}".strip()],
+        [f"차종: {header.get('car', '')}  업체: {header.get('company', '')}"],
+    ]
+    breaks = []
+    sections = []
+    if material_over is not None and len(material_over):
+        table = _material_table(material_over, material_no)
+        sections.append((f"(1) 재료비 상세내역 ({len(table)}건, 원가계산서 재료비 표에 누계로 반영)",
+                         table, MATERIAL_SUM_COLS))
+    if process_over is not None and len(process_over):
+        table = _process_table(process_over, header.get("labor_rate", 0), process_no)
+        sections.append((f"(2) 가공비 상세내역 ({len(table)}건, 원가계산서 (4)가공비 합계에 포함)",
+                         table, PROCESS_SUM_COLS))
+
+    for title, table, sum_cols in sections:
+        section, section_breaks = _section_rows(title, table, sum_cols, page_rows)
+        offset = len(rows) + 1  # 빈 줄 1개 띄움
+        rows.append([])
+        rows.extend(section)
+        breaks.extend(offset + pos + 1 for pos in section_breaks)
+    return rows, breaks[:-1]  # 마지막 페이지 뒤에는 나누기 없음
+
+
+def write_detail_sheet(wb, rows: list, breaks: list):
+    """openpyxl 통합문서 끝에 상세내역 시트를 추가해 행 단위로 한 번에 기록 (추가한 시트 반환)"""
+    ws = wb.create_sheet(DETAIL_SHEET_NAME)
+    for row in rows:
+        ws.append(row)
+    for r in breaks:
+        ws.row_breaks.append(Break(id=r))
+    for i, width in enumerate(DETAIL_COL_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    return ws
@@ -0,0 +1,303 @@
+# =========================================================
+# [엑셀 생성] 원가계산서 템플릿 채우기 (streamlit 비의존)
+# =========================================================
+from io import BytesIO
+
+import pandas as pd
+
+from cost_engine import calc_material, calc_process, money_sum
+from detail_sheet import DETAIL_SHEET_NAME, detail_rows, write_detail_sheet
+from perf_timing import timed
+from rate_table import get_rate_table
+from template_layout import (
+    TEMPLATE_FILE,
+    MAT_START_ROW,
+    MAT_MAX_ROW,
+    MAT_CARRY_ROW,
+    COL_MAT_AMOUNT,
+    COL_MAT_LOSS_AMOUNT,
+    COL_MAT_DIE_AMOUNT,
+    PRO_START_ROW,
+    PRO_MAX_ROW,
+    COL_PRO_NAME,
+    COL_PRO_US,
+    COL_PRO_PROCESS,
+    COL_PRO_MACH,
+    COL_PRO_MAN,
+    COL_PRO_TIME,
+    COL_PRO_RATE,
+    COL_PRO_AMOUNT1,
+    COL_PRO_BASIS,
+    COL_PRO_PREP,
+    get_template,
+    remember_original,
+)
+from xml_export import XmlPatchError, build_excel_xml
+
+EXPORT_ENGINES = ("openpyxl", "xml")
+# 기본은 xml (수식 셀에 계산 값까지 기록, 처리할 수 없는 템플릿이면 openpyxl 로 대체)
+DEFAULT_ENGINE = "xml"
+
+
+# =========================================================
+# [핵심] 안전하게 엑셀에 값을 넣는 함수
+# =========================================================
+def safe_write(ws, row, col, value):
+    try:
+        remember_original(ws, row, col)
+        cell = ws.cell(row=row, column=col)
+        cell.value = value
+    except AttributeError:
+        pass  # 병합된 셀 에러 무시
+    except Exception:
+        pass
+
+
+# 재료비 행 초기화 값 (텍스트 컬럼은 "", 숫자 컬럼은 None) - 기록 순서 유지
+MAT_BLANKS = [
+    ("code", ""), ("name", ""), ("us", None), ("spec", ""), ("unit", ""), ("price", None),
+    ("net", None), ("scrap", None), ("input", None), ("lossrate", None), ("waste", None), ("die", None),
+]
+
+
+def _write_process_row(ws, target_row, row, proc_name, use_rate, row_total):
+    """가공비 1행 기록 (금액(원/EA)은 화면과 동일한 총가공비)"""
+    safe_write(ws, target_row, COL_PRO_NAME, row.get('부품명', ''))
+    safe_write(ws, target_row, COL_PRO_US, row.get('U/S', 1))
+    safe_write(ws, target_row, COL_PRO_PROCESS, proc_name)
+    safe_write(ws, target_row, COL_PRO_MACH, row.get('사용기계', ''))
+    safe_write(ws, target_row, COL_PRO_MAN, row.get('인', 1))
+    safe_write(ws, target_row, COL_PRO_TIME, row.get('공수(SEC)', 0))
+    safe_write(ws, target_row, COL_PRO_PREP, row.get('준비시간(분)', 0))
+    safe_write(ws, target_row, COL_PRO_BASIS, row.get('산출근거(원/HR)', 0))
+    safe_write(ws, target_row, COL_PRO_RATE, use_rate)
+    safe_write(ws, target_row, COL_PRO_AMOUNT1, row_total)
+
+
+def fill_sheet(ws, layout, header: dict, material_df: pd.DataFrame, process_df: pd.DataFrame):
+    """원가계산서 시트에 기본 정보 / 재료비 / 가공비 기록
+
+    header: p_no, p_name, car, company, labor_rate (+ saved_at: 임율표 적용 기준일, 없으면 오늘)
+    반환: (양식에 들어가지 못한 재료비 행, 가공비 행) - 별지 상세내역(detail_sheet)으로 기록
+    """
+    labor_rate = header.get("labor_rate", 0)
+    rate_table = get_rate_table()
+    mat_cols = layout.mat_cols
+
+    # -------------------------------------------------
+    # [A] 파이썬 기준 가공비 계산 (화면과 동일 로직)
+    # -------------------------------------------------
+    calc_pro = None
+    total_process_cost_excel = 0.0
+    try:
+        if not process_df.empty:
+            rates = labor_rate
+            if rate_table is not None:
+                rates = rate_table.effective_rates(process_df, labor_rate, str(header.get("saved_at") or "")[:10] or None)
+            calc_pro = calc_process(process_df, rates)
+            total_process_cost_excel = money_sum(calc_pro['총가공비'])
+    except Exception:
+        calc_pro = None
+        total_process_cost_excel = 0.0
+
+    def row_values(idx):
+        """행별 (사용임율, 총가공비) - 계산 실패 시 (적용임율, 0)"""
+        if calc_pro is None:
+            return float(labor_rate), 0.0
+        return float(calc_pro.loc[idx, '사용임율']), float(calc_pro.loc[idx, '총가공비'])
+
+    # 1. 기본 정보 입력 (템플릿 라벨 옆 셀)
+    for field, r, c in layout.info_cells:
+        safe_write(ws, r, c, header.get(field, ""))
+
+    # 2. 재료비 입력 (기존 데이터 지우기)
+    for r in range(MAT_START_ROW, MAT_MAX_ROW + 1):
+        for key, blank in MAT_BLANKS:
+            safe_write(ws, r, mat_cols[key], blank)
+
+    # 재료비 데이터 쓰기 (부품명이 있는 행만)
+    if '부품명' in material_df.columns:
+        names = material_df['부품명']
+        material_rows = material_df[names.notna() & names.astype(str).str.strip().ne("")]
+    else:
+        material_rows = material_df.iloc[:0]
+    # 수식(L=H*I, Q=L+N)이 있는 행(MAT_START_ROW ~ MAT_CARRY_ROW-1)보다 많으면
+    # MAT_CARRY_ROW 에 별지 누계 행을 두고 나머지는 상세내역으로 (MAT_MAX_ROW 는 Q 합계 행)
+    material_over = material_rows.iloc[:0]
+    if len(material_rows) > MAT_CARRY_ROW - MAT_START_ROW:
+        material_over = material_rows.iloc[MAT_CARRY_ROW - MAT_START_ROW:]
+        material_rows = material_rows.iloc[: MAT_CARRY_ROW - MAT_START_ROW]
+
+    current_row = MAT_START_ROW
+    for _, row in material_rows.iterrows():
+        # 품번 / 부품명
+        safe_write(ws, current_row, mat_cols["code"], row.get('부품코드', ''))
+        safe_write(ws, current_row, mat_cols["name"], row.get('부품명', ''))
+        # U/S 는 반드시 숫자 (화면의 U/S 값)
+        safe_write(ws, current_row, mat_cols["us"], row.get('U/S', 1))
+        # 재질/규격에는 지금까지 U/S 열에 들어가던 정보를 넣어야 한다고 요청하셨음
+        # 현재 화면 구조상 이 값은 별도 컬럼 '재질/규격' 에 들어있으므로 우선 그 값을 사용
+        # (필요 시 부품코드 등을 추가로 입력 가능)
+        safe_write(ws, current_row, mat_cols["spec"], row.get('재질/규격', ''))
+        # 나머지 단위/단가/NET 등
+        safe_write(ws, current_row, mat_cols["unit"], row.get('단위', 'EA'))
+        safe_write(ws, current_row, mat_cols["price"], row.get('단가', 0))
+        safe_write(ws, current_row, mat_cols["net"], row.get('NET(g,mm)', 0))
+        # SCRAP은 텍스트이므로 숫자 변환 시도
+        scrap_val = row.get('SCRAP(g,mm)', '')
+        scrap_num = pd.to_numeric(scrap_val, errors='coerce')
+        safe_write(ws, current_row, mat_cols["scrap"], scrap_num if pd.notna(scrap_num) else None)
+        # 투입중량은 NET(g,mm)와 동일하게 설정 (엑셀 양식에 따라)
+        safe_write(ws, current_row, mat_cols["input"], row.get('NET(g,mm)', 0))
+        safe_write(ws, current_row, mat_cols["lossrate"], row.get('자재LOSS율(%)', 0))
+        safe_write(ws, current_row, mat_cols["waste"], row.get('산업폐기물처리비용', 0))
+        safe_write(ws, current_row, mat_cols["die"], row.get('다이캐스팅LOSS인정', 0))
+        current_row += 1
+
+    if len(material_over):
+        # 별지 누계 행: 금액 / LOSS금액 / 재료비를 값으로 적어 Q24(=SUM(Q9:Q23)) 에 함께 합산되게 함
+        over_sum = {col: money_sum(values) for col, values in calc_material(material_over).items()}
+        safe_write(ws, MAT_CARRY_ROW, mat_cols["name"], f"이하 별지 '{DETAIL_SHEET_NAME}' {len(material_over)}건 누계")
+        safe_write(ws, MAT_CARRY_ROW, COL_MAT_AMOUNT, float(over_sum['금액']))
+        safe_write(ws, MAT_CARRY_ROW, COL_MAT_LOSS_AMOUNT, float(over_sum['LOSS금액']))
+        safe_write(ws, MAT_CARRY_ROW, COL_MAT_DIE_AMOUNT, float(over_sum['재료비']))
+
+    # 3. 가공비 입력 (기존 데이터 지우기)
+    for r in range(PRO_START_ROW, PRO_MAX_ROW + 1):
+        safe_write(ws, r, COL_PRO_NAME, "")
+        safe_write(ws, r, COL_PRO_US, None)
+        safe_write(ws, r, COL_PRO_PROCESS, "")
+        safe_write(ws, r, COL_PRO_MACH, "")
+        safe_write(ws, r, COL_PRO_MAN, None)
+        safe_write(ws, r, COL_PRO_TIME, None)
+        safe_write(ws, r, COL_PRO_PREP, None)
+        safe_write(ws, r, COL_PRO_BASIS, None)
+        # 임율은 기본값으로 설정
+        safe_write(ws, r, COL_PRO_RATE, labor_rate)
+
+    # 3. 가공비 데이터 쓰기 (행별 금액은 화면에서 계산한 총가공비 사용)
+    placed = {}  # 엑셀 행 → 그 행에 최종으로 적힌 입력 행 인덱스
+    named = []   # 공정명이 있는 입력 행 인덱스
+    if not process_df.empty:
+        for idx, row in process_df.iterrows():
+            proc_name = str(row.get('공정명', '')).strip()
+            if not proc_name:
+                continue
+            named.append(idx)
+
+            # 템플릿 상에서 동일한 공정명을 가진 행을 찾아서 그 위치에 써준다
+            target_row = layout.process_row_map.get(proc_name)
+            if not target_row:
+                # 못 찾으면 해외 가공비 표 안에서 순차 배치 (fallback)
+                for r in range(PRO_START_ROW, PRO_MAX_ROW + 1):
+                    if not ws.cell(row=r, column=COL_PRO_PROCESS).value:
+                        target_row = r
+                        break
+            if not target_row:
+                continue
+
+            _write_process_row(ws, target_row, row, proc_name, *row_values(idx))
+            placed[target_row] = idx
+
+        # -------------------------------------------------
+        # [특수 처리] 국내 가공비 두 행을 템플릿 고정 위치에 강제로 반영
+        #  - 하역/리패킹/검사  → 44행
+        #  - 라벨/포장/출하     → 45행
+        # (화면 값은 맞는데 엑셀에서 해당 행 금액이 표시되지 않는 문제 보완)
+        # -------------------------------------------------
+        try:
+            DOM_START_ROW = 44
+            domestic_names = ["하역/리패킹/검사", "라벨/포장/출하"]
+            for offset, dname in enumerate(domestic_names):
+                mask = process_df.get("공정명", "").astype(str).str.contains(dname)
+                if not mask.any():
+                    continue
+                idx = process_df[mask].index[0]
+                row = process_df.loc[idx]
+                _write_process_row(ws, DOM_START_ROW + offset, row, str(row.get('공정명', '')), *row_values(idx))
+                placed[DOM_START_ROW + offset] = idx
+        except Exception:
+            # 실패해도 전체 생성에는 영향 없게 처리
+            pass
+
+    # 5. 엑셀 하단 (4)가공비 합계를 파이썬에서 계산한 total_process_cost_excel로 덮어쓰기
+    #    템플릿 수식과 파이썬 로직이 다를 수 있으므로, 최종 합계만은 일치시키기 위함
+    if layout.process_total_cell:
+        safe_write(ws, *layout.process_total_cell, total_process_cost_excel)
+
+    # 자리가 없었거나 다른 행에 덮여 시트에 남지 않은 가공비 행 (합계 O48 에는 이미 포함)
+    shown = set(placed.values())
+    process_over = process_df.loc[[idx for idx in named if idx not in shown]]
+    return material_over, process_over
+
+
+def overflow_rows(header: dict, material_df: pd.DataFrame, process_df: pd.DataFrame, overflow):
+    """fill_sheet 가 돌려준 (넘친 재료비, 넘친 가공비) → 상세내역 (행 목록, 페이지 나누기)"""
+    material_over, process_over = overflow
+    return detail_rows(
+        header, material_over, process_over,
+        material_no=material_df.index.get_indexer(material_over.index) + 1,
+        process_no=process_df.index.get_indexer(process_over.index) + 1,
+    )
+
+
+def build_excel(header: dict, material_df: pd.DataFrame, process_df: pd.DataFrame,
+                template_path: str = TEMPLATE_FILE, engine: str = DEFAULT_ENGINE) -> BytesIO:
+    """템플릿을 채운 원가계산서 .xlsx 를 BytesIO 로 반환
+
+    engine="xml" 이면 시트 XML 만 직접 수정한다 (xml_export). 처리할 수 없는 템플릿이면 openpyxl 로 생성.
+    """
+    if engine not in EXPORT_ENGINES:
+        raise ValueError(f"알 수 없는 엑셀 생성 방식: {engine}")
+    with timed("export.total", engine=engine):
+        if engine == "xml":
+            try:
+                return build_excel_xml(header, material_df, process_df, template_path)
+            except XmlPatchError:
+                pass
+        with timed("export.template_load"):
+            template = get_template(template_path)
+        output = BytesIO()
+        with template.checkout() as (wb, ws):
+            with timed("export.cell_writes"):
+                overflow = fill_sheet(ws, template.layout, header, material_df, process_df)
+            detail = None
+            if any(len(part) for part in overflow):
+                with timed("export.detail_sheet"):
+                    detail = write_detail_sheet(wb, *overflow_rows(header, material_df, process_df, overflow))
+            try:
+                with timed("export.save"):
+                    wb.save(output)
+            finally:
+                # 풀에 돌려줄 워크북은 템플릿 시트 구성 그대로 유지
+                if detail is not None:
+                    wb.remove(detail)
+        output.seek(0)
+        return output
+
+
+def snapshot_inputs(snapshot: dict):
+    """저장 스냅샷 → (header, material_df, process_df)"""
+    header = {field: snapshot.get(field, "") for field in ("p_no", "p_name", "car", "company")}
+    header["labor_rate"] = snapshot.get("labor_rate", 0)
+    header["saved_at"] = snapshot.get("saved_at", "")
+    material_df = pd.DataFrame(snapshot.get("material") or [])
+    process_df = pd.DataFrame(snapshot.get("process") or [])
+    return header, material_df, process_df
+
+
+def build_excel_from_snapshot(snapshot: dict, template_path: str = TEMPLATE_FILE,
+                              engine: str = DEFAULT_ENGINE) -> BytesIO:
+    """저장 스냅샷 1건으로 원가계산서 생성"""
+    return build_excel(*snapshot_inputs(snapshot), template_path=template_path, engine=engine)
+
+
+def export_file_name(snapshot: dict, with_id: bool = False) -> str:
+    """다운로드 파일명 (원가계산서_품번_품명[_저장ID].xlsx, 경로 문자 제거)"""
+    parts = [snapshot.get("p_no", ""), snapshot.get("p_name", "")]
+    if with_id:
+        parts.append(snapshot.get("id", ""))
+    name = "_".join(["원가계산서"] + [str(p) for p in parts])
+    for ch in '\\/:*?"<>|':
+        name = name.replace(ch, "_")
+    return f"{name}.xlsx"
@@ -0,0 +1,239 @@
+# =========================================================
+# [엑셀 결과 캐시] 같은 입력이면 만들어 둔 .xlsx 바이트를 그대로 사용 (streamlit 비의존)
+# =========================================================
+# - 키: 입력 전체의 SHA-256
+#   (기본 정보 / 재료비·가공비 행 / 템플릿 파일 해시 / 생성 방식 / 금액 계산 방식 / 임율표 내용과 적용 기준일)
+#   행은 컬럼 이름순, 숫자는 float 로 맞춰서 직렬화 → 표시 형식(1 / 1.0, numpy 타입)이 달라도 같은 키.
+# - 메모리: 최근 사용 순(LRU), 합계 max_bytes 를 넘으면 오래된 것부터 제거 (프로세스 안에서 세션끼리 공유).
+# - 디스크(선택): folder 에 <키>.xlsx 로 보관 → 재시작 / 다른 프로세스도 재사용.
+#   합계 disk_max_bytes 를 넘으면 수정시각(마지막 사용)이 오래된 파일부터 지운다.
+# - hits / misses 등은 stats() 로 확인 (관리자 패널).
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from cost_engine import money_mode
+from excel_export import DEFAULT_ENGINE, build_excel
+from perf_timing import timed
+from rate_table import get_rate_table
+from template_layout import TEMPLATE_FILE, template_digest
+
+# 디스크 캐시 폴더 (빈 값이면 메모리만 사용)
+EXPORT_CACHE_DIR = os.environ.get("SSEP_EXPORT_CACHE_DIR", "export_cache")
+EXPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+EXPORT_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024
+# 키 형식이 바뀌면 올린다 (이전 키와 섞이지 않게)
+KEY_VERSION = 3
+
+
+def _canon(value):
+    """셀 값 → JSON 직렬화용 값 (숫자는 float, 빈 값은 None)"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        if math.isnan(value):
+            return None  # 편집기 / 저장 JSON 의 빈 칸(NaN) 과 API 의 null 은 같은 값
+        return value + 0.0  # -0.0 → 0.0
+    if isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _canon_rows(df) -> dict:
+    """표 → {컬럼: [값, ...]} (컬럼 이름순, 행 순서 유지)"""
+    if df is None:
+        return {}
+    return {str(col): [_canon(v) for v in df[col].tolist()] for col in sorted(df.columns, key=str)}
+
+
+def export_key(header: dict, material_df: pd.DataFrame, process_df: pd.DataFrame,
+               template_path: str = TEMPLATE_FILE, engine: str = DEFAULT_ENGINE) -> str:
+    """build_excel 입력의 내용 해시 (같은 키 = 같은 원가계산서)"""
+    rate_table = get_rate_table()
+    rates = None
+    if rate_table is not None and len(rate_table):
+        # 임율표는 저장일(없으면 오늘) 기준으로 적용되므로 기준일도 키에 포함
+        rates = [rate_table.digest(), str(header.get("saved_at") or "")[:10] or date.today().isoformat()]
+    payload = {
+        "v": KEY_VERSION,
+        "engine": engine,
+        "money": money_mode(),
+        "template": template_digest(template_path),
+        "header": {str(k): _canon(v) for k, v in sorted(header.items(), key=lambda kv: str(kv[0]))},
+        "material": _canon_rows(material_df),
+        "process": _canon_rows(process_df),
+        "rates": rates,
+    }
+    text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ExportCache:
+    """생성한 .xlsx 바이트 캐시 (메모리 LRU + 선택적 디스크)"""
+
+    def __init__(self, max_bytes: int = EXPORT_CACHE_MAX_BYTES, folder: str = EXPORT_CACHE_DIR,
+                 disk_max_bytes: int = EXPORT_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.folder = folder or None
+        self.disk_max_bytes = disk_max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+    # -------------------------------------------------
+    # 메모리
+    # -------------------------------------------------
+    def _remember(self, key: str, data: bytes):
+        """메모리에 넣고 max_bytes 를 넘으면 오래된 것부터 제거 (잠금 안에서 호출)"""
+        if len(data) > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._items[key] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            _, dropped = self._items.popitem(last=False)
+            self._bytes -= len(dropped)
+            self._counts["evictions"] += 1
+
+    # -------------------------------------------------
+    # 디스크
+    # -------------------------------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.xlsx")
+
+    def _disk_files(self) -> list:
+        """[(수정시각, 크기, 경로)] - 폴더가 없으면 빈 목록"""
+        try:
+            entries = list(os.scandir(self.folder))
+        except FileNotFoundError:
+            return []
+        files = []
+        for entry in entries:
+            if not entry.name.endswith(".xlsx"):
+                continue
+            try:
+                st_ = entry.stat()
+            except FileNotFoundError:
+                continue  # 다른 프로세스가 방금 지운 파일
+            files.append((st_.st_mtime_ns, st_.st_size, entry.path))
+        return files
+
+    def _disk_get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # 마지막 사용 시각 = 수정시각 (디스크 LRU 기준)
+        except OSError:
+            pass
+        return data
+
+    def _disk_put(self, key: str, data: bytes):
+        """임시 파일에 쓴 뒤 교체 → 합계가 disk_max_bytes 를 넘으면 오래된 파일 삭제"""
+        os.makedirs(self.folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".export_", suffix=".tmp", dir=self.folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self._counts["disk_evictions"] += 1
+
+    # -------------------------------------------------
+    # 조회 / 저장
+    # -------------------------------------------------
+    def get(self, key: str):
+        """캐시된 바이트 (메모리 → 디스크 순, 없으면 None). 디스크에서 찾으면 메모리에도 올린다."""
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return data
+        data = self._disk_get(key) if self.folder else None
+        with self._lock:
+            if data is None:
+                self._counts["misses"] += 1
+            else:
+                self._counts["disk_hits"] += 1
+                self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._remember(key, data)
+        if self.folder:
+            try:
+                self._disk_put(key, data)
+            except OSError:
+                pass  # 디스크 캐시는 보조 - 실패해도 생성 결과는 그대로 사용
+
+    def clear(self):
+        """메모리 캐시와 디스크 파일 모두 삭제 (통계는 유지)"""
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+        if self.folder:
+            for _, _, path in self._disk_files():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        """적중 / 미적중 건수, 적중률(%), 메모리 / 디스크 보관 건수와 크기"""
+        with self._lock:
+            counts = dict(self._counts)
+            memory_items, memory_bytes = len(self._items), self._bytes
+        disk = self._disk_files() if self.folder else []
+        lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+        return {
+            **counts,
+            "hit_rate(%)": (counts["memory_hits"] + counts["disk_hits"]) / lookups * 100 if lookups else 0.0,
+            "memory_items": memory_items,
+            "memory_bytes": memory_bytes,
+            "disk_items": len(disk),
+            "disk_bytes": sum(size for _, size, _ in disk),
+        }
+
+
+def build_excel_cached(cache: ExportCache, header: dict, material_df: pd.DataFrame, process_df: pd.DataFrame,
+                       template_path: str = TEMPLATE_FILE, engine: str = DEFAULT_ENGINE) -> BytesIO:
+    """excel_export.build_excel 과 같은 결과 - 같은 입력으로 만든 적이 있으면 캐시된 바이트 반환"""
+    with timed("export.cache_key"):
+        key = export_key(header, material_df, process_df, template_path, engine)
+    data = cache.get(key)
+    if data is None:
+        data = build_excel(header, material_df, process_df, template_path=template_path, engine=engine).getvalue()
+        cache.put(key, data)
+    return BytesIO(data)
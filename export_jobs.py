@@ -0,0 +1,214 @@
+# =========================================================
+# [엑셀 생성 작업 큐] 화면 실행 스레드를 막지 않는 백그라운드 생성 (streamlit 비의존)
+# =========================================================
+# - submit() 은 작업을 큐에 넣고 작업 ID 만 바로 돌려준다. 화면은 get(ID) 로 상태를 확인하고
+#   완료되면 결과(바이트)로 다운로드 버튼을 보여준다.
+# - 워커는 프로세스 안의 스레드 workers 개. 템플릿 풀(template_layout) / 결과 캐시(export_cache)를
+#   그대로 같이 쓰므로 프로세스 풀처럼 워커마다 템플릿을 다시 읽지 않는다.
+# - 공정성: 사용자(세션)별 대기열을 돌아가며 1건씩 꺼낸다 → 한 사용자가 여러 건을 넣어도
+#   다른 사용자의 작업이 그 뒤에 밀리지 않는다.
+# - 제한: 전체 대기+실행 max_queued 건, 사용자별 per_user 건. 넘으면 ExportQueueFull.
+# - 시간 제한: 대기 / 실행 합계가 timeout 초를 넘으면 "시간 초과" (스레드는 강제로 멈출 수 없어
+#   실행 중인 작업은 끝까지 돌지만 결과는 버린다).
+#   시간 초과된 작업도 워커 스레드가 돌아올 때까지는 워커 1개를 차지하므로 max_queued / per_user
+#   제한에 계속 센다. 대신 워커를 새로 띄우지는 않는다 - 멈춘 작업이 쌓여도 스레드 수는 workers 개로
+#   고정되고, 그동안 새 작업은 ExportQueueFull 로 거절된다.
+# - 끝난 작업은 keep_seconds 초 동안만 보관.
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+
+from perf_timing import timed
+
+EXPORT_WORKERS = 2
+EXPORT_MAX_QUEUED = 32
+EXPORT_PER_USER = 2
+EXPORT_TIMEOUT = 120.0
+EXPORT_KEEP_SECONDS = 600.0
+
+STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE = "대기", "생성 중", "완료"
+STATUS_FAILED, STATUS_TIMEOUT = "실패", "시간 초과"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+class ExportQueueFull(Exception):
+    """대기 / 실행 중인 작업이 제한을 넘음"""
+
+
+class ExportJob:
+    """작업 1건 (상태 / 결과는 큐의 잠금 안에서만 바뀜)"""
+
+    def __init__(self, owner: str, fn, args: tuple, kwargs: dict, name: str = ""):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.name = name
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.status = STATUS_QUEUED
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.running = False  # 워커 스레드가 fn 을 실행 중 (시간 초과 뒤에도 끝날 때까지 True)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def occupying(self) -> bool:
+        """큐 제한에 세는 작업 (대기 / 실행 중 + 시간 초과됐지만 아직 워커가 실행 중인 작업)"""
+        return self.active or self.running
+
+    def elapsed(self) -> float:
+        """제출 후 경과 시간(초) - 끝난 작업은 끝날 때까지"""
+        return (self.finished_at or time.monotonic()) - self.created_at
+
+
+class ExportJobQueue:
+    """사용자별 공정 순서 + 제한이 있는 백그라운드 작업 큐"""
+
+    def __init__(self, workers: int = EXPORT_WORKERS, max_queued: int = EXPORT_MAX_QUEUED,
+                 per_user: int = EXPORT_PER_USER, timeout: float = EXPORT_TIMEOUT,
+                 keep_seconds: float = EXPORT_KEEP_SECONDS):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.per_user = per_user
+        self.timeout = timeout
+        self.keep_seconds = keep_seconds
+        self._jobs: dict[str, ExportJob] = {}
+        self._waiting = OrderedDict()  # 사용자 → 대기 작업 deque (꺼낼 때마다 사용자를 맨 뒤로)
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+
+    # -------------------------------------------------
+    # 제출 / 조회
+    # -------------------------------------------------
+    def submit(self, owner: str, fn, *args, name: str = "", **kwargs) -> str:
+        """작업 등록 → 작업 ID (제한 초과 시 ExportQueueFull)"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("작업 큐가 종료되었습니다.")
+            self._expire()
+            occupying = [job for job in self._jobs.values() if job.occupying]
+            if len(occupying) >= self.max_queued:
+                raise ExportQueueFull(f"생성 대기 중인 작업이 많습니다 ({len(occupying)}건). 잠시 후 다시 시도해주세요.")
+            if sum(job.owner == owner for job in occupying) >= self.per_user:
+                raise ExportQueueFull(f"이미 진행 중인 작업이 {self.per_user}건 있습니다. 끝난 뒤 다시 시도해주세요.")
+            job = ExportJob(owner, fn, args, kwargs, name=name)
+            self._jobs[job.id] = job
+            self._waiting.setdefault(owner, deque()).append(job)
+            self._start_workers()
+            self._cond.notify()
+        return job.id
+
+    def get(self, job_id: str):
+        """작업 조회 (없거나 보관 시간이 지났으면 None)"""
+        with self._cond:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def waiting_ahead(self, job_id: str) -> int:
+        """이 작업보다 먼저 실행될 대기 작업 수 (사용자별로 1건씩 돌아가며 꺼내는 순서 그대로)"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != STATUS_QUEUED:
+                return 0
+            queues = list(self._waiting.values())
+            ahead, turn = 0, 0
+            while True:
+                for jobs in queues:
+                    if turn < len(jobs):
+                        if jobs[turn] is job:
+                            return ahead
+                        ahead += 1
+                turn += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._expire()
+            counts = {status: 0 for status in (*ACTIVE_STATUSES, STATUS_DONE, STATUS_FAILED, STATUS_TIMEOUT)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            busy = sum(job.running for job in self._jobs.values())
+            return {**counts, "workers": self.workers, "busy": busy, "users": len(self._waiting)}
+
+    def shutdown(self, wait: bool = True):
+        """새 작업을 받지 않고 워커 종료 (대기 작업은 버림)"""
+        with self._cond:
+            self._closed = True
+            self._waiting.clear()
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    # -------------------------------------------------
+    # 내부 (잠금 안에서 호출)
+    # -------------------------------------------------
+    def _start_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"export-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _expire(self):
+        """시간 초과 표시 + 보관 시간이 지난 작업 삭제"""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.active and now - job.created_at > self.timeout:
+                if job.status == STATUS_QUEUED:
+                    self._waiting[job.owner].remove(job)
+                    if not self._waiting[job.owner]:
+                        del self._waiting[job.owner]
+                job.status, job.finished_at = STATUS_TIMEOUT, now
+                job.error = f"{self.timeout:.0f}초 안에 끝나지 않았습니다."
+            elif not job.occupying and now - job.finished_at > self.keep_seconds:
+                del self._jobs[job_id]
+
+    def _next_job(self):
+        """다음 작업 (맨 앞 사용자의 첫 작업, 그 사용자는 맨 뒤로)"""
+        owner, jobs = self._waiting.popitem(last=False)
+        job = jobs.popleft()
+        if jobs:
+            self._waiting[owner] = jobs
+        return job
+
+    # -------------------------------------------------
+    # 워커
+    # -------------------------------------------------
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._waiting and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._expire()
+                if not self._waiting:
+                    continue
+                job = self._next_job()
+                job.status, job.started_at = STATUS_RUNNING, time.monotonic()
+                job.running = True
+
+            result, error = None, None
+            try:
+                with timed("export.job"):
+                    result = job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                error = f"{e}\n\n{traceback.format_exc()}"
+
+            with self._cond:
+                job.fn = job.args = job.kwargs = None  # 입력 표는 더 이상 붙잡지 않음
+                job.running = False
+                if job.status != STATUS_RUNNING:
+                    continue  # 그 사이 시간 초과 처리됨 → 결과 버림
+                job.finished_at = time.monotonic()
+                if error is None:
+                    job.status, job.result = STATUS_DONE, result
+                else:
+                    job.status, job.error = STATUS_FAILED, error
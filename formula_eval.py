@@ -0,0 +1,627 @@
+# =========================================================
+# [수식 계산] 템플릿 시트 수식을 파이썬에서 계산 (streamlit 비의존)
+# =========================================================
+# - 템플릿 시트의 수식을 한 번만 해석(compile)해서 셀 의존 그래프와 계산 순서(위상 정렬)를 만든다.
+# - 템플릿 원래 값으로 한 번 전체 계산해 두고(base), 엑셀 생성 때는 fill_sheet 가 쓴 셀에서
+#   이어지는 수식 셀만 다시 계산한다 (SheetCalc.set).
+# - 결과는 xml_export 가 수식 셀의 캐시 값(<v>)으로 적는다 → 엑셀로 열지 않아도
+#   pandas / openpyxl(data_only) / 미리보기에서 합계가 보이고, 서버도 시트의 합계를 읽을 수 있다.
+# - 지원: 사칙연산 / ^ / % / & / 비교, 같은 시트의 셀·범위 참조,
+#   SUM PRODUCT MIN MAX AVERAGE COUNT ROUND ROUNDUP ROUNDDOWN ABS IF IFERROR AND OR NOT
+#   그 밖의 수식(다른 시트 / 이름 정의 / 배열 / 모르는 함수, 순환 참조)과 그 셀을 참조하는 수식은
+#   값을 알 수 없음(UNKNOWN)으로 두고, 엑셀이 열 때 계산한다 (fullCalcOnLoad 는 그대로 유지).
+import math
+import re
+from collections import deque
+from datetime import date, datetime, time
+from decimal import ROUND_DOWN, ROUND_HALF_UP, ROUND_UP, Decimal
+
+from openpyxl.formula.tokenizer import Token, Tokenizer, TokenizerError
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+# 범위 1개에서 펼칠 최대 셀 수 (A:A 같은 열 전체 참조는 계산하지 않음)
+MAX_RANGE_CELLS = 10000
+
+_REF_RE = re.compile(r"^\$?([A-Z]{1,3})\$?(\d+)$")
+
+
+class ExcelError:
+    """엑셀 오류 값 (#DIV/0! 등)"""
+
+    __slots__ = ("code",)
+
+    def __init__(self, code: str):
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __repr__(self):
+        return self.code
+
+    __str__ = __repr__
+
+
+DIV0, VALUE, NUM, NA = ExcelError("#DIV/0!"), ExcelError("#VALUE!"), ExcelError("#NUM!"), ExcelError("#N/A")
+# 계산할 수 없는 셀의 값 (엑셀이 계산)
+UNKNOWN = object()
+
+
+class FormulaError(Exception):
+    """지원하지 않는 수식 (해석 단계)"""
+
+
+class _Raise(Exception):
+    """계산 중 오류 값 전달 (IFERROR 에서 잡힘)"""
+
+    def __init__(self, error: ExcelError):
+        self.error = error
+
+
+class _Unknown(Exception):
+    """값을 알 수 없는 셀을 참조함 (IFERROR 로도 잡지 않음)"""
+
+
+def cell_key(ref: str):
+    """"$A$1" → (행, 열)"""
+    m = _REF_RE.match(ref.upper())
+    if not m:
+        raise FormulaError(f"셀 참조가 아닙니다: {ref}")
+    return int(m.group(2)), column_index_from_string(m.group(1))
+
+
+def cell_ref(key) -> str:
+    """(행, 열) → "A1" """
+    return f"{get_column_letter(key[1])}{key[0]}"
+
+
+# =========================================================
+# [1] 값 변환 (엑셀 규칙)
+# =========================================================
+def normalize(value):
+    """셀에 적힌 값 → 계산용 값 (빈 값 None / float / str / bool / ExcelError)"""
+    kind = type(value)
+    if kind is float:
+        return value if value == value else None
+    if kind is str:
+        return value or None
+    if value is None or isinstance(value, (ExcelError, bool, str)):
+        return None if value == "" else value
+    if isinstance(value, (datetime, date, time)):
+        return float(to_excel(value))
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if number != number:
+        return None  # NaN 은 빈 셀로 기록됨 (xml_export._cell_xml)
+    return number
+
+
+def _number(value) -> float:
+    """산술 연산용 숫자 (빈 값 0, TRUE 1, 숫자 모양 문자열은 숫자, 나머지 #VALUE!)"""
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, float):
+        return value
+    if isinstance(value, ExcelError):
+        raise _Raise(value)
+    try:
+        return float(value.strip())
+    except ValueError:
+        raise _Raise(VALUE)
+
+
+def _text(value) -> str:
+    """& 연결용 문자열"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else format(value, ".15g")
+    if isinstance(value, ExcelError):
+        raise _Raise(value)
+    return value
+
+
+def _truth(value) -> bool:
+    if isinstance(value, str):
+        upper = value.upper()
+        if upper not in ("TRUE", "FALSE"):
+            raise _Raise(VALUE)
+        return upper == "TRUE"
+    return _number(value) != 0
+
+
+def _result(value):
+    """수식 결과 정리 (빈 참조 → 0, inf / NaN → #NUM!, -0.0 → 0.0)"""
+    if value is None:
+        return 0.0
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return NUM
+        return value + 0.0
+    return value
+
+
+# =========================================================
+# [2] 연산자 / 함수
+# =========================================================
+def _divide(a, b):
+    b = _number(b)
+    if b == 0:
+        raise _Raise(DIV0)
+    return _number(a) / b
+
+
+def _power(a, b):
+    try:
+        result = _number(a) ** _number(b)
+    except (OverflowError, ZeroDivisionError):
+        raise _Raise(NUM)
+    if isinstance(result, complex):
+        raise _Raise(NUM)
+    return result
+
+
+def _compare_key(value):
+    """비교 순서: 숫자 < 문자 < 논리값 (문자는 대소문자 무시)"""
+    if isinstance(value, ExcelError):
+        raise _Raise(value)
+    if value is None:
+        return (0, 0.0)
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, str):
+        return (1, value.lower())
+    return (0, value)
+
+
+def _comparison(op):
+    def compare(a, b):
+        # 빈 셀은 상대 값의 종류에 맞춰 0 / "" / FALSE 로 본다
+        if a is None:
+            a = "" if isinstance(b, str) else (False if isinstance(b, bool) else a)
+        if b is None:
+            b = "" if isinstance(a, str) else (False if isinstance(a, bool) else b)
+        ka, kb = _compare_key(a), _compare_key(b)
+        return {"=": ka == kb, "<>": ka != kb, "<": ka < kb, ">": ka > kb, "<=": ka <= kb, ">=": ka >= kb}[op]
+    return compare
+
+
+BINARY_OPS = {
+    "+": lambda a, b: _number(a) + _number(b),
+    "-": lambda a, b: _number(a) - _number(b),
+    "*": lambda a, b: _number(a) * _number(b),
+    "/": _divide,
+    "^": _power,
+    "&": lambda a, b: _text(a) + _text(b),
+    **{op: _comparison(op) for op in ("=", "<>", "<", ">", "<=", ">=")},
+}
+# 우선순위 (높을수록 먼저) - 단항 -, % 는 이보다 먼저 묶인다
+PRECEDENCE = {"=": 1, "<>": 1, "<": 1, ">": 1, "<=": 1, ">=": 1, "&": 2, "+": 3, "-": 3, "*": 4, "/": 4, "^": 5}
+
+
+def _numbers(args) -> list:
+    """집계 함수 인수 → 숫자 목록 (범위 / 셀 참조 안의 문자 / 논리값 / 빈 셀은 제외, 오류는 전달)
+
+    args: [(참조 여부, 값 목록 또는 값)]
+    """
+    numbers = []
+    for is_reference, value in args:
+        if is_reference:
+            for v in value:
+                if isinstance(v, ExcelError):
+                    raise _Raise(v)
+                if isinstance(v, float):
+                    numbers.append(v)
+        elif value is not None:
+            numbers.append(_number(value))
+    return numbers
+
+
+def _round_with(mode):
+    def round_fn(value, digits=0.0):
+        number, digits = _number(value), int(_number(digits))
+        quantum = Decimal(1).scaleb(-digits)
+        return float(Decimal(repr(number)).quantize(quantum, rounding=mode))
+    return round_fn
+
+
+def _average(numbers):
+    if not numbers:
+        raise _Raise(DIV0)
+    return sum(numbers) / len(numbers)
+
+
+def _product(numbers):
+    return math.prod(numbers) if numbers else 0.0
+
+
+# 집계 함수: 숫자 목록 → 값
+AGGREGATES = {
+    "SUM": lambda numbers: float(sum(numbers)),  # 엑셀과 같이 앞에서부터 차례로 더함
+    "PRODUCT": _product,
+    "MIN": lambda numbers: min(numbers, default=0.0),
+    "MAX": lambda numbers: max(numbers, default=0.0),
+    "AVERAGE": _average,
+    "COUNT": lambda numbers: float(len(numbers)),
+}
+# 일반 함수: 값 인수 → 값 (인수 개수 범위)
+SCALAR_FUNCTIONS = {
+    "ROUND": (_round_with(ROUND_HALF_UP), 1, 2),
+    "ROUNDUP": (_round_with(ROUND_UP), 1, 2),
+    "ROUNDDOWN": (_round_with(ROUND_DOWN), 1, 2),
+    "ABS": (lambda value: abs(_number(value)), 1, 1),
+    "NOT": (lambda value: not _truth(value), 1, 1),
+}
+
+
+# =========================================================
+# [3] 수식 해석 → 계산 함수
+# =========================================================
+class _Parser:
+    """토큰 목록 → 계산 함수 fn(get) (get: 셀 키 → 값) + 참조 셀 집합"""
+
+    def __init__(self, formula: str):
+        try:
+            tokens = Tokenizer(formula).items
+        except TokenizerError as e:
+            raise FormulaError(str(e))
+        self.tokens = [t for t in tokens if t.type != Token.WSPACE]
+        self.pos = 0
+        self.refs = set()
+
+    def parse(self):
+        fn = self._expr(0)
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"해석할 수 없는 토큰: {self.tokens[self.pos].value}")
+        if getattr(fn, "is_range", False):
+            raise FormulaError("범위 자체를 값으로 쓰는 수식은 지원하지 않습니다.")
+        return fn
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self):
+        token = self._peek()
+        if token is None:
+            raise FormulaError("수식이 끝나지 않았습니다.")
+        self.pos += 1
+        return token
+
+    def _scalar(self, fn):
+        if getattr(fn, "is_range", False):
+            raise FormulaError("범위는 함수 인수로만 쓸 수 있습니다.")
+        return fn
+
+    def _expr(self, min_prec: int):
+        left = self._unary()
+        while True:
+            token = self._peek()
+            if token is None or token.type != Token.OP_IN or token.value not in PRECEDENCE:
+                if token is not None and token.type == Token.OP_IN:
+                    raise FormulaError(f"지원하지 않는 연산자: {token.value}")
+                return left
+            prec = PRECEDENCE[token.value]
+            if prec < min_prec:
+                return left
+            self.pos += 1
+            right = self._expr(prec + 1)
+            left = self._binary(token.value, self._scalar(left), self._scalar(right))
+
+    @staticmethod
+    def _binary(op, left, right):
+        apply = BINARY_OPS[op]
+        return lambda get: apply(left(get), right(get))
+
+    def _unary(self):
+        token = self._peek()
+        if token is not None and token.type == Token.OP_PRE:
+            self.pos += 1
+            operand = self._scalar(self._unary())
+            if token.value == "-":
+                return lambda get: -_number(operand(get))
+            return operand
+        fn = self._primary()
+        while (token := self._peek()) is not None and token.type == Token.OP_POST:
+            self.pos += 1
+            fn = self._percent(self._scalar(fn))
+        return fn
+
+    @staticmethod
+    def _percent(fn):
+        return lambda get: _number(fn(get)) / 100
+
+    def _primary(self):
+        token = self._take()
+        if token.type == Token.OPERAND:
+            return self._operand(token)
+        if token.type == Token.PAREN and token.subtype == Token.OPEN:
+            fn = self._expr(0)
+            close = self._take()
+            if close.type != Token.PAREN or close.subtype != Token.CLOSE:
+                raise FormulaError("괄호가 닫히지 않았습니다.")
+            return fn
+        if token.type == Token.FUNC and token.subtype == Token.OPEN:
+            return self._function(token.value[:-1].upper().removeprefix("_XLFN."))
+        raise FormulaError(f"지원하지 않는 토큰: {token.value}")
+
+    def _operand(self, token):
+        value = token.value
+        if token.subtype == Token.NUMBER:
+            number = float(value)
+            return lambda get: number
+        if token.subtype == Token.TEXT:
+            text = value[1:-1].replace('""', '"')
+            return lambda get: text
+        if token.subtype == Token.LOGICAL:
+            flag = value.upper() == "TRUE"
+            return lambda get: flag
+        if token.subtype == Token.ERROR:
+            error = ExcelError(value.upper())
+            return lambda get: error
+        if "!" in value:
+            raise FormulaError(f"다른 시트 참조는 지원하지 않습니다: {value}")
+        if ":" in value:
+            first, last = value.split(":", 1)
+            (r1, c1), (r2, c2) = cell_key(first), cell_key(last)
+            r1, r2, c1, c2 = min(r1, r2), max(r1, r2), min(c1, c2), max(c1, c2)
+            if (r2 - r1 + 1) * (c2 - c1 + 1) > MAX_RANGE_CELLS:
+                raise FormulaError(f"범위가 너무 큽니다: {value}")
+            keys = tuple((r, c) for r in range(r1, r2 + 1) for c in range(c1, c2 + 1))
+            self.refs.update(keys)
+
+            def read_range(get):
+                return [get(key) for key in keys]
+            read_range.is_range = True
+            return read_range
+        try:
+            key = cell_key(value)
+        except FormulaError:
+            raise FormulaError(f"이름 정의 참조는 지원하지 않습니다: {value}")
+        self.refs.add(key)
+
+        def read_cell(get):
+            return get(key)
+        read_cell.cell = key
+        return read_cell
+
+    @staticmethod
+    def _as_range(fn):
+        def read_range(get):
+            return [fn(get)]
+        read_range.is_range = True
+        return read_range
+
+    def _arguments(self) -> list:
+        """함수 인수 목록 (빈 인수는 None)"""
+        args = []
+        current = None
+        while True:
+            token = self._peek()
+            if token is None:
+                raise FormulaError("함수 괄호가 닫히지 않았습니다.")
+            if token.type == Token.FUNC and token.subtype == Token.CLOSE:
+                self.pos += 1
+                if current is not None or args:
+                    args.append(current)
+                return args
+            if token.type == Token.SEP and token.subtype == Token.ARG:
+                self.pos += 1
+                args.append(current)
+                current = None
+                continue
+            if current is not None:
+                raise FormulaError(f"인수 사이에 구분자가 없습니다: {token.value}")
+            current = self._expr(0)
+
+    def _function(self, name: str):
+        if name not in AGGREGATES and name not in SCALAR_FUNCTIONS and name not in ("IFERROR", "IF", "AND", "OR"):
+            raise FormulaError(f"지원하지 않는 함수: {name}")
+        args = self._arguments()
+        blank = lambda get: None  # noqa: E731 - 빈 인수
+        args = [blank if fn is None else fn for fn in args]
+
+        if name in AGGREGATES:
+            aggregate = AGGREGATES[name]
+            # 셀 참조 1개도 범위처럼 다룬다 (SUM(A1) 에서 A1 이 문자면 무시)
+            readers = [fn if getattr(fn, "is_range", False) or not hasattr(fn, "cell") else self._as_range(fn)
+                       for fn in args]
+            flagged = [(getattr(fn, "is_range", False), fn) for fn in readers]
+            return lambda get: aggregate(_numbers([(is_reference, fn(get)) for is_reference, fn in flagged]))
+
+        args = [self._scalar(fn) for fn in args]
+        if name == "IFERROR" and len(args) == 2:
+            value, fallback = args
+
+            def iferror(get):
+                try:
+                    result = value(get)
+                except _Raise:
+                    return fallback(get)
+                return fallback(get) if isinstance(result, ExcelError) else result
+            return iferror
+        if name == "IF" and 2 <= len(args) <= 3:
+            cond, then = args[0], args[1]
+            otherwise = args[2] if len(args) == 3 else (lambda get: False)
+            return lambda get: then(get) if _truth(cond(get)) else otherwise(get)
+        if name in ("AND", "OR") and args:
+            combine = all if name == "AND" else any
+            return lambda get: combine([_truth(fn(get)) for fn in args])
+        if name in SCALAR_FUNCTIONS:
+            apply, low, high = SCALAR_FUNCTIONS[name]
+            if not low <= len(args) <= high:
+                raise FormulaError(f"{name} 인수 개수가 맞지 않습니다.")
+            return lambda get: apply(*[fn(get) for fn in args])
+        raise FormulaError(f"{name} 인수 개수가 맞지 않습니다.")
+
+
+def compile_formula(formula: str):
+    """"=..." 수식 → (계산 함수, 참조 셀 키 집합). 지원하지 않으면 FormulaError"""
+    parser = _Parser(formula)
+    return parser.parse(), parser.refs
+
+
+# =========================================================
+# [4] 의존 그래프 / 계산
+# =========================================================
+class FormulaGraph:
+    """시트 1개의 수식 의존 그래프 (템플릿당 1회 생성, 여러 스레드가 읽기만 함)
+
+    cells: {(행, 열): 값} - "=" 로 시작하는 문자열은 수식
+    unsupported: {(행, 열): 이유} - 해석하지 않고 UNKNOWN 으로 둘 수식 셀
+    """
+
+    def __init__(self, cells: dict, unsupported: dict = None):
+        self.constants = {}
+        self.formulas = {}      # 셀 → 계산 함수
+        self.precedents = {}    # 셀 → 참조 셀 집합
+        self.unsupported = dict(unsupported or {})  # 셀 → 이유
+        for key, value in cells.items():
+            if isinstance(value, str) and value.startswith("="):
+                try:
+                    self.formulas[key], self.precedents[key] = compile_formula(value)
+                except FormulaError as e:
+                    self.unsupported[key] = str(e)
+            elif not isinstance(value, str) or value:
+                self.constants[key] = normalize(value)
+
+        self.dependents = {}
+        for key, refs in self.precedents.items():
+            for ref in refs:
+                self.dependents.setdefault(ref, []).append(key)
+        self.order = self._topological_order()
+        self.rank = {key: i for i, key in enumerate(self.order)}
+        self._base = SheetCalc(self)
+
+    @classmethod
+    def from_worksheet(cls, ws):
+        """openpyxl 워크시트 → 그래프 (배열 수식 등 문자열이 아닌 수식은 지원하지 않음)"""
+        cells, unsupported = {}, {}
+        for key, cell in ws._cells.items():
+            value = cell.value
+            if value is None:
+                continue
+            if cell.data_type == "f" and not isinstance(value, str):
+                unsupported[key] = f"배열 / 데이터 표 수식: {type(value).__name__}"
+            elif cell.data_type == "e":
+                cells[key] = ExcelError(str(value))
+            else:
+                cells[key] = value
+        return cls(cells, unsupported)
+
+    def _topological_order(self) -> list:
+        """계산 순서 (참조하는 셀이 먼저). 순환 참조에 걸린 셀은 unsupported 로 옮긴다."""
+        waiting = {key: sum(ref in self.formulas for ref in refs) for key, refs in self.precedents.items()}
+        ready = deque(sorted(key for key, n in waiting.items() if n == 0))
+        order = []
+        while ready:
+            key = ready.popleft()
+            order.append(key)
+            for dep in self.dependents.get(key, ()):
+                waiting[dep] -= 1
+                if waiting[dep] == 0:
+                    ready.append(dep)
+        for key in self.formulas.keys() - set(order):
+            self.unsupported[key] = "순환 참조"
+            del self.formulas[key]
+        return order
+
+    def base(self) -> "SheetCalc":
+        """템플릿 원래 값으로 전체 계산한 결과 (그래프를 만들 때 한 번 계산, 직접 바꾸지 말 것)"""
+        return self._base
+
+    def recalculate(self, changes: dict) -> "SheetCalc":
+        """템플릿에 changes {(행, 열): 값} 을 쓴 결과 - 바뀐 셀에서 이어지는 수식만 다시 계산"""
+        calc = self.base().copy()
+        calc.set(changes)
+        return calc
+
+
+class SheetCalc:
+    """시트 값 상태 1개 (입력 + 수식 결과). set() 으로 입력을 바꾸면 영향받는 수식만 다시 계산"""
+
+    def __init__(self, graph: FormulaGraph, _copy_from=None):
+        self.graph = graph
+        if _copy_from is not None:
+            self.values = dict(_copy_from.values)
+            self.overridden = set(_copy_from.overridden)
+            self.recalculated = 0
+            return
+        self.values = dict(graph.constants)
+        self.values.update((key, UNKNOWN) for key in graph.unsupported)
+        self.overridden = set()  # 값으로 덮어써서 수식이 사라진 셀
+        self.recalculated = 0
+        for key in graph.order:
+            self._evaluate(key)
+
+    def copy(self) -> "SheetCalc":
+        return SheetCalc(self.graph, _copy_from=self)
+
+    def _get(self, key):
+        value = self.values.get(key)
+        if value is UNKNOWN:
+            raise _Unknown()
+        return value
+
+    def _evaluate(self, key):
+        try:
+            value = _result(self.graph.formulas[key](self._get))
+        except _Raise as e:
+            value = e.error
+        except _Unknown:
+            value = UNKNOWN
+        except (ArithmeticError, ValueError):
+            value = NUM
+        self.values[key] = value
+        self.recalculated += 1
+
+    def set(self, changes: dict) -> int:
+        """셀 값 변경 {(행, 열): 값} → 다시 계산한 수식 셀 수
+
+        수식 셀에 값을 쓰면 그 셀은 값으로 바뀐다 (openpyxl / xml_export 와 같음).
+        """
+        graph = self.graph
+        values = self.values
+        dirty, queue = set(), deque()
+        formulas, dependents = graph.formulas, graph.dependents
+        for key, value in changes.items():
+            value = normalize(value)
+            if key in formulas or key in graph.unsupported:
+                self.overridden.add(key)
+            elif key not in dependents:
+                values[key] = value  # 참조하는 수식이 없는 셀
+                continue
+            else:
+                old = values.get(key)
+                if old is value or (type(old) is type(value) and old == value):
+                    continue  # 값이 그대로면 다시 계산할 것 없음
+            values[key] = value
+            queue.append(key)
+        while queue:
+            for dep in graph.dependents.get(queue.popleft(), ()):
+                if dep not in dirty and dep not in self.overridden and dep in graph.formulas:
+                    dirty.add(dep)
+                    queue.append(dep)
+        before = self.recalculated
+        for key in sorted(dirty, key=graph.rank.__getitem__):
+            self._evaluate(key)
+        return self.recalculated - before
+
+    def value(self, ref):
+        """셀 값 ("A1" 또는 (행, 열)) - 계산할 수 없으면 UNKNOWN"""
+        return self.values.get(cell_key(ref) if isinstance(ref, str) else ref)
+
+    def formula_values(self) -> dict:
+        """남아 있는 수식 셀의 값 {(행, 열): 값 / UNKNOWN}"""
+        graph = self.graph
+        keys = [key for key in (*graph.formulas, *graph.unsupported) if key not in self.overridden]
+        return {key: self.values.get(key) for key in keys}
@@ -0,0 +1,109 @@
+# =========================================================
+# [증분 계산] data_editor 편집분만 다시 계산 (streamlit 비의존)
+# =========================================================
+# - 마지막으로 계산한 입력 / 행별 결과 / 합계를 기억해 두고,
+#   바뀐 행만 cost_engine 공식으로 다시 계산한 뒤 합계는 차이만큼 보정한다.
+# - 바뀐 행은 data_editor 의 편집 상태(edited_rows / added_rows / deleted_rows)로 알 수 있으면 그것을 쓰고,
+#   모르면(저장 견적 불러오기 등으로 표가 통째로 바뀐 경우) 이전 입력과 행 단위로 비교한다.
+import numpy as np
+import pandas as pd
+
+from cost_engine import money_sum
+
+
+def editor_changes(state, n_rows: int):
+    """data_editor 편집 상태 → 다시 계산할 행 위치 집합 (행 삭제 등으로 알 수 없으면 None)
+
+    state: st.session_state[<editor key>] ({"edited_rows": {...}, "added_rows": [...], "deleted_rows": [...]})
+    n_rows: 편집기에 넘긴 표의 행 수
+    """
+    if not isinstance(state, dict) or state.get("deleted_rows"):
+        return None
+    try:
+        rows = {int(r) for r in state.get("edited_rows", {})}
+    except (TypeError, ValueError):
+        return None
+    rows.update(range(n_rows, n_rows + len(state.get("added_rows", []))))
+    return rows
+
+
+def _changed_rows(old: pd.DataFrame, new: pd.DataFrame) -> np.ndarray:
+    """같은 위치끼리 비교해 값이 달라진 행 위치 (NaN 끼리는 같은 값으로 봄)"""
+    n = min(len(old), len(new))
+    a = old.iloc[:n].to_numpy(dtype=object)
+    b = new.iloc[:n].to_numpy(dtype=object)
+    same = (a == b) | (pd.isna(a) & pd.isna(b))
+    changed = np.flatnonzero(~same.all(axis=1))
+    return np.concatenate([changed, np.arange(n, len(new))])
+
+
+class IncrementalCalc:
+    """입력 표 1개에 대한 행별 계산 결과 / 합계 메모 (세션 상태에 1개씩 보관)
+
+    calc_fn(df) 는 df 와 같은 인덱스의 계산 결과 DataFrame 을 돌려주는 행 단위 계산
+    (cost_engine.calc_material 등). total_cols 는 합계를 유지할 컬럼.
+    """
+
+    def __init__(self, calc_fn, input_cols, total_cols):
+        self.calc_fn = calc_fn
+        self.input_cols = list(input_cols)
+        self.total_cols = list(total_cols)
+        self.reset()
+
+    def reset(self):
+        self.inputs = None
+        self._last = None
+        self.context = None
+        self.results: dict[str, np.ndarray] = {}
+        self.totals = {col: 0.0 for col in self.total_cols}
+
+    def _frame(self, index) -> pd.DataFrame:
+        return pd.DataFrame(self.results, index=index)
+
+    def _full(self, df: pd.DataFrame, context):
+        calc = self.calc_fn(df, context) if context is not None else self.calc_fn(df)
+        self.results = {col: calc[col].to_numpy(dtype=float, copy=True) for col in calc.columns}
+        self.totals = {col: money_sum(self.results[col]) for col in self.total_cols}
+
+    def update(self, df: pd.DataFrame, rows=None, base=None, context=None) -> pd.DataFrame:
+        """df 의 계산 결과 (df 와 같은 인덱스)
+
+        rows: base 대비 바뀌었을 수 있는 행 위치 (editor_changes 결과)
+        base: 편집기에 넘긴 원래 표. 마지막으로 계산한 표가 아니면 rows 를 무시하고 직접 비교한다.
+        context: 모든 행에 영향을 주는 값 (가공비의 적용임율 등). 바뀌면 전체 재계산.
+        """
+        if df is self.inputs and context == self.context:
+            return self._frame(df.index)
+
+        inputs = df.reindex(columns=self.input_cols)
+        if self.inputs is None or context != self.context:
+            self._full(inputs, context)
+        else:
+            old = self._last
+            if rows is None or base is not self.inputs:
+                changed = _changed_rows(old, inputs)
+            else:
+                changed = np.array(sorted(r for r in rows if 0 <= r < len(inputs)), dtype=int)
+            if len(inputs) < len(old):
+                # 줄어든 행은 합계에서 빼고 잘라낸다
+                for col in self.total_cols:
+                    self.totals[col] = money_sum([self.totals[col], -money_sum(self.results[col][len(inputs):])])
+                self.results = {col: values[: len(inputs)] for col, values in self.results.items()}
+            elif len(inputs) > len(old):
+                grow = len(inputs) - len(old)
+                self.results = {col: np.concatenate([values, np.zeros(grow)]) for col, values in self.results.items()}
+
+            if len(changed):
+                part = inputs.iloc[changed]
+                calc = self.calc_fn(part, context) if context is not None else self.calc_fn(part)
+                for col in calc.columns:
+                    new_values = calc[col].to_numpy(dtype=float)
+                    if col in self.totals:
+                        delta = money_sum(new_values) - money_sum(self.results[col][changed])
+                        self.totals[col] = money_sum([self.totals[col], delta])
+                    self.results[col][changed] = new_values
+
+        self.inputs = df
+        self._last = inputs
+        self.context = context
+        return self._frame(df.index)
@@ -0,0 +1,264 @@
+# =========================================================
+# [부품 마스터] 부품코드별 최신 단가 / 재질·규격 / 단위 (SQLite, streamlit 비의존)
+# =========================================================
+# - 부품코드가 기본키(인덱스)라 코드 1건 조회 / 접두어 검색(범위 조회)이 인덱스로 끝난다.
+# - 저장된 스냅샷(재료비 표)과 단가표 파일(CSV / XLSX)에서 만든다.
+#   같은 부품코드는 기준일(스냅샷 저장일시 / 단가표 적용일)이 가장 늦은 값만 남긴다.
+# - BOM 전체 재단가 / 빈 칸 자동 채우기는 BOM 의 부품코드를 한 번에 조회한 뒤
+#   pandas reindex(부품코드 기준 조인) 한 번으로 처리한다 (행마다 조회하지 않음).
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cost_engine import stack_snapshots
+from sqlite_db import connect, enable_wal
+
+PART_MASTER_FILE = "part_master.db"
+LOOKUP_CHUNK = 500  # IN (...) 한 번에 넣는 부품코드 수
+
+# 마스터 컬럼 ↔ 재료비 입력 컬럼
+PART_FIELDS = [("name", "부품명"), ("spec", "재질/규격"), ("unit", "단위"), ("price", "단가")]
+# 자동 채우기 대상 (비어 있는 칸만)
+AUTOFILL_FIELDS = [("spec", "재질/규격"), ("unit", "단위"), ("price", "단가")]
+
+# 단가표 파일 헤더 → 마스터 컬럼 (앞쪽 이름 우선)
+PRICE_LIST_HEADERS = {
+    "code": ["부품코드", "품번", "코드", "code"],
+    "name": ["부품명", "품명", "name"],
+    "spec": ["재질/규격", "재질", "규격", "spec"],
+    "unit": ["단위", "unit"],
+    "price": ["단가", "price"],
+    "updated_at": ["적용일", "기준일", "date"],
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    code       TEXT PRIMARY KEY,
+    name       TEXT,
+    spec       TEXT,
+    unit       TEXT,
+    price      REAL,
+    updated_at TEXT,
+    source     TEXT
+) WITHOUT ROWID
+"""
+
+# 기준일이 같거나 늦은 값만 덮어쓴다 (오래된 스냅샷 / 단가표로 최신 단가가 되돌아가지 않게)
+# 부품명 / 재질·규격 / 단위가 빈 값이면 기존 값 유지 (단가만 있는 단가표 등)
+_UPSERT = """
+INSERT INTO parts (code, name, spec, unit, price, updated_at, source) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(code) DO UPDATE SET
+    name = COALESCE(NULLIF(excluded.name, ''), parts.name),
+    spec = COALESCE(NULLIF(excluded.spec, ''), parts.spec),
+    unit = COALESCE(NULLIF(excluded.unit, ''), parts.unit),
+    price = excluded.price,
+    updated_at = excluded.updated_at, source = excluded.source
+WHERE excluded.updated_at >= parts.updated_at
+"""
+
+
+def normalize_codes(values) -> pd.Series:
+    """부품코드 정규화 (앞뒤 공백 제거, 빈 값은 NaN)"""
+    codes = pd.Series(values, dtype=object).where(pd.notna(values), "").astype(str).str.strip()
+    return codes.where(codes != "", np.nan)
+
+
+def _is_blank(series: pd.Series) -> np.ndarray:
+    text = series.astype(object).where(series.notna(), "").astype(str).str.strip()
+    return (series.isna() | (text == "")).to_numpy()
+
+
+def _codes_changed(old: pd.DataFrame, new: pd.DataFrame) -> np.ndarray:
+    """행 위치별로 부품코드가 이전 표와 다른지 (이전 표에 없던 행은 True)"""
+    new_codes = normalize_codes(new["부품코드"]).to_numpy()
+    old_codes = np.full(len(new), np.nan, dtype=object)
+    if "부품코드" in old.columns:
+        n = min(len(old), len(new))
+        old_codes[:n] = normalize_codes(old["부품코드"]).to_numpy()[:n]
+    return ~((old_codes == new_codes) | (pd.isna(old_codes) & pd.isna(new_codes)))
+
+
+def _latest_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    """부품코드별 기준일이 가장 늦은 행 (같으면 뒤쪽 행)"""
+    rows = rows.assign(code=normalize_codes(rows["code"]))
+    rows = rows[rows["code"].notna() & pd.to_numeric(rows["price"], errors="coerce").notna()]
+    rows = rows.assign(price=pd.to_numeric(rows["price"], errors="coerce"))
+    return rows.sort_values("updated_at", kind="stable").drop_duplicates("code", keep="last")
+
+
+class PartMaster:
+    """부품코드 → 최신 단가 / 재질·규격 / 단위 카탈로그"""
+
+    def __init__(self, path: str = PART_MASTER_FILE):
+        self.path = path
+        enable_wal(self.path)
+        with connect(self.path, write=True) as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self, write: bool = False):
+        """연결 1개 (sqlite_db.connect - write=True 이면 쓰기 잠금)"""
+        return connect(self.path, write=write)
+
+    # -------------------------------------------------
+    # 등록
+    # -------------------------------------------------
+    def upsert_rows(self, rows: pd.DataFrame, source: str = "") -> int:
+        """rows(code, name, spec, unit, price, updated_at) 를 부품코드별 최신값으로 반영 → 반영 대상 건수"""
+        latest = _latest_rows(rows)
+        if latest.empty:
+            return 0
+        values = latest.reindex(columns=["code", "name", "spec", "unit", "price", "updated_at"])
+        for col in ("name", "spec", "unit"):
+            values[col] = values[col].astype(object).where(values[col].notna(), "").astype(str).str.strip()
+        values["updated_at"] = values["updated_at"].astype(str)
+        params = [(*row, source) for row in values.itertuples(index=False, name=None)]
+        with self._connect(write=True) as conn:
+            conn.executemany(_UPSERT, params)
+        return len(params)
+
+    def update_from_snapshots(self, snapshots) -> int:
+        """저장 스냅샷들의 재료비 행으로 갱신 (기준일 = 저장일시)"""
+        snapshots = list(snapshots)
+        saved_at = {snap.get("id"): snap.get("saved_at", "") for snap in snapshots}
+        stacked = stack_snapshots(snapshots, "material")
+        if stacked.empty:
+            return 0
+        rows = pd.DataFrame({
+            "code": stacked["부품코드"],
+            **{field: stacked[col] for field, col in PART_FIELDS},
+            "updated_at": stacked["quote_id"].map(saved_at).fillna(""),
+        })
+        return self.upsert_rows(rows, source="snapshot")
+
+    def import_price_list(self, source, name: str = None) -> int:
+        """단가표 파일(CSV / XLSX) 가져오기 - 부품코드 / 단가 필수, 적용일이 없으면 오늘 날짜
+
+        source: 파일 경로 또는 파일 객체 (업로드 파일은 name 에 파일명)
+        """
+        name = name or str(source)
+        if name.lower().endswith((".xlsx", ".xlsm")):
+            table = pd.read_excel(source, dtype={"부품코드": str, "품번": str})
+        else:
+            table = pd.read_csv(source, dtype={"부품코드": str, "품번": str}, encoding="utf-8-sig")
+        columns = {str(c).strip(): c for c in table.columns}
+        rows = {}
+        for field, names in PRICE_LIST_HEADERS.items():
+            found = next((columns[name] for name in names if name in columns), None)
+            if found is not None:
+                rows[field] = table[found]
+        if "code" not in rows or "price" not in rows:
+            raise ValueError(f"{name}: '부품코드' 와 '단가' 컬럼이 필요합니다.")
+        rows = pd.DataFrame(rows)
+        today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if "updated_at" in rows:
+            dates = pd.to_datetime(rows["updated_at"], errors="coerce")
+            rows["updated_at"] = dates.dt.strftime("%Y-%m-%d %H:%M:%S").fillna(today)
+        else:
+            rows["updated_at"] = today
+        return self.upsert_rows(rows, source=os.path.basename(name))
+
+    # -------------------------------------------------
+    # 조회
+    # -------------------------------------------------
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM parts").fetchone()[0]
+
+    def get(self, code: str):
+        """부품코드 1건 (없으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM parts WHERE code = ?", (str(code).strip(),)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, prefix: str, limit: int = 50) -> list[dict]:
+        """부품코드 접두어 검색 (기본키 범위 조회, 코드순)"""
+        prefix = str(prefix).strip()
+        if not prefix:
+            return []
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM parts WHERE code >= ? AND code < ? ORDER BY code LIMIT ?", (prefix, upper, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def lookup(self, codes) -> pd.DataFrame:
+        """부품코드 여러 건 → 부품코드 인덱스 DataFrame (name, spec, unit, price, updated_at)"""
+        unique = list(pd.unique(normalize_codes(codes).dropna()))
+        rows = []
+        with self._connect() as conn:
+            for start in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[start: start + LOOKUP_CHUNK]
+                rows.extend(conn.execute(
+                    f"SELECT code, name, spec, unit, price, updated_at FROM parts WHERE code IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        cols = ["code", "name", "spec", "unit", "price", "updated_at"]
+        return pd.DataFrame([tuple(row) for row in rows], columns=cols).set_index("code")
+
+    def _join(self, df: pd.DataFrame) -> pd.DataFrame:
+        """df 행 순서대로 맞춘 마스터 값 (모르는 부품코드는 NaN)"""
+        codes = normalize_codes(df["부품코드"])
+        return self.lookup(codes).reindex(codes.to_numpy())
+
+    # -------------------------------------------------
+    # BOM 적용
+    # -------------------------------------------------
+    def autofill(self, df: pd.DataFrame, rows=None, previous: pd.DataFrame = None):
+        """비어 있는 재질/규격 / 단위 / 단가를 마스터 최신값으로 채움 → (새 DataFrame, 채운 칸 수)
+
+        rows: 채울 행 위치 (None 이면 전체). 입력한 값은 덮어쓰지 않는다.
+        previous: 편집 전 표. 주어지면 부품코드가 바뀌었거나 새로 추가된 행만 채운다
+            (부품코드는 그대로인데 비어 있는 칸은 사용자가 지운 것이므로 다시 채우지 않음).
+        """
+        if df.empty or "부품코드" not in df.columns or (rows is not None and not rows):
+            return df, 0
+        master = self._join(df)
+        target = np.ones(len(df), dtype=bool) if rows is None else np.isin(np.arange(len(df)), list(rows))
+        if previous is not None:
+            target &= _codes_changed(previous, df)
+        result, filled = df.copy(), 0
+        for field, col in AUTOFILL_FIELDS:
+            known = ~_is_blank(master[field])
+            blank = _is_blank(df[col]) if col in df.columns else np.ones(len(df), dtype=bool)
+            mask = target & known & blank
+            if not mask.any():
+                continue
+            if col not in result.columns:
+                result[col] = None
+            if field != "price" and result[col].dtype != object:
+                result[col] = result[col].astype(object)  # 빈 텍스트 컬럼이 float(NaN) 인 경우
+            result.loc[result.index[mask], col] = master[field].to_numpy()[mask]
+            filled += int(mask.sum())
+        return result, filled
+
+    def reprice(self, df: pd.DataFrame):
+        """BOM 전체 단가를 마스터 최신 단가로 교체 → (새 DataFrame, 단가가 바뀐 행 수)"""
+        if df.empty or "부품코드" not in df.columns:
+            return df, 0
+        new_price = self._join(df)["price"].to_numpy(dtype=float)
+        old_price = pd.to_numeric(df["단가"], errors="coerce").to_numpy(dtype=float) if "단가" in df.columns \
+            else np.full(len(df), np.nan)
+        changed = ~np.isnan(new_price) & ~np.isclose(old_price, new_price)
+        result = df.copy()
+        if changed.any():
+            if "단가" not in result.columns:
+                result["단가"] = np.nan
+            result.loc[result.index[changed], "단가"] = new_price[changed]
+        return result, int(changed.sum())
+
+
+def open_part_master(path: str = PART_MASTER_FILE, store=None, batch_size: int = 500) -> PartMaster:
+    """부품 마스터 열기 (비어 있으면 store 의 저장 스냅샷으로 처음 채움 - batch_size 건씩)"""
+    master = PartMaster(path)
+    if store is not None and master.count() == 0:
+        batch = []
+        for snapshot in store.iter_find():
+            batch.append(snapshot)
+            if len(batch) >= batch_size:
+                master.update_from_snapshots(batch)
+                batch = []
+        master.update_from_snapshots(batch)
+    return master
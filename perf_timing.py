@@ -0,0 +1,129 @@
+# =========================================================
+# [성능 계측] 구간별 소요 시간 기록 (streamlit 비의존)
+# =========================================================
+# - with timed("구간명"): ... 으로 감싼 구간의 소요 시간을
+#   1) 프로세스 전체 통계 (PROCESS_STATS)
+#   2) 현재 세션 통계 (bind_session() 으로 지정, Streamlit 실행 스레드마다 따로)
+#   3) JSONL 로그 파일 (PERF_LOG_FILE, 끄려면 환경변수 SSEP_PERF_LOG="")
+#   에 함께 남긴다.
+# - 통계는 구간별 최근 WINDOW 건만 보관해서 백분위수(p50/p90/p99)를 계산한다.
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+PERF_LOG_FILE = os.environ.get("SSEP_PERF_LOG", "perf_log.jsonl")
+PERF_LOG_MAX_BYTES = 10 * 1024 * 1024  # 넘으면 .1 로 옮기고 새 파일
+WINDOW = 1000
+
+
+class TimingStats:
+    """구간별 소요 시간 통계 (최근 WINDOW 건 + 누적 건수/합계)"""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+        self._count: dict[str, int] = {}
+        self._total: dict[str, float] = {}
+
+    def add(self, section: str, ms: float):
+        with self._lock:
+            if section not in self._samples:
+                self._samples[section] = deque(maxlen=self.window)
+                self._count[section] = 0
+                self._total[section] = 0.0
+            self._samples[section].append(ms)
+            self._count[section] += 1
+            self._total[section] += ms
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._count.clear()
+            self._total.clear()
+
+    def summary(self) -> list[dict]:
+        """구간별 요약 (건수, 마지막, p50/p90/p99, 최대, 누적) - 구간명 순"""
+        with self._lock:
+            snapshot = {name: (list(s), self._count[name], self._total[name]) for name, s in self._samples.items()}
+        import numpy as np  # 관리자 패널에서만 필요 - 로그인 화면에서 numpy 를 올리지 않음
+
+        rows = []
+        for name in sorted(snapshot):
+            samples, count, total = snapshot[name]
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+            rows.append({
+                "section": name,
+                "count": count,
+                "last_ms": samples[-1],
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": max(samples),
+                "total_ms": total,
+            })
+        return rows
+
+
+PROCESS_STATS = TimingStats()
+
+# 현재 실행(스레드/컨텍스트)의 세션 통계와 세션 식별자
+_session = contextvars.ContextVar("perf_session", default=(None, None))
+_log_lock = threading.Lock()
+
+
+def bind_session(stats: TimingStats, session_id: str = None):
+    """이후 timed() 기록을 이 세션 통계에도 남기도록 지정 (Streamlit 스크립트 실행 시작 시 호출)"""
+    _session.set((stats, session_id))
+
+
+def _write_log(record: dict):
+    if not PERF_LOG_FILE:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    try:
+        with _log_lock:
+            if os.path.exists(PERF_LOG_FILE) and os.path.getsize(PERF_LOG_FILE) > PERF_LOG_MAX_BYTES:
+                os.replace(PERF_LOG_FILE, PERF_LOG_FILE + ".1")
+            with open(PERF_LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError:
+        pass  # 로그 실패가 화면 / 엑셀 생성에 영향을 주지 않게
+
+
+def record(section: str, ms: float, **extra):
+    """소요 시간 1건 기록 (timed() 를 쓸 수 없는 곳에서 직접 호출)"""
+    PROCESS_STATS.add(section, ms)
+    stats, session_id = _session.get()
+    if stats is not None:
+        stats.add(section, ms)
+    _write_log({
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "section": section,
+        "ms": round(ms, 3),
+        "session": session_id,
+        "pid": os.getpid(),
+        **extra,
+    })
+
+
+@contextmanager
+def timed(section: str, **extra):
+    """with timed("export.save"): ... - 예외가 나도 기록 (error=True)"""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        if error:
+            extra = {**extra, "error": True}
+        record(section, ms, **extra)
@@ -0,0 +1,148 @@
+# =========================================================
+# [리비전 비교] 같은 품번의 저장 스냅샷 N건 비교 (streamlit 비의존)
+# =========================================================
+# - 재료비 행은 부품코드(없으면 부품명), 가공비 행은 부품명 + 공정명으로 맞춘다.
+#   한 리비전 안에 같은 키가 여러 번 나오면 나온 순서대로 "#2", "#3" 을 붙여 구분.
+# - 모든 리비전의 행을 한 테이블로 쌓아(cost_engine.stack_snapshots) 한 번에 계산한 뒤
+#   (키 × 리비전) 으로 펼쳐서 행별 / 합계 증감을 배열 연산으로 구한다.
+# - 증감 기준은 첫 리비전(저장일 순서) → 마지막 리비전, 직전 리비전 대비 증감은 합계 표에 둔다.
+import numpy as np
+import pandas as pd
+
+from cost_engine import calc_material, calc_process, money_add, money_sum, snapshot_labor_rates, stack_snapshots
+
+KEY = "quote_id"
+# 파트별 (비교 금액 컬럼, 변경 항목으로 보여줄 입력 컬럼)
+DIFF_PARTS = {
+    "material": ("재료비", ["U/S", "단가", "NET(g,mm)", "자재LOSS율(%)", "산업폐기물처리비용", "다이캐스팅LOSS인정"]),
+    "process": ("총가공비", ["U/S", "인", "공수(SEC)", "준비시간(분)", "사용임율", "여유율(%)"]),
+}
+PART_LABELS = {"material": "재료비", "process": "가공비"}
+STATUS_ADDED, STATUS_REMOVED, STATUS_CHANGED, STATUS_SAME = "추가", "삭제", "변경", "동일"
+
+
+def _text(series: pd.Series) -> pd.Series:
+    return series.where(series.notna(), "").astype(str).str.strip()
+
+
+def _row_keys(df: pd.DataFrame, part: str) -> tuple[pd.Series, pd.Series]:
+    """행 맞춤 키 / 표시 이름 (같은 리비전 안의 중복 키는 순번 부여)"""
+    name = _text(df["부품명"])
+    if part == "material":
+        code = _text(df["부품코드"])
+        key = code.where(code != "", "품명:" + name)
+        label = name.where(code == "", name + " (" + code + ")")
+    else:
+        process = _text(df["공정명"])
+        key = name + " / " + process
+        label = key
+    occurrence = key.groupby([df[KEY], key]).cumcount()
+    suffix = ("#" + (occurrence + 1).astype(str)).where(occurrence > 0, "")
+    return key + suffix, label + suffix
+
+
+class QuoteDiff:
+    """스냅샷 N건 비교 결과
+
+    revisions: 차수별 id / 저장일시 / 이름 / 재료비·가공비 합계 / 첫 리비전·직전 대비 증감
+    rows[part]: 키별 행 (리비전별 금액 컬럼 = revisions 의 차수 라벨, 증감, 상태, 변경 항목)
+    """
+
+    def __init__(self, snapshots, rate_table=None):
+        snapshots = sorted(snapshots, key=lambda s: (str(s.get("saved_at") or ""), str(s.get("id"))))
+        if not snapshots:
+            raise ValueError("비교할 스냅샷이 없습니다.")
+        self.snapshots = snapshots
+        self.labels = [f"{i}차" for i in range(1, len(snapshots) + 1)]
+        self._label_of = {str(s.get("id")): label for s, label in zip(snapshots, self.labels)}
+        self.rows = {part: self._part_rows(part, rate_table) for part in DIFF_PARTS}
+        self.revisions = self._revisions()
+
+    def _calc(self, part: str, rate_table) -> pd.DataFrame:
+        """모든 리비전의 행을 쌓아 한 번에 계산 (숫자형 입력 + 계산 컬럼)"""
+        stacked = stack_snapshots(self.snapshots, part, key=KEY)
+        stacked[KEY] = stacked[KEY].astype(str)
+        if part == "material":
+            calc = calc_material(stacked, with_inputs=True)
+            text_cols = ["부품명", "부품코드"]
+        else:
+            rates = snapshot_labor_rates(self.snapshots, stacked, rate_table=rate_table, key=KEY)
+            if isinstance(rates, dict):
+                rates = stacked[KEY].map({str(k): v for k, v in rates.items()}).astype(float).fillna(0).to_numpy()
+            calc = calc_process(stacked, rates, with_inputs=True)
+            text_cols = ["부품명", "공정명"]
+        return pd.concat([stacked[[KEY] + text_cols], calc], axis=1)
+
+    def _part_rows(self, part: str, rate_table) -> pd.DataFrame:
+        amount, inputs = DIFF_PARTS[part]
+        calc = self._calc(part, rate_table)
+        keys, names = _row_keys(calc, part)
+        calc = calc.assign(키=keys.to_numpy(), 항목=names.to_numpy())
+        calc = calc[~((calc[amount] == 0) & (_text(calc["부품명"]) == ""))]
+        calc["차수"] = calc[KEY].map(self._label_of)
+
+        # (키 × 차수) 로 펼치기 - 금액 / 입력값을 한 번에
+        wide = calc.set_index(["키", "차수"])[[amount] + inputs].unstack("차수")
+        wide = wide.reindex(columns=pd.MultiIndex.from_product([[amount] + inputs, self.labels]))
+        present = wide[amount].notna().to_numpy()
+        values = wide[amount].fillna(0.0).to_numpy(dtype=float)
+
+        rows = pd.DataFrame(values, index=wide.index, columns=self.labels)
+        rows.insert(0, "항목", calc.drop_duplicates("키").set_index("키")["항목"].reindex(wide.index))
+        delta = values[:, -1] - values[:, 0]
+        rows["증감"] = delta
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rows["증감률(%)"] = np.where(values[:, 0] != 0, delta / values[:, 0] * 100, np.nan)
+
+        # 상태: 첫 리비전에 없던 행 = 추가, 마지막 리비전에 없는 행 = 삭제, 금액 / 입력값이 바뀐 행 = 변경
+        status = np.full(len(rows), STATUS_SAME, dtype=object)
+        status[~present[:, 0] & present[:, -1]] = STATUS_ADDED
+        status[present[:, 0] & ~present[:, -1]] = STATUS_REMOVED
+        changed = ~np.isclose(delta, 0)
+        changed_cols = np.full(len(rows), "", dtype=object)
+        first, last = self.labels[0], self.labels[-1]
+        for col in inputs:
+            diff = ~np.isclose(wide[(col, first)].to_numpy(dtype=float), wide[(col, last)].to_numpy(dtype=float), equal_nan=True)
+            changed |= diff
+            changed_cols[diff] = [f"{names}, {col}" if names else col for names in changed_cols[diff]]
+        status[(status == STATUS_SAME) & changed] = STATUS_CHANGED
+        rows["상태"] = status
+        rows["변경항목"] = np.where(status == STATUS_CHANGED, changed_cols, "")
+        return rows.reset_index(drop=True)
+
+    def _revisions(self) -> pd.DataFrame:
+        revisions = pd.DataFrame({
+            "차수": self.labels,
+            "저장ID": [str(s.get("id")) for s in self.snapshots],
+            "저장일시": [s.get("saved_at", "") for s in self.snapshots],
+            "이름": [s.get("name", "") for s in self.snapshots],
+        })
+        for part, col in (("material", "재료비합계"), ("process", "가공비합계")):
+            revisions[col] = [money_sum(self.rows[part][label]) for label in self.labels]
+        revisions["합계"] = money_add(revisions["재료비합계"], revisions["가공비합계"])
+        total = revisions["합계"].to_numpy(dtype=float)
+        revisions["첫 리비전 대비"] = total - total[0]
+        revisions["직전 대비"] = np.diff(total, prepend=total[:1])
+        return revisions
+
+    def drivers(self, top: int = 10) -> pd.DataFrame:
+        """첫 리비전 → 마지막 리비전 증감이 큰 행 (재료비 / 가공비 통합, 절대값 순)
+
+        비중(%): 전체 증감 대비 그 행의 증감
+        """
+        frames = [
+            self.rows[part][["항목", "증감", "상태", "변경항목"]].assign(구분=PART_LABELS[part])
+            for part in DIFF_PARTS
+        ]
+        rows = pd.concat(frames, ignore_index=True)
+        rows = rows[~np.isclose(rows["증감"].to_numpy(dtype=float), 0)]
+        total = float(self.revisions["첫 리비전 대비"].iloc[-1])
+        order = np.argsort(-rows["증감"].abs().to_numpy(), kind="stable")[:top]
+        rows = rows.iloc[order].reset_index(drop=True)
+        rows["비중(%)"] = rows["증감"] / total * 100 if total else np.nan
+        return rows[["구분", "항목", "상태", "증감", "비중(%)", "변경항목"]]
+
+
+def compare_snapshots(snapshots, rate_table=None) -> QuoteDiff:
+    """저장 스냅샷 여러 건(보통 같은 품번의 리비전) 비교 - 저장일시 순서로 1차, 2차 … 를 붙인다"""
+    return QuoteDiff(list(snapshots), rate_table=rate_table)
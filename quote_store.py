@@ -0,0 +1,375 @@
+# =========================================================
+# [저장소] 산출 결과(스냅샷) SQLite 저장소
+# =========================================================
+# - 저장 1건 = INSERT 1회 (전체 파일 재작성 없음)
+# - id 조회 / 품번(p_no)·차종(car)·업체(company) 조회는 인덱스 사용
+# - 목록 페이지는 seq 기준 keyset (OFFSET 없음), 조건별 건수는 마지막 seq 와 함께 캐시
+#   (append 전용이므로 마지막 seq 가 같으면 건수도 같다)
+# - 검색어(search)는 앞뒤 % LIKE 라 인덱스를 쓰지 못하고 quotes 메타 테이블을 훑는다 (본문 테이블은 읽지 않음).
+#   페이지 조회는 최신 seq 부터 읽다가 page_size 건을 찾으면 멈추지만, 건수는 메타 테이블 전체를 훑는다.
+# - 목록용 메타(quotes, 합계 포함)와 material/process 본문(quote_payloads)을 나눠 저장한다.
+# - 기존 saved_results.json 은 migrate_from_json() 으로 한 번에 옮긴다.
+# - 여러 사용자 / 프로세스가 동시에 저장해도 되도록 sqlite_db 의 WAL / busy_timeout / BEGIN IMMEDIATE 연결을 쓴다
+#   (쓰기 잠금 안에서 id 확인 ~ INSERT 를 하므로 다른 저장과 겹치지 않음).
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from cost_engine import price_snapshots
+from rate_table import get_rate_table
+from sqlite_db import connect, enable_wal
+
+STORE_FILE = "saved_results.db"
+LEGACY_JSON_FILE = "saved_results.json"
+
+# 목록/검색에 쓰는 메타 컬럼 (material/process 본문 제외, 합계는 저장 시 미리 계산)
+META_COLS = [
+    "id", "saved_at", "name", "p_no", "p_name", "car", "company", "labor_rate",
+    "material_total", "process_total", "total",
+]
+# 검색어 부분 일치 대상 컬럼
+SEARCH_COLS = ["p_no", "p_name", "car", "company", "name"]
+# 최근에 연 스냅샷 본문을 메모리에 두는 건수
+PAYLOAD_CACHE_SIZE = 32
+# 조건별 건수 캐시 크기
+COUNT_CACHE_SIZE = 64
+
+# 스키마 버전 (PRAGMA user_version) - 1: quotes(메타 + 합계) / quote_payloads(본문)
+# 이전 저장 형식은 saved_results.json 뿐이므로 DB 스키마 업그레이드는 아직 없다 (JSON 은 migrate_from_json).
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    seq            INTEGER PRIMARY KEY AUTOINCREMENT,
+    id             TEXT NOT NULL,
+    saved_at       TEXT,
+    name           TEXT,
+    p_no           TEXT,
+    p_name         TEXT,
+    car            TEXT,
+    company        TEXT,
+    labor_rate     REAL,
+    material_total REAL,
+    process_total  REAL,
+    total          REAL
+);
+CREATE TABLE IF NOT EXISTS quote_payloads (
+    seq  INTEGER PRIMARY KEY REFERENCES quotes(seq),
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS store_info (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quotes_id ON quotes(id);
+CREATE INDEX IF NOT EXISTS idx_quotes_p_no ON quotes(p_no);
+CREATE INDEX IF NOT EXISTS idx_quotes_car ON quotes(car);
+CREATE INDEX IF NOT EXISTS idx_quotes_company ON quotes(company);
+CREATE INDEX IF NOT EXISTS idx_quotes_saved_at ON quotes(saved_at);
+"""
+
+
+def snapshot_totals(snapshots) -> dict:
+    """스냅샷들의 {id: (재료비 합계, 가공비 합계, 합계)} (목록 표시용으로 저장 시 계산, 임율표가 있으면 반영)"""
+    priced = price_snapshots(snapshots, rate_table=get_rate_table())
+    return {
+        str(row.id): (float(row.재료비합계), float(row.가공비합계), float(row.합계))
+        for row in priced.itertuples(index=False)
+    }
+
+
+def _totals_in_order(snapshots: list, batch_size: int = 500) -> list:
+    """스냅샷 순서대로 (재료비 합계, 가공비 합계, 합계) 목록 - batch_size 건씩 묶어 계산
+
+    id 가 겹치거나 저장 때 _1 이 붙을 수 있으므로 위치(순번)로 구분한다.
+    쓰기 잠금 밖에서 미리 계산해 두고 INSERT 에 넘긴다 (잠금은 id 확인 ~ INSERT 동안만).
+    """
+    totals = []
+    for start in range(0, len(snapshots), batch_size):
+        batch = snapshots[start: start + batch_size]
+        by_pos = snapshot_totals([{**snapshot, "id": str(i)} for i, snapshot in enumerate(batch)])
+        totals.extend(by_pos.get(str(i), (None, None, None)) for i in range(len(batch)))
+    return totals
+
+
+def _create_schema(conn):
+    # executescript 는 진행 중인 트랜잭션을 먼저 커밋하므로 문장별로 실행
+    for statement in _SCHEMA.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+def new_snapshot_id(now=None) -> str:
+    """저장 id (저장 시각 YYYYMMDDHHMMSS, 같은 초에 겹치면 저장소가 _1, _2 ... 를 붙임)"""
+    return (now or datetime.now()).strftime("%Y%m%d%H%M%S")
+
+
+class QuoteStore:
+    """산출 스냅샷 저장소 (append / id 조회 / 인덱스 검색)
+
+    목록 조회는 메타 테이블(quotes)만 읽고, material/process 본문(quote_payloads)은
+    get() / iter_find() 로 필요할 때만 읽는다. 최근에 연 본문은 LRU 캐시에 둔다.
+    """
+
+    def __init__(self, path: str = STORE_FILE, cache_size: int = PAYLOAD_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._counts = OrderedDict()  # (조건절, 값, 마지막 seq) → 건수
+        self._cache_lock = threading.Lock()
+        enable_wal(self.path)
+        # 여러 프로세스가 동시에 처음 열어도 스키마 생성은 한 번씩만
+        with self._connect(write=True) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(f"더 새 버전의 저장소입니다 (스키마 {version}): {self.path}")
+            _create_schema(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self, write: bool = False):
+        """연결 1개 (sqlite_db.connect - write=True 이면 쓰기 잠금)"""
+        return connect(self.path, write=write)
+
+    @staticmethod
+    def _meta(row) -> dict:
+        return {col: row[col] for col in META_COLS}
+
+    @staticmethod
+    def _insert(conn, snapshot: dict, totals) -> str:
+        """스냅샷 1건 INSERT (id 가 겹치면 _1, _2 ... 를 붙여 저장)
+
+        totals: (재료비 합계, 가공비 합계, 합계) - 쓰기 잠금 밖에서 미리 계산한 값
+        """
+        base_id = str(snapshot["id"])
+        snap_id, n = base_id, 0
+        while conn.execute("SELECT 1 FROM quotes WHERE id = ?", (snap_id,)).fetchone():
+            n += 1
+            snap_id = f"{base_id}_{n}"
+        snapshot = {**snapshot, "id": snap_id}
+        cursor = conn.execute(
+            f"INSERT INTO quotes ({', '.join(META_COLS)}) VALUES ({', '.join('?' * len(META_COLS))})",
+            (
+                snap_id,
+                snapshot.get("saved_at", ""),
+                snapshot.get("name", ""),
+                snapshot.get("p_no", ""),
+                snapshot.get("p_name", ""),
+                snapshot.get("car", ""),
+                snapshot.get("company", ""),
+                snapshot.get("labor_rate"),
+                *totals,
+            ),
+        )
+        conn.execute(
+            "INSERT INTO quote_payloads (seq, body) VALUES (?, ?)",
+            (cursor.lastrowid, json.dumps(snapshot, ensure_ascii=False)),
+        )
+        return snap_id
+
+    def append(self, snapshot: dict) -> str:
+        """스냅샷 1건 추가 후 저장된 id 반환 (같은 id 가 있으면 _1 등이 붙은 id)"""
+        totals = _totals_in_order([snapshot])[0]
+        with self._connect(write=True) as conn:
+            return self._insert(conn, snapshot, totals)
+
+    def append_many(self, snapshots, batch_size: int = 500) -> list[str]:
+        """스냅샷 여러 건을 한 트랜잭션으로 추가 (합계는 잠금 전에 batch_size 건씩 묶어 계산)"""
+        snapshots = list(snapshots)
+        totals = _totals_in_order(snapshots, batch_size)
+        with self._connect(write=True) as conn:
+            return self._insert_many(conn, snapshots, totals)
+
+    @classmethod
+    def _insert_many(cls, conn, snapshots: list, totals: list) -> list[str]:
+        return [cls._insert(conn, snapshot, value) for snapshot, value in zip(snapshots, totals)]
+
+    def get(self, snap_id: str):
+        """id 로 스냅샷 전체(material/process 포함) 조회
+
+        최근 조회한 본문은 캐시에서 돌려주므로 반환된 dict 를 수정하지 말 것.
+        """
+        snap_id = str(snap_id)
+        with self._cache_lock:
+            if snap_id in self._cache:
+                self._cache.move_to_end(snap_id)
+                return self._cache[snap_id]
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT p.body FROM quotes q JOIN quote_payloads p ON p.seq = q.seq WHERE q.id = ?", (snap_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        snapshot = json.loads(row["body"])
+        with self._cache_lock:
+            self._cache[snap_id] = snapshot
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return snapshot
+
+    def count(self, p_no=None, car=None, company=None, **filters) -> int:
+        """조건에 맞는 스냅샷 건수 (조건 없으면 전체)"""
+        where, params = self._where(p_no, car, company, **filters)
+        with self._connect() as conn:
+            return self._count(conn, where, params)
+
+    def _count(self, conn, where: str, params: list) -> int:
+        """조건절의 건수 (마지막 seq 가 그대로면 캐시 - 저장이 생기면 키가 바뀌어 다시 셈)"""
+        last = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM quotes").fetchone()[0]
+        key = (where, tuple(params), last)
+        with self._cache_lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        total = conn.execute(f"SELECT COUNT(*) FROM quotes{where}", params).fetchone()[0]
+        with self._cache_lock:
+            self._counts[key] = total
+            while len(self._counts) > COUNT_CACHE_SIZE:
+                self._counts.popitem(last=False)
+        return total
+
+    @staticmethod
+    def _where(p_no=None, car=None, company=None, ids=None, date_from=None, date_to=None, search=None):
+        """조회 조건절 (주어진 값만, 검색어 외에는 모두 인덱스 컬럼)
+
+        date_from / date_to 는 'YYYY-MM-DD' (saved_at 기준, 양 끝 포함)
+        search 는 품번 / 품명 / 차종 / 업체 / 이름 중 하나라도 포함하면 일치 (대소문자 무시)
+        """
+        where, params = [], []
+        if search:
+            pattern = "%" + re.sub(r"([\\%_])", r"\\\1", str(search).strip()) + "%"
+            where.append("(" + " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in SEARCH_COLS) + ")")
+            params.extend([pattern] * len(SEARCH_COLS))
+        for col, value in (("p_no", p_no), ("car", car), ("company", company)):
+            if value is not None:
+                where.append(f"{col} = ?")
+                params.append(value)
+        if ids is not None:
+            ids = [str(i) for i in ids]
+            where.append(f"id IN ({', '.join('?' * len(ids))})" if ids else "0")
+            params.extend(ids)
+        if date_from:
+            where.append("saved_at >= ?")
+            params.append(str(date_from))
+        if date_to:
+            where.append("saved_at <= ?")
+            params.append(f"{date_to} 23:59:59")
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def list_meta(self, p_no=None, car=None, company=None, newest_first: bool = True, **filters) -> list[dict]:
+        """메타 정보 목록 (p_no / car / company / ids / 기간 조건은 인덱스로 필터)"""
+        where, params = self._where(p_no, car, company, **filters)
+        order = " ORDER BY seq DESC" if newest_first else " ORDER BY seq"
+        sql = f"SELECT {', '.join(META_COLS)} FROM quotes{where}{order}"
+        with self._connect() as conn:
+            return [self._meta(row) for row in conn.execute(sql, params)]
+
+    def list_page(self, page_size: int = 20, before: int = None, with_total: bool = True,
+                  p_no=None, car=None, company=None, **filters):
+        """메타 정보 한 페이지 (최신순) → (목록, 조건에 맞는 전체 건수, 다음 페이지의 before)
+
+        before: 앞 페이지가 돌려준 값 (None 이면 첫 페이지). seq < before 부터 page_size 건을 읽으므로
+        뒤쪽 페이지도 첫 페이지와 비용이 같다. 다음 페이지의 before 는 마지막 페이지면 None.
+        with_total=False 이면 건수를 세지 않고 None.
+        """
+        where, params = self._where(p_no, car, company, **filters)
+        page_where, page_params = where, list(params)
+        if before is not None:
+            page_where += (" AND " if where else " WHERE ") + "seq < ?"
+            page_params.append(int(before))
+        with self._connect() as conn:
+            total = self._count(conn, where, params) if with_total else None
+            sql = f"SELECT seq, {', '.join(META_COLS)} FROM quotes{page_where} ORDER BY seq DESC LIMIT ?"
+            rows = conn.execute(sql, page_params + [page_size + 1]).fetchall()
+        next_before = rows[page_size - 1]["seq"] if len(rows) > page_size else None
+        return [self._meta(row) for row in rows[:page_size]], total, next_before
+
+    def distinct(self, col: str) -> list[str]:
+        """인덱스 컬럼(p_no / car / company)의 값 목록 (필터 선택지용)"""
+        if col not in ("p_no", "car", "company"):
+            raise ValueError(f"인덱스 컬럼이 아닙니다: {col}")
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(f"SELECT DISTINCT {col} FROM quotes WHERE {col} <> '' ORDER BY {col}")]
+
+    def find(self, p_no=None, car=None, company=None, **filters) -> list[dict]:
+        """조건에 맞는 스냅샷 전체 목록 (저장 순서)"""
+        return list(self.iter_find(p_no, car, company, **filters))
+
+    def last_seq(self) -> int:
+        """마지막 저장 순번 (비어 있으면 0) - 증분 처리 기준점"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM quotes").fetchone()[0]
+
+    def iter_since(self, seq: int = 0):
+        """seq 보다 나중에 저장된 스냅샷을 (seq, 스냅샷) 으로 저장 순서대로 반환 (증분 캐시 갱신용)"""
+        with self._connect() as conn:
+            for row in conn.execute("SELECT seq, body FROM quote_payloads WHERE seq > ? ORDER BY seq", (int(seq),)):
+                yield row["seq"], json.loads(row["body"])
+
+    def iter_find(self, p_no=None, car=None, company=None, **filters):
+        """조건에 맞는 스냅샷을 한 건씩 읽어 반환 (대량 처리용)"""
+        where, params = self._where(p_no, car, company, **filters)
+        with self._connect() as conn:
+            sql = f"SELECT p.body FROM quotes JOIN quote_payloads p ON p.seq = quotes.seq{where} ORDER BY quotes.seq"
+            for row in conn.execute(sql, params):
+                yield json.loads(row["body"])
+
+
+def _load_legacy_json(json_path: str) -> list:
+    """기존 JSON 저장 파일 읽기 (깨진 파일은 빈 목록으로 넘기지 않고 오류로 알림)"""
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"{json_path} 을(를) 읽을 수 없습니다 (파일 손상): {e}") from e
+    if not isinstance(results, list):
+        raise ValueError(f"{json_path} 형식이 올바르지 않습니다 (스냅샷 목록이 아님)")
+    return results
+
+
+def migrate_from_json(store: QuoteStore, json_path: str = LEGACY_JSON_FILE) -> int:
+    """기존 saved_results.json 의 스냅샷을 저장소로 옮기기
+
+    이관 전에 이미 저장소에 있던 id 는 건너뛰므로 여러 번 실행해도 안전하다.
+    (JSON 안에서 같은 초에 저장되어 id 가 겹친 건은 _1 을 붙여 모두 옮긴다.)
+    한 트랜잭션으로 옮기므로 중간에 실패하면 아무것도 옮겨지지 않는다.
+    반환: 새로 옮긴 건수
+    """
+    if not os.path.exists(json_path):
+        return 0
+    results = _load_legacy_json(json_path)
+    totals = _totals_in_order(results)
+    with store._connect(write=True) as conn:
+        existing = {row[0] for row in conn.execute("SELECT id FROM quotes")}
+        todo = [(snapshot, value) for snapshot, value in zip(results, totals) if str(snapshot["id"]) not in existing]
+        saved = store._insert_many(conn, [snapshot for snapshot, _ in todo], [value for _, value in todo])
+        conn.execute(
+            "INSERT OR REPLACE INTO store_info (key, value) VALUES ('legacy_json', ?)", (os.path.abspath(json_path),)
+        )
+    return len(saved)
+
+
+def open_store(path: str = STORE_FILE, legacy_json: str = LEGACY_JSON_FILE) -> QuoteStore:
+    """저장소 열기 (기존 JSON 이 있고 아직 이관하지 않았으면 자동 이관)
+
+    이관 완료는 DB 안(store_info)에 기록하므로, 이관 도중 중단되었으면 다음에 열 때 다시 이관한다.
+    """
+    store = QuoteStore(path)
+    if legacy_json and os.path.exists(legacy_json):
+        with store._connect() as conn:
+            done = conn.execute("SELECT 1 FROM store_info WHERE key = 'legacy_json'").fetchone()
+        if not done:
+            migrate_from_json(store, legacy_json)
+    return store
+
+
+if __name__ == "__main__":
+    # 사용법: python quote_store.py [saved_results.json] [saved_results.db]
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else LEGACY_JSON_FILE
+    dst = sys.argv[2] if len(sys.argv) > 2 else STORE_FILE
+    count = migrate_from_json(QuoteStore(dst), src)
+    print(f"{src} -> {dst}: {count}건 이관")
@@ -0,0 +1,146 @@
+# =========================================================
+# [임율표] 사용기계 / 공정명별 임율 (적용 기간 포함, streamlit 비의존)
+# =========================================================
+# - 임율표는 CSV 파일(RATE_TABLE_FILE) 하나로 관리한다 (엑셀로 열어 고칠 수 있게).
+#   컬럼: 사용기계, 공정명, 임율(원/HR), 적용시작, 적용종료 (날짜는 YYYY-MM-DD, 종료 빈 칸 = 계속)
+#   공정명이 빈 행은 그 기계의 모든 공정에 쓰는 기본 임율.
+# - 파일은 수정시각이 바뀔 때만 다시 읽고 메모리에 둔다 (get_rate_table).
+# - 행별 임율은 (사용기계, 공정명) → (사용기계) 순서로 merge 해서 한 번에 찾는다.
+#   사용임율 우선순위: 산출근거(원/HR) 직접 입력 > 임율표 > 적용임율(labor_rate)
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+RATE_TABLE_FILE = "rate_table.csv"
+RATE_COLS = ["사용기계", "공정명", "임율(원/HR)", "적용시작", "적용종료"]
+
+
+def _text(values) -> np.ndarray:
+    series = pd.Series(values, dtype=object)
+    return series.where(series.notna(), "").astype(str).str.strip().to_numpy(dtype=object)
+
+
+def _dates(values) -> np.ndarray:
+    """날짜 → 'YYYY-MM-DD' 문자열 (빈 값 / 잘못된 값은 "")"""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce")
+    return parsed.dt.strftime("%Y-%m-%d").fillna("").to_numpy(dtype=object)
+
+
+def normalize_rates(df: pd.DataFrame) -> pd.DataFrame:
+    """임율표 정리 (기계명 / 임율이 없는 행 제외, 날짜 형식 통일)"""
+    df = df.reindex(columns=RATE_COLS)
+    table = pd.DataFrame({
+        "사용기계": _text(df["사용기계"]),
+        "공정명": _text(df["공정명"]),
+        "임율(원/HR)": pd.to_numeric(df["임율(원/HR)"], errors="coerce").to_numpy(dtype=float),
+        "적용시작": _dates(df["적용시작"]),
+        "적용종료": _dates(df["적용종료"]),
+    })
+    keep = (table["사용기계"] != "") & table["임율(원/HR)"].notna() & (table["임율(원/HR)"] > 0)
+    return table[keep].reset_index(drop=True)
+
+
+class RateTable:
+    """메모리에 올린 임율표 1개"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = normalize_rates(df)
+        # (사용기계, 공정명) 조회용 / 기계 기본 임율(공정명 빈 행) 조회용
+        self._by_pair = self.df[self.df["공정명"] != ""]
+        self._by_machine = self.df[self.df["공정명"] == ""]
+        self._digest = None
+
+    def __len__(self):
+        return len(self.df)
+
+    def digest(self) -> str:
+        """임율표 내용 해시 (엑셀 결과 캐시 키에 사용)"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.df.to_csv(index=False).encode("utf-8")).hexdigest()
+        return self._digest
+
+    @staticmethod
+    def _match(rows: pd.DataFrame, rates: pd.DataFrame, keys: list) -> pd.DataFrame:
+        """rows(pos, 키, as_of) 와 rates 를 키로 merge → 적용 기간 안의 후보 중 적용시작이 가장 늦은 1건씩"""
+        if rates.empty or rows.empty:
+            return rows.iloc[:0].assign(**{"임율(원/HR)": []})
+        cand = rows.merge(rates, on=keys, how="inner")
+        active = (cand["적용시작"] <= cand["as_of"]) & ((cand["적용종료"] == "") | (cand["as_of"] <= cand["적용종료"]))
+        return cand[active].sort_values("적용시작", kind="stable").drop_duplicates("pos", keep="last")
+
+    def lookup(self, machines, processes, as_of=None) -> np.ndarray:
+        """행별 임율표 임율 (없으면 NaN)
+
+        as_of: 기준일 ('YYYY-MM-DD' / date, 또는 행별 배열). 없는 값은 오늘.
+        """
+        machines = _text(machines)
+        n = len(machines)
+        result = np.full(n, np.nan)
+        if not n or self.df.empty:
+            return result
+        if as_of is None or np.isscalar(as_of) or isinstance(as_of, date):
+            as_of = [as_of] * n
+        as_of = _dates(as_of)
+        as_of[as_of == ""] = date.today().isoformat()
+        rows = pd.DataFrame({"pos": np.arange(n), "사용기계": machines, "공정명": _text(processes), "as_of": as_of})
+        rows = rows[rows["사용기계"] != ""]
+
+        pair = self._match(rows, self._by_pair, ["사용기계", "공정명"])
+        result[pair["pos"].to_numpy(dtype=int)] = pair["임율(원/HR)"].to_numpy(dtype=float)
+        rest = rows[np.isnan(result[rows["pos"].to_numpy(dtype=int)])].drop(columns="공정명")
+        machine = self._match(rest, self._by_machine.drop(columns="공정명"), ["사용기계"])
+        result[machine["pos"].to_numpy(dtype=int)] = machine["임율(원/HR)"].to_numpy(dtype=float)
+        return result
+
+    def effective_rates(self, process_df: pd.DataFrame, labor_rate, as_of=None):
+        """임율표를 반영한 행별 기본 임율 (임율표에 없으면 labor_rate)
+
+        cost_engine.calc_process 의 labor_rate 로 넘기면 산출근거 직접 입력 > 임율표 > 적용임율 순서가 된다.
+        labor_rate 는 스칼라 또는 행별 배열. 임율표가 비어 있으면 labor_rate 를 그대로 돌려준다.
+        """
+        if self.df.empty or "사용기계" not in process_df.columns:
+            return labor_rate
+        table = self.lookup(process_df["사용기계"], process_df.get("공정명", ""), as_of)
+        return np.where(np.isnan(table), labor_rate, table)
+
+
+_CACHE: dict[str, tuple] = {}
+_LOCK = threading.Lock()
+
+
+def get_rate_table(path: str = RATE_TABLE_FILE):
+    """임율표 (파일이 바뀌었을 때만 다시 읽음). 파일이 없으면 None."""
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    key = (st_.st_mtime_ns, st_.st_size)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != key:
+        with _LOCK:
+            cached = _CACHE.get(path)
+            if cached is None or cached[0] != key:
+                table = RateTable(pd.read_csv(path, dtype=str, encoding="utf-8-sig", keep_default_na=False))
+                cached = (key, table)
+                _CACHE[path] = cached
+    return cached[1]
+
+
+def save_rate_table(df: pd.DataFrame, path: str = RATE_TABLE_FILE) -> RateTable:
+    """임율표 저장 (임시 파일에 쓴 뒤 교체 - 저장 중에 읽어도 깨진 파일을 보지 않음)"""
+    table = RateTable(df)
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".rate_table_", suffix=".csv", dir=folder)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8-sig", newline="") as f:
+            table.df.to_csv(f, index=False)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return table
@@ -0,0 +1,145 @@
+# =========================================================
+# [시나리오] 적용임율 / 단가 / LOSS율을 바꿨을 때 저장 산출 전체 재산출 (streamlit 비의존)
+# =========================================================
+# - 저장 산출을 한 건씩 불러오지 않고, 분석 캐시(analytics_cache)에 펼쳐 둔
+#   재료비 / 가공비 입력 배열에 변경을 적용해 cost_engine 공식으로 한 번에 다시 계산한다.
+# - 변경 항목
+#     labor_rate       : 적용임율 일괄 변경 (산출근거 직접 입력 / 임율표 행은 그대로)
+#     price_factors    : 부품코드별 단가 배수 {부품코드: 배수}
+#     material_factors : 재질/규격별 단가 배수 {재질/규격: 배수} (부품코드 배수가 있으면 그쪽 우선)
+#     loss_rate        : 자재LOSS율(%) 일괄 변경
+# - 결과는 (시나리오, 캐시 상태, 조건) 별로 ScenarioRunner 에 보관 → 시나리오를 바꿔 가며 볼 때 재계산 없음.
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from analytics_cache import KEY, MATERIAL_VALUES, PROCESS_VALUES
+from cost_engine import material_formula, money_add, money_bincount, money_sum, process_formula
+
+SCENARIO_CACHE_SIZE = 16
+RESULT_COLS = ["id", "p_no", "p_name", "car", "company", "saved_at",
+               "기존재료비", "기존가공비", "기존합계", "새재료비", "새가공비", "새합계", "증감", "증감률(%)"]
+
+
+class Scenario:
+    """시나리오 1개 (변경하지 않는 항목은 None / 빈 dict)"""
+
+    def __init__(self, name: str = "", labor_rate=None, price_factors=None, material_factors=None, loss_rate=None):
+        self.name = name
+        self.labor_rate = None if labor_rate is None else float(labor_rate)
+        self.price_factors = {str(k).strip(): float(v) for k, v in (price_factors or {}).items() if str(k).strip()}
+        self.material_factors = {str(k).strip(): float(v) for k, v in (material_factors or {}).items() if str(k).strip()}
+        self.loss_rate = None if loss_rate is None else float(loss_rate)
+
+    def key(self) -> str:
+        """결과 캐시 키 (이름은 제외 - 같은 변경이면 같은 결과)"""
+        return json.dumps(
+            [self.labor_rate, sorted(self.price_factors.items()), sorted(self.material_factors.items()), self.loss_rate],
+            ensure_ascii=False,
+        )
+
+    def is_empty(self) -> bool:
+        return self.labor_rate is None and not self.price_factors and not self.material_factors and self.loss_rate is None
+
+    def describe(self) -> str:
+        parts = []
+        if self.labor_rate is not None:
+            parts.append(f"적용임율 {self.labor_rate:,.0f}")
+        if self.price_factors:
+            parts.append(f"부품코드 단가 배수 {len(self.price_factors)}건")
+        if self.material_factors:
+            parts.append(f"재질 단가 배수 {len(self.material_factors)}건")
+        if self.loss_rate is not None:
+            parts.append(f"LOSS율 {self.loss_rate:g}%")
+        return ", ".join(parts) or "변경 없음"
+
+
+def _factors(values: pd.Series, factors: dict) -> np.ndarray:
+    """값별 배수 (없으면 NaN) - category 컬럼이면 범주에서 한 번만 찾는다"""
+    if not factors:
+        return np.full(len(values), np.nan)
+    return pd.Series(values).map(factors).astype(float).to_numpy()
+
+
+def apply_scenario(quotes: pd.DataFrame, material: pd.DataFrame, process: pd.DataFrame, scenario: Scenario) -> pd.DataFrame:
+    """분석 캐시 표(견적 / 재료비 행 / 가공비 행)에 시나리오 적용 → 견적별 기존 / 새 합계 (RESULT_COLS)
+
+    quotes 는 seq 오름차순 (AnalyticsCache.frames 결과 그대로).
+    """
+    # 재료비: 단가 배수 (부품코드 > 재질/규격), LOSS율 일괄 변경
+    mat = {col: material[col].to_numpy(dtype=float) for col in MATERIAL_VALUES if col != "재료비"}
+    factor = _factors(material["부품코드"], scenario.price_factors)
+    factor = np.where(np.isnan(factor), _factors(material["재질/규격"], scenario.material_factors), factor)
+    mat["단가"] = mat["단가"] * np.where(np.isnan(factor), 1.0, factor)
+    if scenario.loss_rate is not None:
+        mat["자재LOSS율(%)"] = np.full(len(material), scenario.loss_rate)
+    new_material = material_formula(mat)["재료비"]
+
+    # 가공비: 임율표가 아닌 행의 기본임율을 새 적용임율로
+    pro = {col: process[col].to_numpy(dtype=float) for col in PROCESS_VALUES if col not in ("사용임율", "총가공비")}
+    base = pro["기본임율"]
+    if scenario.labor_rate is not None:
+        base = np.where(pro["임율표"] > 0, base, scenario.labor_rate)
+    new_process = process_formula(pro, base)["총가공비"]
+
+    # 견적별 합계 (seq 오름차순 → searchsorted 위치로 bincount)
+    seqs = quotes[KEY].to_numpy()
+    n = len(seqs)
+    mat_total = money_bincount(np.searchsorted(seqs, material[KEY].to_numpy()), new_material, n)
+    pro_total = money_bincount(np.searchsorted(seqs, process[KEY].to_numpy()), new_process, n)
+
+    result = pd.DataFrame({col: quotes[col].to_numpy() for col in ("id", "p_no", "p_name", "car", "company", "saved_at")})
+    result["기존재료비"] = quotes["재료비"].to_numpy(dtype=float)
+    result["기존가공비"] = quotes["가공비"].to_numpy(dtype=float)
+    result["기존합계"] = quotes["합계"].to_numpy(dtype=float)
+    result["새재료비"] = mat_total
+    result["새가공비"] = pro_total
+    result["새합계"] = money_add(mat_total, pro_total)
+    result["증감"] = money_add(result["새합계"], -result["기존합계"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["증감률(%)"] = np.where(result["기존합계"] != 0, result["증감"] / result["기존합계"] * 100, np.nan)
+    return result
+
+
+def scenario_summary(result: pd.DataFrame) -> dict:
+    """시나리오 결과 요약 (견적 수 / 기존·새 합계 / 증감 / 금액이 바뀐 견적 수)"""
+    before, after = money_sum(result["기존합계"]), money_sum(result["새합계"])
+    return {
+        "견적수": len(result),
+        "기존합계": before,
+        "새합계": after,
+        "증감": money_sum([after, -before]),
+        "증감률(%)": (after - before) / before * 100 if before else float("nan"),
+        "변경견적수": int((~np.isclose(result["증감"].to_numpy(dtype=float), 0)).sum()),
+    }
+
+
+class ScenarioRunner:
+    """분석 캐시 위에서 시나리오 실행 + 결과 보관 (최근 SCENARIO_CACHE_SIZE 개)
+
+    캐시에 새 산출이 반영되면(last_seq 변경) 보관한 결과는 자연히 쓰이지 않는다.
+    """
+
+    def __init__(self, cache, size: int = SCENARIO_CACHE_SIZE):
+        self.cache = cache
+        self.size = size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, scenario: Scenario, car=None, company=None, date_from=None, date_to=None) -> pd.DataFrame:
+        """시나리오 결과 (조건: 차종 / 업체 / 저장일 - AnalyticsCache.frames 와 같음)"""
+        quotes, material, process = self.cache.frames(car=car, company=company, date_from=date_from, date_to=date_to)
+        key = (scenario.key(), self.cache.last_seq, car, company, date_from, date_to)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        result = apply_scenario(quotes, material, process, scenario)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+        return result
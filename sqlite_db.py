@@ -0,0 +1,39 @@
+# =========================================================
+# [SQLite 공용] 저장소(quote_store) / 부품 마스터(part_master) 연결 설정 (streamlit 비의존)
+# =========================================================
+# - 여러 사용자 / 프로세스가 동시에 쓰도록
+#   WAL 모드(읽기는 쓰기를 기다리지 않음) + busy_timeout(잠겨 있으면 기다림) +
+#   쓰기마다 BEGIN IMMEDIATE(읽고 나서 쓰는 작업이 다른 쓰기와 겹치지 않게) 로 연다.
+#   (WAL 은 네트워크 드라이브에서 동작하지 않으므로 DB 파일은 서버 로컬 디스크에 둘 것)
+# - Streamlit 은 rerun 마다 스레드가 달라질 수 있으므로 연결은 호출마다 연다.
+import sqlite3
+from contextlib import contextmanager
+
+# 다른 연결이 쓰는 중일 때 기다리는 최대 시간 (초)
+BUSY_TIMEOUT = 30.0
+
+
+def enable_wal(path: str):
+    """DB 파일을 WAL 모드로 (트랜잭션 밖에서만 바꿀 수 있고 파일에 기록되므로 처음 열 때 한 번)"""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+
+@contextmanager
+def connect(path: str, write: bool = False):
+    """연결 1개 (with 블록 끝에서 커밋, 예외 시 롤백, 행은 sqlite3.Row)
+
+    write=True 이면 처음부터 쓰기 잠금을 잡는다 (BEGIN IMMEDIATE). 잠겨 있으면 BUSY_TIMEOUT 까지 기다린다.
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            if write:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+    finally:
+        conn.close()
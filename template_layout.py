@@ -0,0 +1,302 @@
+# =========================================================
+# [템플릿 캐시] template.xlsx 레이아웃 / 원본 워크북 캐시
+# =========================================================
+# - 템플릿 파일 해시별로 한 번만 파싱하여 컬럼 위치, 라벨 셀, 공정 행,
+#   (4)가공비 합계 셀 좌표와 시트 수식 의존 그래프(formula_eval)를 미리 계산해 둔다.
+# - 엑셀 생성 시 디스크에서 다시 읽지 않고, 이미 파싱해 둔 원본 워크북을
+#   빌려 쓴 뒤(checkout) 수정한 셀만 원래 값으로 되돌려 반납한다.
+import hashlib
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from io import BytesIO
+
+from openpyxl import load_workbook
+from openpyxl.cell.cell import MergedCell
+
+from formula_eval import FormulaGraph
+from perf_timing import timed
+
+TEMPLATE_FILE = "template.xlsx"
+# 템플릿별로 보관할 파싱된 워크북 최대 개수 (동시 엑셀 생성 수만큼 필요)
+TEMPLATE_POOL_SIZE = 4
+
+# =========================================================
+# [설정] 엑셀 좌표 (이미지 양식 기준)
+# =========================================================
+# 재료비 섹션
+MAT_START_ROW = 9
+MAT_MAX_ROW = 24      # Q24 = SUM(Q9:Q23) 합계 행 (입력 행 아님)
+MAT_CARRY_ROW = 23    # 행이 넘칠 때 별지 상세내역 누계를 적는 행 (수식 행은 9~22, 최대 14건)
+COL_MAT_CODE = 3      # 부품코드 (C열)
+COL_MAT_NAME = 6      # 부품명 (F열)
+COL_MAT_US = 4        # U/S (D열)
+COL_MAT_SPEC = 5      # 재질/규격 (E열)
+COL_MAT_UNIT = 7      # 단위 (G열)
+COL_MAT_PRICE = 8     # 단가 (H열)
+COL_MAT_NET = 9       # NET(g,mm) (I열)
+COL_MAT_SCRAP = 10    # SCRAP(g,mm) (J열)
+COL_MAT_INPUT = 11    # 투입중량 (K열)
+COL_MAT_AMOUNT = 12   # 금액 (L열)
+COL_MAT_LOSS_RATE = 13  # 자재LOSS율 (M열)
+COL_MAT_LOSS_AMOUNT = 14  # LOSS금액 (N열)
+COL_MAT_WASTE = 15    # 산업폐기물처리비용 (O열)
+COL_MAT_DIE_LOSS = 16 # 다이캐스팅LOSS인정 (P열)
+COL_MAT_DIE_AMOUNT = 17  # 금액 (Q열, 템플릿 머리글은 '재료비')
+COL_MAT_TOTAL = 18    # 재료비 (R열)
+
+# 가공비 섹션 (엑셀 템플릿 기준: (2) 가공비 표의 열 위치)
+PRO_START_ROW = 27
+PRO_MAX_ROW = 45
+COL_PRO_NAME = 3      # C열: 부품명
+COL_PRO_US = 5        # E열: U/S
+COL_PRO_PROCESS = 6   # F열: 공정명
+COL_PRO_MACH = 7      # G열: 사용기계
+COL_PRO_MAN = 9       # I열: 인
+COL_PRO_TIME = 10     # J열: 공수(SEC)
+COL_PRO_RATE = 11     # K열: 임율(원/HR)
+COL_PRO_AMOUNT1 = 12  # L열: 금액(원/EA)
+# 아래 컬럼은 현재 템플릿에서 직접 사용하지 않으므로 필요 시 확장
+COL_PRO_BASIS = 13    # (옵션) 산출근거(원/HR)
+COL_PRO_AMOUNT2 = 14  # (옵션) 금액(원/EA) 비
+COL_PRO_PREP = 15     # (옵션) 준비시간(분)
+
+# 재료비 헤더 검색 키워드 → (레이아웃 키, 기본 컬럼)
+MAT_HEADER_KEYWORDS = [
+    ("품번", "code", COL_MAT_CODE),
+    ("부품명", "name", COL_MAT_NAME),
+    ("U/S", "us", COL_MAT_US),
+    ("재질", "spec", COL_MAT_SPEC),
+    ("단위", "unit", COL_MAT_UNIT),
+    ("단가", "price", COL_MAT_PRICE),
+    ("NET", "net", COL_MAT_NET),
+    ("SCRAP", "scrap", COL_MAT_SCRAP),
+    ("투입", "input", COL_MAT_INPUT),
+    ("LOSS율", "lossrate", COL_MAT_LOSS_RATE),
+    ("산업폐기물", "waste", COL_MAT_WASTE),
+    ("다이캐스팅", "die", COL_MAT_DIE_LOSS),
+]
+
+
+def find_target_sheet(wb):
+    """원가/견적/계산 이 들어간 시트 (없으면 활성 시트)"""
+    for s in wb.sheetnames:
+        if "원가" in s or "견적" in s or "계산" in s:
+            return wb[s]
+    return wb.active
+
+
+class TemplateLayout:
+    """템플릿 시트에서 한 번만 찾아 두는 좌표 정보"""
+
+    def __init__(self, ws):
+        self.sheet_name = ws.title
+        self.mat_cols = self._find_mat_cols(ws)
+        self.info_cells = self._find_info_cells(ws)
+        self.process_row_map = self._find_process_rows(ws)
+        self.process_total_cell = self._find_process_total_cell(ws)
+
+    @staticmethod
+    def _find_mat_cols(ws) -> dict[str, int]:
+        """시트 상단(1~40행)을 한 번만 훑어 헤더 키워드별 첫 컬럼 번호를 찾는다"""
+        found: dict[str, int] = {}
+        try:
+            for row in ws.iter_rows(min_row=1, max_row=40):
+                for cell in row:
+                    if not cell.value:
+                        continue
+                    cell_str = str(cell.value)
+                    for keyword, key, _ in MAT_HEADER_KEYWORDS:
+                        if key not in found and keyword in cell_str:
+                            found[key] = cell.column
+        except Exception:
+            pass
+        return {key: found.get(key, default_col) for _, key, default_col in MAT_HEADER_KEYWORDS}
+
+    @staticmethod
+    def _find_info_cells(ws) -> list[tuple[str, int, int]]:
+        """기본 정보 라벨(1~10행) 옆 입력 셀 좌표: [(필드, 행, 열), ...]"""
+        cells = []
+        for row in ws.iter_rows(min_row=1, max_row=10):
+            for cell in row:
+                if not cell.value:
+                    continue
+                cell_str = str(cell.value)
+                # 품번
+                if "품 번" in cell_str or "품번" in cell_str:
+                    cells.append(("p_no", cell.row, cell.column + 2))
+                # 품명
+                if "품명" in cell_str and "부품명" not in cell_str:
+                    cells.append(("p_name", cell.row, cell.column + 2))
+                # 차종
+                if "차종" in cell_str:
+                    cells.append(("car", cell.row, cell.column + 1))
+                # 업체
+                if "업체" in cell_str:
+                    cells.append(("company", cell.row, cell.column + 1))
+                # 적용임율
+                if "적용임율" in cell_str or ("임율" in cell_str and "적용" in cell_str):
+                    cells.append(("labor_rate", cell.row, cell.column + 1))
+        return cells
+
+    @staticmethod
+    def _find_process_rows(ws) -> dict[str, int]:
+        """공정명 → 행 번호 (가공비 표 아래쪽에 공정명이 미리 적힌 행)
+
+        가공비 표(PRO_START_ROW~PRO_MAX_ROW)는 엑셀 생성 시 공정명을 먼저 비우므로
+        표 아래 PRO_MAX_ROW+1 ~ PRO_MAX_ROW+19 행만 매핑 대상이 된다.
+        """
+        process_row_map: dict[str, int] = {}
+        try:
+            for r in range(PRO_MAX_ROW + 1, PRO_MAX_ROW + 20):
+                # ws.cell() 은 빈 셀을 새로 만들기 때문에 조회만 한다.
+                cell = ws._cells.get((r, COL_PRO_PROCESS))
+                value = cell.value if cell is not None else None
+                if value:
+                    process_row_map[str(value).strip()] = r
+        except Exception:
+            process_row_map = {}
+        return process_row_map
+
+    @staticmethod
+    def _find_process_total_cell(ws):
+        """"(4)가공비" 행에서 가장 오른쪽 숫자/수식 셀 좌표 (없으면 라벨 +5열)"""
+        try:
+            for row in ws.iter_rows(min_row=1, max_row=200):
+                for cell in row:
+                    if not cell.value:
+                        continue
+                    cell_str = str(cell.value).replace(" ", "")
+                    if "가공비" in cell_str and "(4)" in cell_str:
+                        target = (cell.row, cell.column + 5)
+                        for c2 in row:
+                            if c2.column <= cell.column:
+                                continue
+                            if isinstance(c2.value, (int, float)) or (
+                                isinstance(c2.value, str) and c2.value.startswith("=")
+                            ):
+                                target = (c2.row, c2.column)
+                        return target
+        except Exception:
+            pass
+        return None
+
+
+# =========================================================
+# [원본 워크북 풀] 파싱된 템플릿을 빌려 쓰고 되돌려 놓기
+# =========================================================
+# 빌려 간 시트에서 처음 바뀌는 셀의 원래 값을 기록해 두는 곳 (시트 → {(행, 열): (값, 타입)})
+_JOURNALS = weakref.WeakKeyDictionary()
+
+
+def remember_original(ws, row: int, col: int):
+    """셀을 수정하기 전에 원래 값을 기록 (빌려 간 시트가 아니면 아무 것도 안 함)"""
+    journal = _JOURNALS.get(ws)
+    if journal is None or (row, col) in journal:
+        return
+    cell = ws._cells.get((row, col))
+    if isinstance(cell, MergedCell):
+        return  # 병합된 셀은 값을 쓸 수 없으므로 기록할 필요 없음
+    journal[(row, col)] = (cell._value, cell.data_type) if cell is not None else None
+
+
+class TemplateCache:
+    """템플릿 파일 1개(해시 기준)의 원본 바이트, 레이아웃, 수식 그래프, 파싱된 워크북 풀"""
+
+    def __init__(self, data: bytes, digest: str):
+        self.data = data
+        self.digest = digest
+        self._lock = threading.Lock()
+        self._free = []
+        wb = self._parse()
+        with timed("export.find_col"):
+            self.layout = TemplateLayout(find_target_sheet(wb))
+        # iter_rows() 로 훑으면서 생긴 빈 셀 정리
+        self._prune_new_cells(wb)
+        with timed("export.formula_compile"):
+            self.formulas = FormulaGraph.from_worksheet(wb[self.layout.sheet_name])
+        self._free.append(wb)
+
+    def _parse(self):
+        with timed("export.template_parse"):
+            wb = load_workbook(BytesIO(self.data))
+        # 원본에 존재하던 셀 좌표 (반납 시 새로 생긴 셀을 지우기 위함)
+        wb._pristine_cells = {ws.title: set(ws._cells) for ws in wb.worksheets}
+        return wb
+
+    @contextmanager
+    def checkout(self):
+        """원본 상태의 (워크북, 대상 시트) 를 빌려준다. with 블록이 끝나면 원상 복구 후 반납."""
+        with self._lock:
+            wb = self._free.pop() if self._free else None
+        if wb is None:
+            wb = self._parse()
+        ws = wb[self.layout.sheet_name]
+        _JOURNALS[ws] = {}
+        try:
+            yield wb, ws
+        except BaseException:
+            # 실패한 워크북은 상태를 보장할 수 없으므로 버린다.
+            _JOURNALS.pop(ws, None)
+            raise
+        else:
+            if self._restore(wb, ws):
+                with self._lock:
+                    if len(self._free) < TEMPLATE_POOL_SIZE:
+                        self._free.append(wb)
+
+    @staticmethod
+    def _restore(wb, ws) -> bool:
+        """기록해 둔 원래 값으로 되돌리기 (되돌릴 수 없는 변경이 있으면 False)"""
+        journal = _JOURNALS.pop(ws, {})
+        pristine = wb._pristine_cells
+        if [s.title for s in wb.worksheets] != list(pristine):
+            return False
+        for (row, col), original in journal.items():
+            if original is None:
+                continue
+            cell = ws._cells[(row, col)]
+            cell._value, cell.data_type = original
+        TemplateCache._prune_new_cells(wb)
+        return True
+
+    @staticmethod
+    def _prune_new_cells(wb):
+        """조회/기록 과정에서 새로 만들어진 셀 제거"""
+        for sheet in wb.worksheets:
+            keep = wb._pristine_cells[sheet.title]
+            for coord in [c for c in sheet._cells if c not in keep]:
+                del sheet._cells[coord]
+
+
+_CACHES: dict[str, TemplateCache] = {}
+_STAT_DIGESTS: dict[tuple, str] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def template_digest(path: str = TEMPLATE_FILE) -> str:
+    """템플릿 파일 SHA-256 (파일 크기/수정시각이 같으면 이전 계산값 재사용)"""
+    st_ = os.stat(path)
+    key = (os.path.abspath(path), st_.st_mtime_ns, st_.st_size)
+    digest = _STAT_DIGESTS.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _STAT_DIGESTS[key] = digest
+    return digest
+
+
+def get_template(path: str = TEMPLATE_FILE) -> TemplateCache:
+    """템플릿 캐시 조회 (파일 내용이 바뀌면 새로 파싱)"""
+    digest = template_digest(path)
+    cache = _CACHES.get(digest)
+    if cache is None:
+        with _CACHE_LOCK:
+            cache = _CACHES.get(digest)
+            if cache is None:
+                with open(path, "rb") as f:
+                    data = f.read()
+                cache = TemplateCache(data, hashlib.sha256(data).hexdigest())
+                _CACHES[cache.digest] = cache
+    return cache
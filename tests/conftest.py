@@ -0,0 +1,27 @@
+# =========================================================
+# [테스트 공통] 저장소 루트를 import 경로에 넣고, 각 테스트는 임시 폴더에서 실행
+# =========================================================
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 성능 로그 파일 / 엑셀 디스크 캐시는 만들지 않음 (모듈 import 전에 설정)
+os.environ["SSEP_PERF_LOG"] = ""
+os.environ["SSEP_EXPORT_CACHE_DIR"] = ""
+
+TEMPLATE_PATH = os.path.join(ROOT, "template.xlsx")
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """작업 폴더 = 임시 폴더 (saved_results.db / rate_table.csv 등 상대 경로 파일이 저장소에 생기지 않게)"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def template_path():
+    return TEMPLATE_PATH
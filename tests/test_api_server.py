@@ -0,0 +1,165 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from api_server import LIST_LIMIT, ApiServer, ApiService
+from cost_engine import price_snapshots
+from export_cache import ExportCache
+
+TOKEN = "secret"
+
+QUOTE = {
+    "p_no": "96240-BQ000", "p_name": "TEST", "car": "SV1", "company": "TEST", "labor_rate": 3500,
+    "material": [{"부품명": "P", "U/S": 1, "단가": 100, "NET(g,mm)": 1}],
+    "process": [{"부품명": "P", "U/S": 1, "공정명": "조립", "사용기계": "수작업", "인": 2, "공수(SEC)": 36}],
+}
+
+
+@pytest.fixture
+def server(template_path):
+    service = ApiService(template_path=template_path, export_cache=ExportCache(folder=None))
+    srv = ApiServer(("127.0.0.1", 0), service, token=TOKEN)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def request(srv, method, path, body=None, token=TOKEN):
+    conn = http.client.HTTPConnection("127.0.0.1", srv.server_port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers["Authorization"] = f"Bearer {token}"
+    raw = body if isinstance(body, bytes) or body is None else json.dumps(body, ensure_ascii=False).encode()
+    conn.request(method, path, body=raw, headers=headers)
+    resp = conn.getresponse()
+    data = resp.read()
+    conn.close()
+    if data and resp.getheader("Content-Type", "").startswith("application/json"):
+        data = json.loads(data)
+    return resp.status, data
+
+
+def test_save_list_get(server):
+    status, data = request(server, "POST", "/quotes", {"quotes": [QUOTE, QUOTE]})
+    assert status == 200 and len(data["ids"]) == 2
+    status, data = request(server, "GET", "/quotes?limit=1")
+    assert status == 200 and data["total"] == 2 and len(data["items"]) == 1
+    status, second = request(server, "GET", f"/quotes?limit=1&before={data['next']}")
+    assert status == 200 and len(second["items"]) == 1 and second["next"] is None
+    assert second["items"][0]["id"] != data["items"][0]["id"]
+    status, _ = request(server, "GET", "/quotes/nope")
+    assert status == 404
+
+
+@pytest.mark.parametrize("query", [
+    "limit=0", "limit=-1", f"limit={LIST_LIMIT + 1}", "limit=abc", "limit=1.5", "before=0", "before=-3", "before=x",
+])
+def test_list_rejects_bad_paging(server, query):
+    status, data = request(server, "GET", f"/quotes?{query}")
+    assert status == 400
+    assert "error" in data
+
+
+BAD_QUOTES = [
+    [QUOTE],
+    "text",
+    {**QUOTE, "material": {"부품명": "P"}},
+    {**QUOTE, "process": [["조립", 10]]},
+    {**QUOTE, "p_no": {"x": 1}},
+    {**QUOTE, "labor_rate": [3500]},
+    {**QUOTE, "labor_rate": "abc"},
+    {**QUOTE, "labor_rate": True},
+]
+
+
+@pytest.mark.parametrize("path", ["/quotes", "/price", "/export", "/sheet"])
+@pytest.mark.parametrize("body", BAD_QUOTES)
+def test_bad_body_is_400(server, path, body):
+    status, data = request(server, "POST", path, body)
+    assert status == 400
+    assert set(data) == {"error"}
+
+
+@pytest.mark.parametrize("path", ["/quotes", "/price"])
+@pytest.mark.parametrize("body", [{"quotes": QUOTE}, {"quotes": [1]}, {"quotes": [QUOTE, {**QUOTE, "car": [1]}]}])
+def test_bad_quote_list_is_400(server, path, body):
+    status, _ = request(server, "POST", path, body)
+    assert status == 400
+
+
+def test_bad_json_is_400(server):
+    status, data = request(server, "POST", "/price", b"{bad")
+    assert status == 400 and "line" not in data["error"]
+
+
+def test_price_rejects_bad_default_rate(server):
+    status, _ = request(server, "POST", "/price", {"quotes": [QUOTE], "default_labor_rate": "abc"})
+    assert status == 400
+
+
+def test_price_matches_engine(server):
+    quotes = [QUOTE, {**QUOTE, "labor_rate": 5000, "material": [], "id": "X"}]
+    status, data = request(server, "POST", "/price", {"quotes": quotes})
+    assert status == 200
+    expected = price_snapshots([{**q, "id": i} for i, q in enumerate(quotes)])
+    assert [r["id"] for r in data["results"]] == [None, "X"]
+    for result, (_, row) in zip(data["results"], expected.iterrows()):
+        for col in ("재료비합계", "가공비합계", "합계"):
+            assert result[col] == pytest.approx(row[col])
+    # 가공비 = 36초 / 3600 × 임율 × 인 2 (실제 공정 컬럼이 계산에 들어감)
+    assert data["results"][0]["가공비합계"] == pytest.approx(36 / 3600 * 3500 * 2)
+    assert data["results"][1]["가공비합계"] == pytest.approx(36 / 3600 * 5000 * 2)
+
+
+def test_export(server):
+    status, data = request(server, "POST", "/export", QUOTE)
+    assert status == 200 and data[:2] == b"PK"
+
+
+def test_internal_error_hides_details(server, tmp_path, capsys):
+    server.service.template_path = str(tmp_path / "missing_template.xlsx")
+    status, data = request(server, "POST", "/export", QUOTE)
+    assert status == 500
+    assert "missing_template" not in json.dumps(data, ensure_ascii=False)
+    assert "missing_template" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("token", [None, "", "wrong", TOKEN + "x", "s\u00e9cret"])
+def test_token_required(server, token):
+    status, _ = request(server, "GET", "/health", token=token)
+    assert status == 401
+    status, _ = request(server, "GET", "/health")
+    assert status == 200
+
+
+@pytest.mark.parametrize("length", ["abc", "-1", "1.5"])
+def test_bad_content_length_is_400(server, length):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    conn.putrequest("POST", "/price")
+    conn.putheader("Authorization", f"Bearer {TOKEN}")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    resp = conn.getresponse()
+    assert resp.status == 400
+    assert "error" in json.loads(resp.read())
+    assert resp.getheader("Connection") == "close"
+    conn.close()
+
+
+def test_head(server, monkeypatch):
+    status, data = request(server, "POST", "/quotes", QUOTE)
+    snap_id = data["ids"][0]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("HEAD 에서 생성 / 계산을 하면 안 됨")
+
+    monkeypatch.setattr(server.service, "export", fail)
+    monkeypatch.setattr(server.service, "sheet", fail)
+    for path in (f"/quotes/{snap_id}/export", f"/quotes/{snap_id}/sheet"):
+        assert request(server, "HEAD", path)[0] == 405
+    assert request(server, "HEAD", "/health") == (200, b"")
+    assert request(server, "HEAD", f"/quotes/{snap_id}")[0] == 200
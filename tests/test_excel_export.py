@@ -0,0 +1,64 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from cost_engine import calc_material
+from detail_sheet import DETAIL_SHEET_NAME
+from excel_export import EXPORT_ENGINES, build_excel
+from formula_eval import FormulaGraph
+
+HEADER = {"p_no": "96240-BQ000", "p_name": "TEST", "car": "SV1", "company": "TEST", "labor_rate": 3500}
+
+
+def _material(n: int) -> pd.DataFrame:
+    """템플릿 수식(L=H*I, Q=L+N)과 cost_engine 재료비가 같아지는 행 (U/S 1, LOSS / 부대비용 0)"""
+    return pd.DataFrame({
+        "부품명": [f"P{i}" for i in range(n)],
+        "부품코드": [f"C{i}" for i in range(n)],
+        "U/S": 1.0,
+        "단가": 100.0,
+        "NET(g,mm)": 1.0,
+        "자재LOSS율(%)": 0.0,
+        "산업폐기물처리비용": 0.0,
+        "다이캐스팅LOSS인정": 0.0,
+    })
+
+
+@pytest.mark.parametrize("engine", EXPORT_ENGINES)
+@pytest.mark.parametrize("n", [14, 15, 16, 17])
+def test_material_total_includes_every_row(template_path, engine, n):
+    material = _material(n)
+    data = build_excel(HEADER, material, pd.DataFrame(), template_path=template_path, engine=engine).getvalue()
+    wb = load_workbook(BytesIO(data))
+    ws = wb.worksheets[0]
+
+    # Q24 합계 수식은 그대로, 자재 행이 합계 행에 들어가지 않음
+    assert ws["Q24"].value == "=SUM(Q9:Q23)"
+    assert not ws["F24"].value
+    # 시트 수식으로 계산한 Q24 = 엔진 재료비 합계
+    total = FormulaGraph.from_worksheet(ws).base().value("Q24")
+    assert total == pytest.approx(calc_material(material)["재료비"].sum())
+    assert total == pytest.approx(100.0 * n)
+
+    if n > 14:
+        assert DETAIL_SHEET_NAME in wb.sheetnames
+        assert str(ws["F23"].value).endswith(f"{n - 14}건 누계")
+    else:
+        assert DETAIL_SHEET_NAME not in wb.sheetnames
+
+
+@pytest.mark.parametrize("n", [14, 16])
+def test_xml_export_cached_total(template_path, n):
+    data = build_excel(HEADER, _material(n), pd.DataFrame(), template_path=template_path, engine="xml").getvalue()
+    ws = load_workbook(BytesIO(data), data_only=True).worksheets[0]
+    assert ws["Q24"].value == pytest.approx(100.0 * n)
+
+
+def test_default_engine_writes_cached_values(template_path):
+    # 기본 방식(xml)은 수식 셀에 계산 값을 기록 - 엑셀 없이 읽어도 합계가 보임
+    data = build_excel(HEADER, _material(3), pd.DataFrame(), template_path=template_path).getvalue()
+    ws = load_workbook(BytesIO(data), data_only=True).worksheets[0]
+    assert ws["Q24"].value == pytest.approx(300.0)
+    assert ws["O62"].value is not None
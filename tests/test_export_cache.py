@@ -0,0 +1,89 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cost_engine
+from export_cache import ExportCache, build_excel_cached, export_key
+from rate_table import save_rate_table
+
+HEADER = {"p_no": "96240-BQ000", "p_name": "TEST", "car": "SV1", "company": "TEST", "labor_rate": 3500,
+          "saved_at": "2025-06-01 10:00:00"}
+MATERIAL = pd.DataFrame({"부품명": ["A", "B"], "U/S": [1, 2], "단가": [100, 250.5], "NET(g,mm)": [1.0, 0.5]})
+PROCESS = pd.DataFrame({"공정명": ["조립"], "사용기계": ["수작업"], "C/T": [10], "인원": [1]})
+
+
+def key(header=HEADER, material=MATERIAL, process=PROCESS, **kwargs):
+    return export_key(header, material, process, **kwargs)
+
+
+@pytest.fixture
+def float_mode():
+    mode = cost_engine.money_mode()
+    cost_engine.set_money_mode("float")
+    yield
+    cost_engine.set_money_mode(mode)
+
+
+def test_key_ignores_representation(template_path, float_mode):
+    base = key(template_path=template_path)
+    # 컬럼 순서 / 정수·실수 / numpy 타입 / 인덱스 / 헤더 순서가 달라도 같은 키
+    reordered = MATERIAL[list(reversed(MATERIAL.columns))]
+    as_float = MATERIAL.astype({"U/S": float, "단가": float})
+    as_numpy = MATERIAL.assign(**{"U/S": np.array([1, 2], dtype=np.int32)}).set_index(pd.Index([7, 9]))
+    header = dict(reversed(list({**HEADER, "labor_rate": 3500.0}.items())))
+    assert key(material=reordered, template_path=template_path) == base
+    assert key(material=as_float, template_path=template_path) == base
+    assert key(material=as_numpy, template_path=template_path) == base
+    assert key(header=header, template_path=template_path) == base
+
+    # 빈 칸: NaN (편집기 / 저장 JSON) 과 None (API 의 null) 은 같은 키
+    with_nan = MATERIAL.assign(**{"자재LOSS율(%)": [np.nan, 1.5]})
+    with_none = MATERIAL.assign(**{"자재LOSS율(%)": pd.Series([None, 1.5], dtype=object)})
+    assert key(material=with_nan, template_path=template_path) == key(material=with_none, template_path=template_path)
+    assert key(material=with_nan, template_path=template_path) != base
+    assert key(header={**HEADER, "labor_rate": float("nan")}, template_path=template_path) == \
+        key(header={**HEADER, "labor_rate": None}, template_path=template_path)
+    assert key(template_path=template_path) == base
+
+
+def test_key_changes_with_content(template_path, tmp_path, float_mode):
+    base = key(template_path=template_path)
+    changed_material = MATERIAL.assign(단가=[100, 250.6])
+    changed_rows = pd.concat([MATERIAL, MATERIAL.iloc[:1]], ignore_index=True)
+    assert key(material=changed_material, template_path=template_path) != base
+    assert key(material=changed_rows, template_path=template_path) != base
+    assert key(header={**HEADER, "p_name": "X"}, template_path=template_path) != base
+    assert key(template_path=template_path, engine="openpyxl") != base
+
+    # 같은 내용의 템플릿 사본은 같은 키, 내용이 다르면 다른 키
+    copy = tmp_path / "copy.xlsx"
+    shutil.copy(template_path, copy)
+    assert key(template_path=str(copy)) == base
+    copy.write_bytes(copy.read_bytes() + b"\0")
+    assert key(template_path=str(copy)) != base
+
+    cost_engine.set_money_mode("exact")
+    assert key(template_path=template_path) != base
+
+
+def test_key_follows_rate_table(template_path, float_mode):
+    base = key(template_path=template_path)
+    rates = pd.DataFrame({"사용기계": ["수작업"], "공정명": ["조립"], "임율(원/HR)": [4000],
+                          "적용시작": ["2025-01-01"], "적용종료": [""]})
+    save_rate_table(rates)
+    with_rates = key(template_path=template_path)
+    assert with_rates != base
+    # 임율표가 있으면 적용 기준일(저장일)도 키에 들어감
+    assert key(header={**HEADER, "saved_at": "2025-06-02"}, template_path=template_path) != with_rates
+
+
+def test_cached_build_reuses_bytes(template_path, float_mode):
+    cache = ExportCache(folder=None)
+    first = build_excel_cached(cache, HEADER, MATERIAL, PROCESS, template_path=template_path).getvalue()
+    second = build_excel_cached(cache, HEADER, MATERIAL.astype(float, errors="ignore"), PROCESS,
+                                template_path=template_path).getvalue()
+    assert first == second
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["memory_hits"] == 1
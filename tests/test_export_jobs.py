@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from export_jobs import STATUS_DONE, STATUS_FAILED, STATUS_TIMEOUT, ExportJobQueue, ExportQueueFull
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "시간 안에 조건이 맞지 않음"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def queue_factory():
+    queues = []
+
+    def make(**kwargs):
+        queue = ExportJobQueue(**kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown(wait=False)
+
+
+def test_result_and_failure(queue_factory):
+    queue = queue_factory(workers=1)
+    ok = queue.submit("a", lambda x: x * 2, 21)
+    bad = queue.submit("b", lambda: 1 / 0)
+    wait_for(lambda: not queue.get(ok).active and not queue.get(bad).active)
+    assert queue.get(ok).status == STATUS_DONE and queue.get(ok).result == 42
+    assert queue.get(bad).status == STATUS_FAILED and "ZeroDivisionError" in queue.get(bad).error
+
+
+def test_total_and_per_user_limits(queue_factory):
+    gate = threading.Event()
+    queue = queue_factory(workers=1, max_queued=3, per_user=2)
+    queue.submit("a", gate.wait)
+    queue.submit("a", gate.wait)
+    with pytest.raises(ExportQueueFull):
+        queue.submit("a", gate.wait)  # 사용자별 2건
+    queue.submit("b", gate.wait)
+    with pytest.raises(ExportQueueFull):
+        queue.submit("c", gate.wait)  # 전체 3건
+    gate.set()
+    wait_for(lambda: queue.stats()[STATUS_DONE] == 3)
+    queue.submit("c", lambda: None)
+
+
+def test_round_robin_between_users(queue_factory):
+    gate = threading.Event()
+    order = []
+    queue = queue_factory(workers=1, per_user=5)
+    first = queue.submit("a", gate.wait)
+    wait_for(lambda: queue.get(first).running)
+    for owner, name in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")]:
+        queue.submit(owner, order.append, name)
+    gate.set()
+    wait_for(lambda: len(order) == 4)
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+def test_timed_out_job_keeps_its_slot_until_the_worker_returns(queue_factory):
+    gate = threading.Event()
+    queue = queue_factory(workers=1, max_queued=1, per_user=1, timeout=0.05)
+    stuck = queue.submit("a", gate.wait)
+    wait_for(lambda: queue.get(stuck).status == STATUS_TIMEOUT)
+    job = queue.get(stuck)
+    assert job.running and queue.stats()["busy"] == 1
+    # 워커가 아직 멈춘 작업을 실행 중 → 자리가 없음 (다른 사용자도)
+    with pytest.raises(ExportQueueFull):
+        queue.submit("b", lambda: None)
+    gate.set()
+    wait_for(lambda: not job.running)
+    assert job.status == STATUS_TIMEOUT and job.result is None  # 늦게 끝난 결과는 버림
+    # 워커 스레드 수는 그대로
+    assert queue.stats()["workers"] == 1
+    queue.timeout = 10
+    done = queue.submit("b", lambda: "ok")
+    wait_for(lambda: queue.get(done).status == STATUS_DONE)
+    assert queue.get(done).result == "ok"
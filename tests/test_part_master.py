@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from part_master import PartMaster
+
+
+@pytest.fixture
+def master(workdir):
+    master = PartMaster("parts.db")
+    master.upsert_rows(pd.DataFrame({
+        "code": ["C1", "C2"], "name": ["A", "B"], "spec": ["AL", "PA66"], "unit": ["EA", "KG"],
+        "price": [50.0, 80.0], "updated_at": ["2025-01-01", "2025-01-01"],
+    }))
+    return master
+
+
+def _bom(codes, price=np.nan, spec=None):
+    return pd.DataFrame({
+        "부품명": [f"P{i}" for i in range(len(codes))], "부품코드": codes,
+        "재질/규격": spec, "단위": None, "단가": price,
+    })
+
+
+def test_new_code_fills_blank_cells(master):
+    before = _bom([None])
+    after = _bom(["C1"])
+    filled_df, filled = master.autofill(after, rows={0}, previous=before)
+    assert filled == 3
+    assert filled_df.loc[0, ["재질/규격", "단위", "단가"]].tolist() == ["AL", "EA", 50.0]
+
+
+def test_typed_values_are_kept(master):
+    filled_df, filled = master.autofill(_bom(["C1"], price=99.0, spec="SUS"), rows={0}, previous=_bom([None]))
+    assert filled == 1 and filled_df.loc[0, "단가"] == 99.0 and filled_df.loc[0, "재질/규격"] == "SUS"
+
+
+def test_user_cleared_cell_is_not_refilled(master):
+    filled_df, _ = master.autofill(_bom(["C1"]), rows={0}, previous=_bom([None]))
+    cleared = filled_df.copy()
+    cleared.loc[0, "단가"] = np.nan
+    # 같은 행이 편집 상태에 계속 남아 있어도 부품코드가 그대로면 채우지 않음
+    again, filled = master.autofill(cleared, rows={0}, previous=filled_df)
+    assert filled == 0 and np.isnan(again.loc[0, "단가"])
+    # 부품코드를 바꾸면 비어 있는 칸을 다시 채움
+    changed = cleared.copy()
+    changed.loc[0, "부품코드"] = "C2"
+    refilled, filled = master.autofill(changed, rows={0}, previous=cleared)
+    assert filled == 1 and refilled.loc[0, "단가"] == 80.0
+
+
+def test_added_rows_are_filled(master):
+    previous = _bom(["C1"], price=50.0, spec="AL")
+    previous["단위"] = "EA"
+    added = pd.concat([previous, _bom(["C2"])], ignore_index=True)
+    filled_df, filled = master.autofill(added, rows={1}, previous=previous)
+    assert filled == 3 and filled_df.loc[1, "단가"] == 80.0
@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import ROOT
+from quote_store import SCHEMA_VERSION, QuoteStore, open_store
+
+LEGACY_JSON = os.path.join(ROOT, "saved_results.json")
+
+
+def _snapshot(i: int, **fields) -> dict:
+    return {
+        "id": f"2025010100{i:04d}", "saved_at": f"2025-01-01 00:{i // 60:02d}:{i % 60:02d}",
+        "p_no": f"P{i % 3}", "p_name": "TEST", "car": "SV1", "company": "TEST", "labor_rate": 3500,
+        "material": [{"부품명": "P", "U/S": 1, "단가": 100 + i, "NET(g,mm)": 1}], "process": [],
+        **fields,
+    }
+
+
+def test_new_store_schema(workdir):
+    QuoteStore("q.db")
+    conn = sqlite3.connect("q.db")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION == 1
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"quotes", "quote_payloads", "store_info"} <= tables
+    conn.close()
+
+
+def test_newer_schema_is_rejected(workdir):
+    QuoteStore("q.db")
+    conn = sqlite3.connect("q.db")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError):
+        QuoteStore("q.db")
+
+
+def test_legacy_json_is_imported_once(workdir):
+    shutil.copy(LEGACY_JSON, "saved_results.json")
+    with open(LEGACY_JSON, encoding="utf-8") as f:
+        legacy = json.load(f)
+
+    store = open_store("q.db", "saved_results.json")
+    assert store.count() == len(legacy)
+    first = legacy[0]
+    saved = store.get(first["id"])
+    assert saved["material"] == first["material"] and saved["process"] == first["process"]
+    meta = store.list_meta(ids=[first["id"]])[0]
+    assert meta["total"] == pytest.approx(meta["material_total"] + meta["process_total"])
+
+    # 다시 열어도 두 번 옮기지 않음
+    store = open_store("q.db", "saved_results.json")
+    assert store.count() == len(legacy)
+
+
+def test_broken_legacy_json_is_not_marked_done(workdir):
+    with open("saved_results.json", "w", encoding="utf-8") as f:
+        f.write("[{")
+    with pytest.raises(ValueError):
+        open_store("q.db", "saved_results.json")
+    with open("saved_results.json", "w", encoding="utf-8") as f:
+        json.dump([_snapshot(1)], f)
+    assert open_store("q.db", "saved_results.json").count() == 1
+
+
+def test_duplicate_ids_get_suffix(workdir):
+    store = QuoteStore("q.db")
+    ids = store.append_many([_snapshot(1), _snapshot(1)])
+    assert ids == [_snapshot(1)["id"], _snapshot(1)["id"] + "_1"]
+    assert store.get(ids[1])["id"] == ids[1]
+
+
+def test_keyset_pages_cover_everything_once(workdir):
+    store = QuoteStore("q.db")
+    ids = store.append_many([_snapshot(i) for i in range(25)])
+    seen, before, pages = [], None, 0
+    while True:
+        items, total, before = store.list_page(10, before=before)
+        assert total == 25
+        seen += [item["id"] for item in items]
+        pages += 1
+        if before is None:
+            break
+    assert pages == 3 and seen == ids[::-1]
+
+
+def test_keyset_page_with_filter_and_new_rows(workdir):
+    store = QuoteStore("q.db")
+    store.append_many([_snapshot(i) for i in range(12)])
+    first, total, before = store.list_page(2, p_no="P0")
+    assert total == 4 and [item["p_no"] for item in first] == ["P0", "P0"]
+    # 앞 페이지를 본 뒤 새로 저장돼도 다음 페이지는 밀리지 않음
+    store.append(_snapshot(100, p_no="P0"))
+    second, total, after = store.list_page(2, before=before, p_no="P0")
+    assert total == 5 and after is None
+    assert {item["id"] for item in second}.isdisjoint(item["id"] for item in first)
+    assert store.list_page(2, p_no="P0", with_total=False)[1] is None
+
+
+def test_count_cache_follows_appends(workdir):
+    store = QuoteStore("q.db")
+    store.append_many([_snapshot(i) for i in range(3)])
+    assert store.count(search="TEST") == 3
+    assert store.count(search="TEST") == 3
+    store.append(_snapshot(3))
+    assert store.count(search="TEST") == 4
+    # 다른 연결(프로세스)이 저장해도 마지막 seq 가 바뀌므로 다시 셈
+    QuoteStore("q.db").append(_snapshot(4))
+    assert store.count(search="TEST") == 5
+
+
+@pytest.mark.parametrize("save", [
+    lambda store: store.append(_snapshot(1)),
+    lambda store: store.append_many([_snapshot(i) for i in range(3)]),
+])
+def test_totals_are_priced_outside_the_write_lock(workdir, monkeypatch, save):
+    import quote_store
+
+    store = QuoteStore("q.db")
+    real = quote_store.snapshot_totals
+
+    def pricing_while_other_writer_saves(snapshots):
+        # 합계 계산 중에 다른 저장이 쓰기 잠금을 바로 잡을 수 있어야 함
+        other = sqlite3.connect("q.db", timeout=0)
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+        other.close()
+        return real(snapshots)
+
+    monkeypatch.setattr(quote_store, "snapshot_totals", pricing_while_other_writer_saves)
+    save(store)
+    meta = store.list_meta()[0]
+    assert meta["material_total"] == pytest.approx(100 + int(meta["id"][-4:]))
@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+from part_master import PartMaster
+from quote_store import QuoteStore
+from sqlite_db import connect, enable_wal
+
+
+def test_wal_and_rollback(workdir):
+    enable_wal("t.db")
+    with connect("t.db", write=True) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(ValueError):
+        with connect("t.db", write=True) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise ValueError("중간 실패")
+    with connect("t.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_write_lock_is_taken_up_front(workdir):
+    enable_wal("t.db")
+    with connect("t.db", write=True) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    with connect("t.db", write=True):
+        other = sqlite3.connect("t.db", timeout=0)
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute("BEGIN IMMEDIATE")
+        # 읽기는 쓰기 잠금을 기다리지 않음 (WAL)
+        assert other.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        other.close()
+
+
+@pytest.mark.parametrize("cls", [QuoteStore, PartMaster])
+def test_stores_open_in_wal_mode(workdir, cls):
+    cls("s.db")
+    conn = sqlite3.connect("s.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
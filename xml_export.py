@@ -0,0 +1,505 @@
+# =========================================================
+# [엑셀 생성 - XML 직접 수정] openpyxl 전체 로드/저장 없이 템플릿 채우기
+# =========================================================
+# - .xlsx 를 ZIP 으로 다루어, 대상 시트 XML 과 계산 관련 파트만 새로 쓰고
+#   나머지 파트(스타일, 외부 링크, 이름 정의 등)는 압축된 바이트 그대로 복사한다.
+# - 어떤 셀에 무엇을 쓸지는 excel_export.fill_sheet 를 기록용 시트에 실행해서 얻으므로
+#   openpyxl 경로와 같은 값을 같은 위치에 쓴다.
+# - 시트 XML 은 값이 바뀌는 <row>/<c> 요소만 다시 만들고 나머지 문자열은 그대로 둔다.
+#
+# - 남은 수식 셀에는 formula_eval 로 계산한 값을 캐시 값(<v>)으로 적는다 (계산할 수 없는 수식은 <v> 를 지움).
+#   엑셀이 없는 곳(pandas, 미리보기)에서도 합계가 보이고, 엑셀은 열 때 다시 계산한다.
+#
+# 함께 바뀌는 파트
+#   xl/workbook.xml   : <calcPr fullCalcOnLoad="1"> (열 때 수식 재계산, 템플릿당 1회만 압축)
+#   xl/calcChain.xml  : 값으로 덮어쓴 수식 셀 항목 제거
+#   (양식보다 행이 많을 때) 상세내역 시트 파트 추가 + workbook.xml / 관계 / [Content_Types].xml 에 등록
+import copy
+import re
+import struct
+import threading
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from detail_sheet import DETAIL_COL_WIDTHS, DETAIL_SHEET_NAME
+from formula_eval import UNKNOWN, ExcelError
+from perf_timing import timed
+from template_layout import TEMPLATE_FILE, get_template
+
+
+class XmlPatchError(Exception):
+    """XML 직접 수정으로 처리할 수 없는 템플릿/입력 (openpyxl 경로로 대체)"""
+
+
+_ROW_RE = re.compile(r'<row\b[^>]*?(?:/>|>.*?</row>)', re.S)
+_CELL_RE = re.compile(r'<c\b[^>]*?(?:/>|>.*?</c>)', re.S)
+_ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+_SHARED_F_RE = re.compile(r'<f\b([^>]*)t="shared"([^>]*?)(?:/>|>(.*?)</f>)', re.S)
+_F_RE = re.compile(r'<f\b[^>]*?(?:/>|>.*?</f>)', re.S)
+_CHAIN_C_RE = re.compile(r'<c\b[^>]*/>')
+
+
+def _split_coord(ref: str):
+    m = re.match(r'([A-Z]+)(\d+)$', ref)
+    return int(m.group(2)), column_index_from_string(m.group(1))
+
+
+def _attrs(tag: str) -> dict:
+    return dict(_ATTR_RE.findall(tag[: tag.index(">") + 1]))
+
+
+# =========================================================
+# [1] fill_sheet 가 쓰는 셀 값 기록
+# =========================================================
+class _RecordedCell:
+    __slots__ = ("_sheet", "_key")
+
+    def __init__(self, sheet, key):
+        self._sheet = sheet
+        self._key = key
+
+    @property
+    def value(self):
+        return self._sheet.writes.get(self._key)
+
+    @value.setter
+    def value(self, value):
+        if self._key in self._sheet.merged:
+            raise AttributeError("병합된 셀")  # openpyxl MergedCell 과 동일하게 무시됨
+        if isinstance(value, str) and ILLEGAL_CHARACTERS_RE.search(value):
+            raise ValueError("엑셀에 쓸 수 없는 문자")
+        self._sheet.writes[self._key] = value
+
+
+class RecordingSheet:
+    """openpyxl 워크시트 대신 fill_sheet 에 넘겨 기록된 값만 모으는 시트
+
+    읽기는 이번 기록에서 쓴 값만 돌려준다. (fill_sheet 가 읽는 가공비 공정명 칸은
+    항상 먼저 비우고 시작하므로 템플릿 원래 값을 알 필요가 없다.)
+    """
+
+    def __init__(self, merged: set):
+        self.merged = merged
+        self.writes: dict[tuple[int, int], object] = {}
+
+    def cell(self, row, column):
+        return _RecordedCell(self, (row, column))
+
+
+# =========================================================
+# [2] 셀 / 행 XML 만들기
+# =========================================================
+def _cell_xml(ref: str, attrs: dict, value) -> str:
+    """값을 담은 <c> 요소 (기존 스타일 등 속성 유지, 수식은 제거)"""
+    keep = "".join(f' {k}="{v}"' for k, v in attrs.items() if k not in ("r", "t"))
+    if value is None or value == "":
+        return f'<c r="{ref}"{keep}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{keep} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, str):
+        space = ' xml:space="preserve"' if value != value.strip() or "\n" in value else ""
+        return f'<c r="{ref}"{keep} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return _cell_xml(ref, attrs, str(value))
+    if number != number or number in (float("inf"), float("-inf")):
+        return f'<c r="{ref}"{keep}/>'  # NaN / inf 는 빈 셀
+    return f'<c r="{ref}"{keep}><v>{"%.16g" % number}</v></c>'  # openpyxl 과 같은 자릿수
+
+
+def _formula_cell_xml(cell: str, value) -> str:
+    """수식 셀의 캐시 값(<v>) 교체 (UNKNOWN 이면 캐시 값 제거 → 엑셀이 계산)"""
+    attrs = _attrs(cell)
+    keep = "".join(f' {k}="{v}"' for k, v in attrs.items() if k != "t")
+    formula = _F_RE.search(cell).group(0)
+    if value is UNKNOWN:
+        return f"<c{keep}>{formula}</c>"
+    if isinstance(value, bool):
+        kind, text = ' t="b"', str(int(value))
+    elif isinstance(value, ExcelError):
+        kind, text = ' t="e"', value.code
+    elif isinstance(value, str):
+        kind, text = ' t="str"', escape(value)
+    else:
+        kind, text = "", repr(float(value)).removesuffix(".0")
+    return f"<c{keep}{kind}>{formula}<v>{text}</v></c>"
+
+
+_WORKSHEET_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+_WORKSHEET_CONTENT = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+
+def detail_sheet_xml(rows: list, breaks: list) -> str:
+    """상세내역 시트 XML 을 행 목록에서 한 번에 생성 (detail_sheet.write_detail_sheet 와 같은 내용)"""
+    letters = [get_column_letter(i) for i in range(1, max((len(r) for r in rows), default=0) + 1)]
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><cols>'
+    ]
+    parts += [f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>' for i, w in enumerate(DETAIL_COL_WIDTHS, start=1)]
+    parts.append("</cols><sheetData>")
+    empty = {}
+    for r, row in enumerate(rows, start=1):
+        cells = "".join(_cell_xml(f"{letters[c]}{r}", empty, v) for c, v in enumerate(row) if v is not None and v != "")
+        if cells:
+            parts.append(f'<row r="{r}">{cells}</row>')
+    parts.append("</sheetData>")
+    if breaks:
+        parts.append(f'<rowBreaks count="{len(breaks)}" manualBreakCount="{len(breaks)}">')
+        parts += [f'<brk id="{r}" max="16383" man="1"/>' for r in breaks]
+        parts.append("</rowBreaks>")
+    parts.append("</worksheet>")
+    return "".join(parts)
+
+
+class _SheetPatcher:
+    """시트 XML 의 sheetData 를 행 단위로 훑으며 기록된 셀 / 수식 셀 캐시 값만 교체
+
+    cached: 수식 셀의 계산 값 {(행, 열): 값} (SheetCalc.formula_values)
+    """
+
+    def __init__(self, writes: dict, cached: dict = None):
+        self.by_row: dict[int, dict[int, object]] = {}
+        for (r, c), v in writes.items():
+            self.by_row.setdefault(r, {})[c] = v
+        self.cached_by_row: dict[int, dict[int, object]] = {}
+        for (r, c), v in (cached or {}).items():
+            self.cached_by_row.setdefault(r, {})[c] = v
+        self.removed_formulas: set[str] = set()
+        # 값으로 덮어써진 공유 수식 마스터: si → (수식, 마스터 좌표)
+        self.orphaned_shared: dict[str, tuple[str, str]] = {}
+
+    def _expand_shared(self, cell: str, ref: str) -> str:
+        """마스터가 사라진 공유 수식 셀을 일반 수식으로 풀어 쓰기"""
+        m = _SHARED_F_RE.search(cell)
+        if not m:
+            return cell
+        si = _attrs("<f" + m.group(1) + m.group(2) + ">").get("si")
+        if si not in self.orphaned_shared:
+            return cell
+        formula, origin = self.orphaned_shared[si]
+        translated = Translator("=" + formula, origin=origin).translate_formula(ref)[1:]
+        return cell[: m.start()] + f"<f>{escape(translated)}</f>" + cell[m.end():]
+
+    def _patch_cell(self, cell: str, writes: dict, cached: dict) -> str:
+        attrs = _attrs(cell)
+        ref = attrs["r"]
+        _, col = _split_coord(ref)
+        if col not in writes:
+            if self.orphaned_shared:
+                cell = self._expand_shared(cell, ref)
+            if col in cached and "<f" in cell:
+                cell = _formula_cell_xml(cell, cached[col])
+            return cell
+        if "<f" in cell:
+            self.removed_formulas.add(ref)
+            m = _SHARED_F_RE.search(cell)
+            if m and m.group(3) is not None:
+                si = _attrs("<f" + m.group(1) + m.group(2) + ">").get("si")
+                self.orphaned_shared[si] = (m.group(3), ref)
+        return _cell_xml(ref, attrs, writes.pop(col))
+
+    def _patch_row(self, row_xml: str, row_no: int) -> str:
+        writes = dict(self.by_row.pop(row_no, {}))
+        cached = self.cached_by_row.get(row_no, {})
+        if not writes and not cached and not self.orphaned_shared:
+            return row_xml
+        if row_xml.endswith("/>"):
+            head, body, tail = row_xml[:-2] + ">", "", "</row>"
+        else:
+            head_end = row_xml.index(">") + 1
+            head, body, tail = row_xml[:head_end], row_xml[head_end:-len("</row>")], "</row>"
+
+        parts = []
+        for cell in _CELL_RE.findall(body):
+            col = _split_coord(_attrs(cell)["r"])[1]
+            # 템플릿에 없던 셀은 열 순서에 맞게 끼워 넣는다
+            for new_col in sorted(c for c in writes if c < col):
+                parts.append(_cell_xml(f"{get_column_letter(new_col)}{row_no}", {}, writes.pop(new_col)))
+            parts.append(self._patch_cell(cell, writes, cached))
+        for new_col in sorted(writes):
+            parts.append(_cell_xml(f"{get_column_letter(new_col)}{row_no}", {}, writes[new_col]))
+        return head + "".join(parts) + tail
+
+    def patch(self, sheet_xml: str) -> str:
+        start = sheet_xml.index("<sheetData")
+        end = sheet_xml.index("</sheetData>") if "</sheetData>" in sheet_xml else None
+        if end is None:
+            raise XmlPatchError("빈 sheetData 는 지원하지 않습니다.")
+        body_start = sheet_xml.index(">", start) + 1
+        out, pos = [], body_start
+        for m in _ROW_RE.finditer(sheet_xml, body_start, end):
+            row_no = int(_attrs(m.group(0))["r"])
+            # 템플릿에 없던 행
+            for new_row in sorted(r for r in self.by_row if r < row_no):
+                out.append(sheet_xml[pos:m.start()])
+                pos = m.start()
+                out.append(self._patch_row(f'<row r="{new_row}"/>', new_row))
+            out.append(sheet_xml[pos:m.start()])
+            out.append(self._patch_row(m.group(0), row_no))
+            pos = m.end()
+        out.append(sheet_xml[pos:end])
+        for new_row in sorted(self.by_row):
+            out.append(self._patch_row(f'<row r="{new_row}"/>', new_row))
+        return sheet_xml[:body_start] + "".join(out) + sheet_xml[end:]
+
+
+def _patch_calc_chain(xml: str, sheet_id: str, removed: set) -> str:
+    """calcChain 에서 수식이 사라진 셀 항목 제거 (생략된 i 속성은 명시적으로 채움)"""
+    if not removed:
+        return xml
+    current_i = None
+    kept = []
+    for entry in _CHAIN_C_RE.findall(xml):
+        attrs = _attrs(entry)
+        current_i = attrs.get("i", current_i)
+        if current_i == sheet_id and attrs.get("r") in removed:
+            continue
+        attrs["i"] = current_i
+        kept.append("<c " + " ".join(f'{k}="{v}"' for k, v in attrs.items() if v is not None) + "/>")
+    head = xml[: xml.index("<c ")] if "<c " in xml else xml[: xml.index("</calcChain>")]
+    return head + "".join(kept) + "</calcChain>"
+
+
+# =========================================================
+# [3] 템플릿 ZIP 파트 캐시
+# =========================================================
+def _raw_entry(data: bytes, info: zipfile.ZipInfo) -> bytes:
+    """ZIP 안의 한 파트를 로컬 헤더 + 압축 데이터 그대로 잘라내기"""
+    offset = info.header_offset
+    header = struct.unpack(zipfile.structFileHeader, data[offset: offset + zipfile.sizeFileHeader])
+    start = offset + zipfile.sizeFileHeader + header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH]
+    end = start + info.compress_size
+    if info.flag_bits & 0x08:
+        end += 16 if data[end: end + 4] == b"PK\x07\x08" else 12
+    return data[offset:end]
+
+
+def _compressed_entry(info: zipfile.ZipInfo, content: bytes):
+    """내용을 압축한 (ZipInfo, 로컬 엔트리 바이트) - 템플릿당 1회만 만드는 파트용"""
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(_new_info(info), content)
+    data = buf.getvalue()
+    new_info = zipfile.ZipFile(BytesIO(data)).infolist()[0]
+    return new_info, _raw_entry(data, new_info)
+
+
+def _new_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    new = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new.compress_type = zipfile.ZIP_DEFLATED
+    new.external_attr = info.external_attr
+    return new
+
+
+def _rel_target(rels_xml: str, rel_id: str) -> str:
+    for rel in re.findall(r"<Relationship\b[^>]*>", rels_xml):
+        attrs = _attrs(rel)
+        if attrs.get("Id") == rel_id:
+            target = attrs["Target"]
+            return target.lstrip("/") if target.startswith("/") else "xl/" + target
+    raise XmlPatchError(f"관계 {rel_id} 를 찾을 수 없습니다.")
+
+
+class XmlTemplate:
+    """템플릿 1개의 ZIP 파트 정보 (템플릿 해시당 1회 생성)"""
+
+    def __init__(self, data: bytes, sheet_name: str):
+        zf = zipfile.ZipFile(BytesIO(data))
+        self.data = data
+        self.infos = zf.infolist()
+        self.raw = {info.filename: _raw_entry(data, info) for info in self.infos}
+
+        workbook_xml = zf.read("xl/workbook.xml").decode("utf-8")
+        rels_xml = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+        sheet = next(
+            (_attrs(tag) for tag in re.findall(r"<sheet\b[^>]*>", workbook_xml)
+             if _attrs(tag).get("name") == escape(sheet_name, {'"': "&quot;"})),
+            None,
+        )
+        if sheet is None:
+            raise XmlPatchError(f"시트 {sheet_name} 를 찾을 수 없습니다.")
+        self.sheet_id = sheet["sheetId"]
+        self.sheet_path = _rel_target(rels_xml, sheet["r:id"])
+        self.sheet_xml = zf.read(self.sheet_path).decode("utf-8")
+
+        # 병합 셀 (왼쪽 위 셀 제외) - openpyxl 에서 값 쓰기가 무시되는 셀
+        self.merged = set()
+        for ref in re.findall(r'<mergeCell ref="([A-Z]+\d+:[A-Z]+\d+)"', self.sheet_xml):
+            (r1, c1), (r2, c2) = (_split_coord(p) for p in ref.split(":"))
+            self.merged.update((r, c) for r in range(r1, r2 + 1) for c in range(c1, c2 + 1))
+            self.merged.discard((r1, c1))
+
+        chain = re.search(r'<Relationship\b[^>]*relationships/calcChain"[^>]*>', rels_xml)
+        self.calc_chain_path = _rel_target(rels_xml, _attrs(chain.group(0))["Id"]) if chain else None
+        self.calc_chain_xml = zf.read(self.calc_chain_path).decode("utf-8") if chain else None
+
+        # 열 때 전체 재계산 (수식 입력 셀이 바뀌었으므로) - 큰 workbook.xml 은 여기서 한 번만 압축
+        if "fullCalcOnLoad" in workbook_xml:
+            self.workbook_entry = None
+        else:
+            if "<calcPr" in workbook_xml:
+                patched = re.sub(r"<calcPr\b", '<calcPr fullCalcOnLoad="1"', workbook_xml, count=1)
+            else:
+                patched = workbook_xml.replace("</workbook>", '<calcPr fullCalcOnLoad="1"/></workbook>')
+            info = zf.getinfo("xl/workbook.xml")
+            self.workbook_entry = _compressed_entry(info, patched.encode("utf-8"))
+        self._detail_parts = None
+        self._lock = threading.Lock()
+
+    def detail_parts(self) -> dict:
+        """상세내역 시트를 붙일 때 바뀌는 파트 {파트명: (ZipInfo, 로컬 엔트리 바이트)} + 새 시트 ZipInfo
+
+        처음 필요할 때 한 번만 만든다 (큰 workbook.xml 재압축).
+        """
+        with self._lock:
+            if self._detail_parts is None:
+                self._detail_parts = self._build_detail_parts()
+            return self._detail_parts
+
+    def _build_detail_parts(self) -> dict:
+        zf = zipfile.ZipFile(BytesIO(self.data))
+        workbook_xml = zf.read("xl/workbook.xml").decode("utf-8")
+        rels_xml = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+        types_xml = zf.read("[Content_Types].xml").decode("utf-8")
+        sheets = [_attrs(tag) for tag in re.findall(r"<sheet\b[^>]*>", workbook_xml)]
+        if any(sheet.get("name") == DETAIL_SHEET_NAME for sheet in sheets) or "</sheets>" not in workbook_xml:
+            raise XmlPatchError("상세내역 시트를 추가할 수 없는 템플릿입니다.")
+
+        sheet_id = max(int(sheet["sheetId"]) for sheet in sheets) + 1
+        rel_no = max((int(n) for n in re.findall(r'Id="rId(\d+)"', rels_xml)), default=0) + 1
+        names = {info.filename for info in self.infos}
+        part_no = next(n for n in range(1, len(names) + 2) if f"xl/worksheets/sheet{n}.xml" not in names)
+        sheet_path = f"xl/worksheets/sheet{part_no}.xml"
+
+        if "fullCalcOnLoad" not in workbook_xml:
+            if "<calcPr" in workbook_xml:
+                workbook_xml = re.sub(r"<calcPr\b", '<calcPr fullCalcOnLoad="1"', workbook_xml, count=1)
+            else:
+                workbook_xml = workbook_xml.replace("</workbook>", '<calcPr fullCalcOnLoad="1"/></workbook>')
+        workbook_xml = workbook_xml.replace(
+            "</sheets>", f'<sheet name="{DETAIL_SHEET_NAME}" sheetId="{sheet_id}" r:id="rId{rel_no}"/></sheets>', 1)
+        rels_xml = rels_xml.replace(
+            "</Relationships>",
+            f'<Relationship Id="rId{rel_no}" Type="{_WORKSHEET_TYPE}" Target="worksheets/sheet{part_no}.xml"/></Relationships>', 1)
+        types_xml = types_xml.replace(
+            "</Types>", f'<Override PartName="/{sheet_path}" ContentType="{_WORKSHEET_CONTENT}"/></Types>', 1)
+
+        parts = {
+            name: _compressed_entry(zf.getinfo(name), content.encode("utf-8"))
+            for name, content in (
+                ("xl/workbook.xml", workbook_xml),
+                ("xl/_rels/workbook.xml.rels", rels_xml),
+                ("[Content_Types].xml", types_xml),
+            )
+        }
+        parts["sheet_info"] = zipfile.ZipInfo(sheet_path, date_time=zf.getinfo(self.sheet_path).date_time)
+        return parts
+
+
+_XML_TEMPLATES: dict[str, XmlTemplate] = {}
+_XML_LOCK = threading.Lock()
+
+
+def get_xml_template(template_path: str = TEMPLATE_FILE):
+    """(TemplateCache, XmlTemplate) - 템플릿 해시별 캐시"""
+    cache = get_template(template_path)
+    xml_template = _XML_TEMPLATES.get(cache.digest)
+    if xml_template is None:
+        with _XML_LOCK:
+            xml_template = _XML_TEMPLATES.get(cache.digest)
+            if xml_template is None:
+                xml_template = XmlTemplate(cache.data, cache.layout.sheet_name)
+                _XML_TEMPLATES[cache.digest] = xml_template
+    return cache, xml_template
+
+
+# =========================================================
+# [4] 엑셀 생성
+# =========================================================
+def _write_zip(entries) -> BytesIO:
+    """entries: [(ZipInfo, 로컬 엔트리 바이트 or None, 내용 or None)] 순서대로 ZIP 작성
+
+    로컬 엔트리 바이트가 있으면 압축을 풀지 않고 그대로 복사한다.
+    """
+    out = BytesIO()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for info, raw, content in entries:
+            if raw is None:
+                zf.writestr(_new_info(info), content)
+                continue
+            copied = copy.copy(info)
+            out.seek(zf.start_dir)
+            copied.header_offset = out.tell()
+            out.write(raw)
+            zf.filelist.append(copied)
+            zf.NameToInfo[copied.filename] = copied
+            zf.start_dir = out.tell()
+    out.seek(0)
+    return out
+
+
+def record_writes(header: dict, material_df, process_df, template_path: str = TEMPLATE_FILE):
+    """fill_sheet 가 쓸 셀 값 {(행, 열): 값} 과 양식에 들어가지 못한 (재료비, 가공비) 행"""
+    from excel_export import fill_sheet
+
+    cache, xml_template = get_xml_template(template_path)
+    sheet = RecordingSheet(xml_template.merged)
+    overflow = fill_sheet(sheet, cache.layout, header, material_df, process_df)
+    return sheet.writes, overflow
+
+
+def evaluate_sheet(header: dict, material_df, process_df, template_path: str = TEMPLATE_FILE):
+    """원가계산서 시트를 채웠을 때의 셀 값 (formula_eval.SheetCalc) - 엑셀 파일을 만들지 않고 합계 확인용"""
+    cache = get_template(template_path)
+    writes, _ = record_writes(header, material_df, process_df, template_path)
+    with timed("export.formula_eval"):
+        return cache.formulas.recalculate(writes)
+
+
+def build_excel_xml(header: dict, material_df, process_df, template_path: str = TEMPLATE_FILE) -> BytesIO:
+    """시트 XML 직접 수정 방식으로 원가계산서 생성 (excel_export.build_excel 과 같은 내용 + 수식 캐시 값)"""
+    with timed("export.template_load"):
+        cache, xml_template = get_xml_template(template_path)
+    with timed("export.cell_writes"):
+        writes, overflow = record_writes(header, material_df, process_df, template_path)
+    with timed("export.formula_eval"):
+        cached = cache.formulas.recalculate(writes).formula_values()
+
+    detail_xml, detail_parts = None, {}
+    if any(len(part) for part in overflow):
+        from excel_export import overflow_rows
+
+        with timed("export.detail_sheet"):
+            detail_parts = xml_template.detail_parts()
+            detail_xml = detail_sheet_xml(*overflow_rows(header, material_df, process_df, overflow))
+
+    with timed("export.xml_patch"):
+        patcher = _SheetPatcher(writes, cached)
+        sheet_xml = patcher.patch(xml_template.sheet_xml)
+
+    entries = []
+    for info in xml_template.infos:
+        name = info.filename
+        if name == xml_template.sheet_path:
+            entries.append((info, None, sheet_xml.encode("utf-8")))
+        elif name in detail_parts:
+            entries.append(detail_parts[name] + (None,))
+        elif name == xml_template.calc_chain_path and patcher.removed_formulas:
+            chain = _patch_calc_chain(xml_template.calc_chain_xml, xml_template.sheet_id, patcher.removed_formulas)
+            entries.append((info, None, chain.encode("utf-8")))
+        elif name == "xl/workbook.xml" and xml_template.workbook_entry is not None:
+            entries.append(xml_template.workbook_entry + (None,))
+        else:
+            entries.append((info, xml_template.raw[name], None))
+    if detail_xml is not None:
+        entries.append((detail_parts["sheet_info"], None, detail_xml.encode("utf-8")))
+    with timed("export.save"):
+        return _write_zip(entries)